@@ -0,0 +1,40 @@
+"""
+Gunicorn config of the ASGI deployment profile.
+
+Uvicorn workers serve `VandAPI.asgi` with the native async menu and user
+views enabled. Run it with:
+
+    gunicorn -c python:VandAPI.gunicorn_asgi
+"""
+
+import os
+import multiprocessing
+
+wsgi_app = "VandAPI.asgi:application"
+worker_class = "uvicorn_worker.UvicornWorker"
+workers = int(os.environ.get("GUNICORN_WORKERS", multiprocessing.cpu_count() * 2 + 1))
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8000")
+keepalive = int(os.environ.get("GUNICORN_KEEPALIVE", 5))
+
+# Serve the public menu and the current user with the async views
+raw_env = ["ASYNC_VIEWS=True"]
+
+
+def on_starting(server):
+    # Refuse to start several workers that would not share the menu version
+    import django
+    from django.core.exceptions import ImproperlyConfigured
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "VandAPI.settings")
+    django.setup()
+    from menu.checks import check_shared_menu_cache
+
+    for error in check_shared_menu_cache(workers=server.cfg.workers):
+        raise ImproperlyConfigured(f"{error.msg} {error.hint}")
+
+
+def worker_exit(server, worker):
+    # Send the emails still queued in the worker before it goes away
+    from mail.utils import mail_pool
+
+    mail_pool.shutdown()
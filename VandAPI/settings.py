@@ -14,6 +14,10 @@ ALLOWED_HOSTS = os.environ.get("ALLOWED_HOSTS", "localhost").split(",")
 
 INTERNAL_IPS = os.environ.get("INTERNAL_IPS", "127.0.0.1").split(",")
 
+# Serve the public menu and the current user with the native async views,
+# for the ASGI (uvicorn) deployment profile
+ASYNC_VIEWS = os.environ.get("ASYNC_VIEWS", "False") == "True"
+
 
 AUTH_USER_MODEL = "users.User"
 
@@ -47,9 +51,15 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
-    "debug_toolbar.middleware.DebugToolbarMiddleware",
 ]
 
+# The debug toolbar middleware is sync only, under ASGI it would push every
+# request through a thread
+if ASYNC_VIEWS:
+    SILENCED_SYSTEM_CHECKS = ["debug_toolbar.W001"]
+else:
+    MIDDLEWARE.append("debug_toolbar.middleware.DebugToolbarMiddleware")
+
 ROOT_URLCONF = "VandAPI.urls"
 
 TEMPLATES = [
@@ -92,6 +102,20 @@ DATABASES = {
 #     }
 # }
 
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# Use a shared backend (e.g. redis or memcached) when running several workers,
+# the menu snapshot and its version are shared through this cache.
+
+CACHES = {
+    "default": {
+        "BACKEND": os.environ.get(
+            "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.environ.get("CACHE_LOCATION", ""),
+    }
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -157,6 +181,7 @@ REST_FRAMEWORK = {
         "anon": "10/minute",  # Limit anonymous users to 3 requests per minute
         "login_v1": "5/minute",  # Limit to 5 login attempts per minute
         "verify_login_v1": "3/minute",  # Limit to 10 OTP verifications per minute
+        "menu_search_v1": "120/minute",  # Typeahead sends a request per keystroke
     },
 }
 
@@ -6,7 +6,7 @@ from django.contrib.auth import authenticate
 from django.utils.translation import gettext_lazy as _
 
 from users.models import User
-from otp.models import LoginOtp
+from otp.utils import OtpResult, otp_store
 from mail.utils import async_notify_superusers
 
 
@@ -81,29 +81,19 @@ class VerifyLoginSerializer(serializers.Serializer):
         otp_id = data.get("otpId")
         otp_code = data.get("otpCode")
 
-        # Fetch the OTP record related to the user
-        try:
-            otp_instance = LoginOtp.objects.get(
-                id=otp_id, is_verified=False, is_active=True
-            )
-            if otp_instance is None:
-                raise serializers.ValidationError({"detail": _("کد ورود معتبر نیست.")})
-        except LoginOtp.DoesNotExist:
-            raise serializers.ValidationError({"detail": _("کد ورود معتبر نیست.")})
+        # Check the code against the stored OTP, counting the attempt
+        result, otp_user = otp_store.verify(otp_id, otp_code)
 
-        otp_user: User = otp_instance.user
+        if result == OtpResult.INVALID:
+            raise serializers.ValidationError({"detail": _("کد ورود معتبر نیست.")})
 
         # Check if all attempts have been used
-        if not otp_instance.has_attempts_left():
-            # Update the OTP record
-            otp_instance.attempts += 1
-            otp_instance.is_active = False
-            otp_instance.save()
+        if result == OtpResult.EXHAUSTED:
             # Ban the user
             otp_user.is_staff = False
             otp_user.is_active = False
             otp_user.save()
-            # Send an alert email to all active superusers and log the event
+            # Alert all active superusers right away, not in a digest, and log the event
             message = f"Warning:User has been banned for too many failed login attempts | Detail:user={otp_user.username} | Date:{timezone.now()}"
             logger.warning(message)
             async_notify_superusers(message)
@@ -113,18 +103,12 @@ class VerifyLoginSerializer(serializers.Serializer):
             )
 
         # Check if OTP is expired
-        if otp_instance.is_expired():
-            otp_instance.attempts += 1
-            otp_instance.is_active = False
-            otp_instance.save()
+        if result == OtpResult.EXPIRED:
             raise serializers.ValidationError({"detail": _("کد ورود منقضی شده است.")})
 
         # Check if the OTP is valid
-        if not otp_instance.check_otp(otp_code):
-            otp_instance.attempts += 1
-            otp_instance.save()
+        if result == OtpResult.WRONG:
             raise serializers.ValidationError({"detail": _("کد ورود اشتباه است.")})
 
         data["otp_user"] = otp_user
-        data["otp_instance"] = otp_instance
         return data
@@ -12,12 +12,12 @@ from django.utils.translation import gettext_lazy as _
 from django.contrib.auth.models import update_last_login
 
 from users.models import User
-from otp.models import LoginOtp
+from otp.utils import otp_store
 from authentication.api.v1.serializers import LoginSerializer, VerifyLoginSerializer
 from mail.utils import (
     async_mail_login_otp,
-    async_notify_superusers,
     async_notify_user,
+    queue_superuser_alert,
 )
 
 
@@ -61,23 +61,21 @@ class LoginView(APIView):
                 # If an admin user
                 with transaction.atomic():
                     # Create an OTP and send it to the user’s email
-                    otp_code = LoginOtp.generate_otp_code()
-                    hashed_otp_code = LoginOtp.hash_otp(otp_code)
-                    otp_instance = LoginOtp.objects.create(
-                        user=user, code=hashed_otp_code
-                    )
+                    otp_id, otp_code = otp_store.create(user)
                     # Send OTP to the user’s email asynchronously
-                    async_mail_login_otp(otp_instance.user, otp_code)
-                    # Send an alert email to all active superusers asynchronously
-                    async_notify_superusers(
-                        f"Info:Login OTP sent | Detail:user={user.username} | Date:{timezone.now()}"
+                    async_mail_login_otp(user, otp_code)
+                    # Alert all active superusers in the next digest email
+                    queue_superuser_alert(
+                        "Login OTP sent",
+                        user.username,
+                        f"Info:Login OTP sent | Detail:user={user.username} | Date:{timezone.now()}",
                     )
                     logger.info(
                         f"Info:Login OTP sent | Detail:user={user.username} | Date:{timezone.now()}"
                     )
                     return Response(
                         data={
-                            "otpId": otp_instance.id,
+                            "otpId": otp_id,
                             "detail": "confirm-login-otp",
                         },
                         status=status.HTTP_200_OK,
@@ -105,15 +103,10 @@ class VerifyLoginView(APIView):
     def post(self, request: Request):
         serializer = VerifyLoginSerializer(data=request.data)
         if serializer.is_valid():
+            # The OTP was verified and used up by the serializer
             otp_user: User = serializer.validated_data["otp_user"]
-            otp_instance: LoginOtp = serializer.validated_data["otp_instance"]
             try:
                 with transaction.atomic():
-                    # OTP is verified, mark OTP as verified and save
-                    otp_instance.is_active = False
-                    otp_instance.is_verified = True
-                    otp_instance.save()
-
                     # Generate JWT tokens
                     token = otp_user.generate_jwt_token()
                     refresh_token = str(token)
@@ -124,9 +117,11 @@ class VerifyLoginView(APIView):
                         otp_user,
                         f"Dear {otp_user.username}, you have been logged in to the Cafe Vand website. If this action was not initiated by you, please contact the website administrator immediately.",
                     )
-                    # Send an alert email to all active superusers asynchronously
-                    async_notify_superusers(
-                        f"Info:Successful verify login | Detail:user={otp_user.username} | Date:{timezone.now()}"
+                    # Alert all active superusers in the next digest email
+                    queue_superuser_alert(
+                        "Successful verify login",
+                        otp_user.username,
+                        f"Info:Successful verify login | Detail:user={otp_user.username} | Date:{timezone.now()}",
                     )
                     logger.error(
                         f"Info:Successful verify login | Detail:user={otp_user.username} | Date:{timezone.now()}"
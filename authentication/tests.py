@@ -1,3 +1,66 @@
+from unittest import mock
+
 from django.test import TestCase
 
-# Create your tests here.
+from users.models import User
+from mail.models import AdminAlert
+from otp.utils import otp_store
+from authentication.api.v1.serializers import VerifyLoginSerializer
+
+
+class VerifyLoginSerializerTests(TestCase):
+    """Tests of the login OTP verification and the ban on exhausted attempts."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username="staff", password="pass12345", is_staff=True
+        )
+        User.objects.create_superuser(
+            username="admin", password="pass12345", email="admin@example.com"
+        )
+
+    def setUp(self):
+        self.otp_id, self.otp_code = otp_store.create(self.user)
+        self.wrong_code = "000000" if self.otp_code != "000000" else "111111"
+
+    def verify(self, otp_code: str) -> VerifyLoginSerializer:
+        serializer = VerifyLoginSerializer(
+            data={"otpId": str(self.otp_id), "otpCode": otp_code}
+        )
+        serializer.is_valid()
+        return serializer
+
+    @mock.patch("mail.utils.alert_utils.MAIL_DIGEST_WINDOW", 300)
+    def test_exhausted_attempts_ban_user(self):
+        """The attempt after three wrong codes bans the user and alerts the admins."""
+        for _ in range(3):
+            self.assertFalse(self.verify(self.wrong_code).is_valid())
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.is_active)
+
+        with mock.patch(
+            "authentication.api.v1.serializers.login_serializer.async_notify_superusers"
+        ) as notify_superusers:
+            serializer = self.verify(self.otp_code)
+        self.assertFalse(serializer.is_valid())
+        self.assertEqual(
+            serializer.errors["detail"][0], "حساب کاربری شما موقتا مسدود شده است."
+        )
+
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.is_active)
+        self.assertFalse(self.user.is_staff)
+        # The ban is alerted right away, not in a digest
+        notify_superusers.assert_called_once()
+        self.assertIn("banned", notify_superusers.call_args.args[0])
+        self.assertFalse(AdminAlert.objects.exists())
+
+    def test_right_code(self):
+        """The right code returns the user of the OTP, once."""
+        serializer = self.verify(self.otp_code)
+        self.assertTrue(serializer.is_valid())
+        self.assertEqual(serializer.validated_data["otp_user"], self.user)
+
+        serializer = self.verify(self.otp_code)
+        self.assertEqual(serializer.errors["detail"][0], "کد ورود معتبر نیست.")
@@ -1,3 +1,37 @@
+from mail.models import OutboxEmail
 from django.contrib import admin
 
-# Register your models here.
+
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+
+    list_display = (
+        "subject",
+        "status",
+        # ints
+        "attempts",
+        # datetimes
+        "next_attempt_at",
+        "sent_at",
+        "created_at",
+    )
+    readonly_fields = (
+        "subject",
+        "from_email",
+        "recipients",
+        "is_admin_alert",
+        "status",
+        "attempts",
+        "last_error",
+        "next_attempt_at",
+        "sent_at",
+        "created_at",
+    )
+    # The body may hold an OTP code
+    exclude = ("body",)
+    list_filter = ("status", "is_admin_alert", "created_at")
+    search_fields = ("subject",)
+
+    def has_add_permission(self, request):
+        """Outbox emails are only written by the application."""
+        return False
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class MailConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'mail'
+
+    def ready(self):
+        # Register the alert recipients invalidation signal receivers
+        from mail import signals  # noqa: F401
@@ -0,0 +1,39 @@
+import os
+
+# Number of background threads sending emails in each process, defaulting to 2
+MAIL_WORKERS = int(os.environ.get("MAIL_WORKERS", 2))
+
+# Emails waiting to be sent in each process before callers are held back, defaulting to 1000
+MAIL_QUEUE_SIZE = int(os.environ.get("MAIL_QUEUE_SIZE", 1000))
+
+# How long (in seconds) a caller waits for room in a full queue before the email is dropped
+MAIL_QUEUE_TIMEOUT = float(os.environ.get("MAIL_QUEUE_TIMEOUT", 2))
+
+# Most emails sent at once over a single SMTP connection, defaulting to 50
+MAIL_BATCH_SIZE = int(os.environ.get("MAIL_BATCH_SIZE", 50))
+
+# How long (in seconds) an idle SMTP connection is kept open, defaulting to 30 seconds
+MAIL_CONNECTION_IDLE_TIMEOUT = float(os.environ.get("MAIL_CONNECTION_IDLE_TIMEOUT", 30))
+
+# Write async emails to the database outbox, sent by `manage.py run_mail_worker`, instead of
+# sending them from the worker pool of the web process. Off by default, as no email is sent
+# at all, admin login OTPs included, unless the mail worker runs
+MAIL_USE_OUTBOX = os.environ.get("MAIL_USE_OUTBOX", "False") == "True"
+
+# Delivery attempts of an outbox email before it is marked as failed, defaulting to 8
+MAIL_MAX_ATTEMPTS = int(os.environ.get("MAIL_MAX_ATTEMPTS", 8))
+
+# Delay (in seconds) before retrying a failed outbox email, doubled after each attempt
+MAIL_RETRY_BASE_DELAY = float(os.environ.get("MAIL_RETRY_BASE_DELAY", 30))
+MAIL_RETRY_MAX_DELAY = float(os.environ.get("MAIL_RETRY_MAX_DELAY", 60 * 60))
+
+# How long (in seconds) claimed outbox emails are reserved for a worker, claimed again afterwards
+# if the worker died before recording the delivery
+MAIL_CLAIM_TIMEOUT = float(os.environ.get("MAIL_CLAIM_TIMEOUT", 5 * 60))
+
+# Superuser alerts are coalesced into one digest email sent by the mail worker every this many
+# seconds, defaulting to 5 minutes with the outbox, 0 to send each alert on its own
+MAIL_DIGEST_WINDOW = float(os.environ.get("MAIL_DIGEST_WINDOW", 5 * 60 if MAIL_USE_OUTBOX else 0))
+
+# Users listed for each event of a digest email, the others are summed up
+MAIL_DIGEST_MAX_USERS = int(os.environ.get("MAIL_DIGEST_MAX_USERS", 20))
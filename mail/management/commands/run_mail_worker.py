@@ -0,0 +1,180 @@
+import time
+import signal
+import threading
+from logging import getLogger
+from datetime import timedelta
+
+from django.utils import timezone
+from django.core.management.base import BaseCommand
+
+from mail.models import OutboxEmail
+from mail.mail_settings import MAIL_BATCH_SIZE, MAIL_DIGEST_WINDOW
+from mail.utils.alert_utils import send_alert_digest
+from mail.utils.pool_utils import open_connection, close_connection
+
+
+logger = getLogger("email_v1")
+
+
+class WorkerMetrics:
+    """Delivery counters and latencies of the mail worker since the last report."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.started = time.perf_counter()
+        self.sent = self.retried = self.failed = 0
+        # Seconds from the email being queued to being sent, and of the SMTP send
+        self.latencies, self.send_times = [], []
+
+    @staticmethod
+    def percentile(values: list, percent: float) -> float:
+        if not values:
+            return 0.0
+        values = sorted(values)
+        return values[min(len(values) - 1, int(len(values) * percent))]
+
+    def report(self, pending: int) -> str:
+        """Return the metrics line and start a new reporting period."""
+        elapsed = time.perf_counter() - self.started
+        line = (
+            f"sent={self.sent}, retried={self.retried}, failed={self.failed}, "
+            f"pending={pending}, rate={self.sent / elapsed if elapsed else 0:.1f}/s, "
+            f"latency_p50={self.percentile(self.latencies, 0.5):.2f}s, "
+            f"latency_p95={self.percentile(self.latencies, 0.95):.2f}s, "
+            f"send_p50={self.percentile(self.send_times, 0.5) * 1000:.0f}ms, "
+            f"send_p95={self.percentile(self.send_times, 0.95) * 1000:.0f}ms"
+        )
+        self.reset()
+        return line
+
+
+class Command(BaseCommand):
+    help = (
+        "Send the emails of the database outbox, retrying failed ones with "
+        "exponential backoff. Several workers can run side by side."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=MAIL_BATCH_SIZE,
+            help=f"Number of emails claimed at a time (default: {MAIL_BATCH_SIZE}).",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=1,
+            help="Seconds to wait when no email is due (default: 1).",
+        )
+        parser.add_argument(
+            "--metrics-interval",
+            type=float,
+            default=60,
+            help="Seconds between metrics reports (default: 60).",
+        )
+        parser.add_argument(
+            "--digest-interval",
+            type=float,
+            default=MAIL_DIGEST_WINDOW,
+            help=f"Seconds between admin alert digests, 0 to never send them (default: {MAIL_DIGEST_WINDOW:g}).",
+        )
+        parser.add_argument(
+            "--purge-after-days",
+            type=int,
+            default=7,
+            help="Delete sent emails older than this many days, 0 to keep them (default: 7).",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Send the due emails and exit instead of running continuously.",
+        )
+
+    def handle(self, *args, **options):
+        self.stopping = threading.Event()
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, lambda *args: self.stopping.set())
+
+        metrics = WorkerMetrics()
+        next_report = time.monotonic() + options["metrics_interval"]
+        next_digest = time.monotonic() + options["digest_interval"]
+        connection = None
+
+        while not self.stopping.is_set():
+            if options["digest_interval"] and time.monotonic() >= next_digest:
+                send_alert_digest()
+                next_digest = time.monotonic() + options["digest_interval"]
+
+            emails = OutboxEmail.objects.claim(options["batch_size"])
+            if emails:
+                connection = self.send_emails(connection, emails, metrics)
+            else:
+                # Servers drop idle connections anyway
+                connection = close_connection(connection)
+                if options["once"]:
+                    # Alerts buffered since the last run
+                    if options["digest_interval"] and send_alert_digest():
+                        continue
+                    break
+                self.stopping.wait(options["poll_interval"])
+
+            if time.monotonic() >= next_report:
+                self.report(metrics, options["purge_after_days"])
+                next_report = time.monotonic() + options["metrics_interval"]
+
+        close_connection(connection)
+        self.report(metrics, options["purge_after_days"])
+
+    def send_emails(self, connection, emails: list, metrics: WorkerMetrics):
+        """
+        Send claimed emails one at a time over a reused connection, recording
+        each delivery or failure.
+
+        Returns:
+            The connection to reuse, `None` after a failure.
+        """
+        for email in emails:
+            started = time.perf_counter()
+            try:
+                if connection is None:
+                    connection = open_connection()
+                connection.send_messages([email.to_message()])
+            except Exception as e:
+                connection = close_connection(connection)
+                email.mark_failed(str(e))
+                if email.status == OutboxEmail.Status.FAILED:
+                    metrics.failed += 1
+                    logger.error(
+                        f"Error:Failed to send outbox email | Detail:subject={email.subject}, attempts={email.attempts}, error={str(e)} | Date:{timezone.now()}"
+                    )
+                else:
+                    metrics.retried += 1
+                continue
+
+            email.mark_sent()
+            metrics.sent += 1
+            metrics.send_times.append(time.perf_counter() - started)
+            metrics.latencies.append((email.sent_at - email.created_at).total_seconds())
+            if email.is_admin_alert:
+                logger.info(
+                    f"Info:Outbox email sent | Detail:subject={email.subject} | Date:{timezone.now()}"
+                )
+            else:
+                logger.info(
+                    f"Info:Outbox email sent | Detail:subject={email.subject}, emails={email.recipients} | Date:{timezone.now()}"
+                )
+        return connection
+
+    def report(self, metrics: WorkerMetrics, purge_after_days: int):
+        """Log the metrics and delete the old sent emails."""
+        if purge_after_days:
+            OutboxEmail.objects.filter(
+                status=OutboxEmail.Status.SENT,
+                sent_at__lt=timezone.now() - timedelta(days=purge_after_days),
+            ).delete()
+
+        line = metrics.report(pending=OutboxEmail.objects.due().count())
+        logger.info(f"Info:Mail worker metrics | Detail:{line} | Date:{timezone.now()}")
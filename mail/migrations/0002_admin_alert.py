@@ -0,0 +1,26 @@
+# Generated by Django 5.1 on 2026-10-18 15:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mail', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AdminAlert',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event', models.CharField(max_length=100, verbose_name='event')),
+                ('username', models.CharField(blank=True, max_length=150, verbose_name='username')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='created at')),
+            ],
+            options={
+                'verbose_name': 'admin alert',
+                'verbose_name_plural': 'admin alerts',
+            },
+        ),
+    ]
@@ -0,0 +1,2 @@
+from .alert_model import AdminAlert
+from .outbox_model import OutboxEmail
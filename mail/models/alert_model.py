@@ -0,0 +1,22 @@
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+
+class AdminAlert(models.Model):
+    """
+    Superuser alert buffered for the next digest email.
+
+    The mail worker sends the buffered alerts as one digest email every
+    `MAIL_DIGEST_WINDOW` seconds, counted by event and user, and deletes them.
+    """
+
+    event = models.CharField(_("event"), max_length=100)
+    username = models.CharField(_("username"), max_length=150, blank=True)
+    created_at = models.DateTimeField(_("created at"), auto_now_add=True)
+
+    class Meta:
+        verbose_name = _("admin alert")
+        verbose_name_plural = _("admin alerts")
+
+    def __str__(self) -> str:
+        return f"{self.event} ({self.username})"
@@ -0,0 +1,130 @@
+import uuid
+import random
+from datetime import timedelta
+
+from django.db import models, transaction
+from django.utils import timezone
+from django.core.mail import EmailMessage
+from django.utils.translation import gettext_lazy as _
+
+from mail.mail_settings import (
+    MAIL_MAX_ATTEMPTS,
+    MAIL_CLAIM_TIMEOUT,
+    MAIL_RETRY_BASE_DELAY,
+    MAIL_RETRY_MAX_DELAY,
+)
+
+
+class OutboxQuerySet(models.QuerySet):
+    """QuerySet of the outbox emails, used by the mail worker."""
+
+    def due(self):
+        """Return the pending emails whose next attempt is due."""
+        return self.filter(
+            status=OutboxEmail.Status.PENDING, next_attempt_at__lte=timezone.now()
+        )
+
+    def claim(self, batch_size: int) -> list:
+        """
+        Claim up to `batch_size` due emails for this worker.
+
+        The rows are locked with ``SKIP LOCKED``, so concurrent workers claim
+        different emails, then pushed back by `MAIL_CLAIM_TIMEOUT` so they
+        are not claimed again while being sent. Emails of a worker that died
+        are claimed again once that timeout has passed.
+
+        Returns:
+            list: The claimed `OutboxEmail` instances, oldest first.
+        """
+        with transaction.atomic(using=self.db):
+            emails = list(
+                self.due()
+                .select_for_update(skip_locked=True)
+                .order_by("next_attempt_at")[:batch_size]
+            )
+            if emails:
+                self.filter(pk__in=[email.pk for email in emails]).update(
+                    attempts=models.F("attempts") + 1,
+                    next_attempt_at=timezone.now() + timedelta(seconds=MAIL_CLAIM_TIMEOUT),
+                )
+        for email in emails:
+            email.attempts += 1
+        return emails
+
+
+class OutboxEmail(models.Model):
+    """
+    Email waiting in the database to be sent by the mail worker.
+
+    Written in the transaction of the request that sends it, so it is sent
+    only if that transaction commits and is not lost if the web worker dies.
+    The body, which may hold an OTP code, is cleared once sent.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "pending", _("pending")
+        SENT = "sent", _("sent")
+        FAILED = "failed", _("failed")
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+
+    subject = models.CharField(_("subject"), max_length=255)
+    body = models.TextField(_("body"), blank=True)
+    from_email = models.CharField(_("from email"), max_length=255, blank=True)
+    recipients = models.JSONField(_("recipients"), default=list)
+    # Admin alerts are logged without their recipients
+    is_admin_alert = models.BooleanField(_("is admin alert"), default=False)
+
+    status = models.CharField(
+        _("status"), max_length=10, choices=Status.choices, default=Status.PENDING
+    )
+    attempts = models.IntegerField(_("attempts"), default=0)
+    last_error = models.TextField(_("last error"), blank=True)
+
+    next_attempt_at = models.DateTimeField(_("next attempt at"), default=timezone.now)
+    sent_at = models.DateTimeField(_("sent at"), null=True, blank=True)
+    created_at = models.DateTimeField(_("created at"), auto_now_add=True)
+
+    objects = OutboxQuerySet.as_manager()
+
+    class Meta:
+        ordering = ["-created_at"]
+        verbose_name = _("outbox email")
+        verbose_name_plural = _("outbox emails")
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"]),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.subject} ({self.status})"
+
+    def to_message(self) -> EmailMessage:
+        """Return the `EmailMessage` to send."""
+        return EmailMessage(self.subject, self.body, self.from_email or None, self.recipients)
+
+    def get_retry_delay(self) -> float:
+        """
+        Return the seconds to wait before the next attempt, doubled after
+        each attempt up to `MAIL_RETRY_MAX_DELAY`, with jitter so emails that
+        failed together are not retried together.
+        """
+        delay = min(MAIL_RETRY_BASE_DELAY * 2 ** (self.attempts - 1), MAIL_RETRY_MAX_DELAY)
+        return delay * random.uniform(0.8, 1.2)
+
+    def mark_sent(self):
+        """Record the delivery, clearing the body."""
+        self.status = self.Status.SENT
+        self.sent_at = timezone.now()
+        self.body = ""
+        self.last_error = ""
+        self.save(update_fields=["status", "sent_at", "body", "last_error"])
+
+    def mark_failed(self, error: str):
+        """Record a failed attempt, scheduling a retry unless none is left."""
+        self.last_error = error
+        if self.attempts >= MAIL_MAX_ATTEMPTS:
+            self.status = self.Status.FAILED
+            self.body = ""
+        else:
+            self.next_attempt_at = timezone.now() + timedelta(seconds=self.get_retry_delay())
+        self.save(update_fields=["status", "body", "last_error", "next_attempt_at"])
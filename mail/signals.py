@@ -0,0 +1,22 @@
+from django.db.models import signals
+from django.dispatch import receiver
+
+from users.models import User
+from mail.utils.recipient_utils import RECIPIENT_FIELDS, invalidate_superuser_emails
+
+
+@receiver(signals.post_save, sender=User)
+def invalidate_recipients_on_save(sender, using, update_fields=None, **kwargs):
+    """
+    Invalidate the admin alert recipients when a user is saved, unless only
+    fields unrelated to them were saved, such as `last_login` on login.
+    """
+    if update_fields is not None and not RECIPIENT_FIELDS & set(update_fields):
+        return
+    invalidate_superuser_emails(using=using)
+
+
+@receiver(signals.post_delete, sender=User)
+def invalidate_recipients_on_delete(sender, using, **kwargs):
+    """Invalidate the admin alert recipients when a user is deleted."""
+    invalidate_superuser_emails(using=using)
@@ -1,3 +1,331 @@
-from django.test import TestCase
+import smtplib
+import threading
+from unittest import mock
+from datetime import timedelta
 
-# Create your tests here.
+from django.db import transaction
+from django.core.cache import cache
+from django.utils import timezone
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.core.mail import EmailMessage
+from django.core.mail.backends.base import BaseEmailBackend
+from django.contrib.auth.models import update_last_login
+
+from users.models import User
+from otp.models import LoginOtp
+from otp.utils.store_utils import DatabaseOtpStore
+from mail.models import AdminAlert, OutboxEmail
+from mail.mail_settings import MAIL_MAX_ATTEMPTS, MAIL_CLAIM_TIMEOUT
+from mail.utils import async_mail_login_otp, queue_superuser_alert, send_alert_digest
+from mail.utils.recipient_utils import SUPERUSER_EMAILS_KEY, get_superuser_emails
+from mail.utils.pool_utils import EmailWorkerPool
+
+
+class FakeEmailBackend(BaseEmailBackend):
+    """
+    Email backend recording the subjects sent, refusing the recipients of
+    emails whose subject starts with "refused" and dropping the connection
+    on emails whose subject is in `disconnect`, once.
+    """
+
+    sent = []
+    opened = 0
+    disconnect = set()
+    # Set to hold the emails back until released
+    release = None
+    sending = threading.Event()
+
+    def open(self):
+        FakeEmailBackend.opened += 1
+        return True
+
+    def send_messages(self, email_messages):
+        for message in email_messages:
+            FakeEmailBackend.sending.set()
+            if FakeEmailBackend.release is not None:
+                FakeEmailBackend.release.wait(5)
+            if message.subject in FakeEmailBackend.disconnect:
+                FakeEmailBackend.disconnect.discard(message.subject)
+                raise smtplib.SMTPServerDisconnected("Connection unexpectedly closed")
+            if message.subject.startswith("refused"):
+                raise smtplib.SMTPRecipientsRefused({message.to[0]: (550, b"No such user")})
+            FakeEmailBackend.sent.append(message.subject)
+        return len(email_messages)
+
+
+@override_settings(EMAIL_BACKEND="mail.tests.FakeEmailBackend")
+class EmailWorkerPoolTests(SimpleTestCase):
+    """Tests of the worker pool sending the async emails without the outbox."""
+
+    def setUp(self):
+        FakeEmailBackend.sent = []
+        FakeEmailBackend.opened = 0
+        FakeEmailBackend.disconnect = set()
+        FakeEmailBackend.release = None
+        FakeEmailBackend.sending = threading.Event()
+        self.pool = EmailWorkerPool(workers=1, queue_size=100, batch_size=50)
+        self.addCleanup(self.pool.shutdown)
+        logger_patcher = mock.patch("mail.utils.pool_utils.logger")
+        self.logger = logger_patcher.start()
+        self.addCleanup(logger_patcher.stop)
+
+    def send(self, *subjects: str) -> list:
+        return [
+            self.pool.send(EmailMessage(subject, "body", None, ["admin@example.com"]))
+            for subject in subjects
+        ]
+
+    def test_refused_email_skipped(self):
+        """An email refused by the server does not hold back the others."""
+        self.send("first", "refused", "second", "third")
+        self.pool.shutdown()
+
+        self.assertEqual(FakeEmailBackend.sent, ["first", "second", "third"])
+        self.assertEqual(FakeEmailBackend.opened, 1)
+        self.logger.error.assert_called_once()
+        self.assertIn("subject=refused", self.logger.error.call_args.args[0])
+
+    def test_disconnect_retried(self):
+        """An email failing on a dropped connection is sent once over a new one."""
+        FakeEmailBackend.disconnect = {"second"}
+        self.send("first", "second", "third")
+        self.pool.shutdown()
+
+        self.assertEqual(FakeEmailBackend.sent, ["first", "second", "third"])
+        self.assertEqual(FakeEmailBackend.opened, 2)
+
+    def test_full_queue_drops_email(self):
+        """With the queue full, an email is dropped after `MAIL_QUEUE_TIMEOUT`."""
+        FakeEmailBackend.release = threading.Event()
+        self.pool = EmailWorkerPool(workers=1, queue_size=1, batch_size=1)
+
+        with mock.patch("mail.utils.pool_utils.MAIL_QUEUE_TIMEOUT", 0.05):
+            self.assertEqual(self.send("first"), [True])
+            # The worker holds the first email, the second fills the queue
+            self.assertTrue(FakeEmailBackend.sending.wait(5))
+            self.assertEqual(self.send("second", "third"), [True, False])
+
+        FakeEmailBackend.release.set()
+        self.pool.shutdown()
+        self.assertEqual(FakeEmailBackend.sent, ["first", "second"])
+
+    def test_shutdown_drains_queue(self):
+        """Shutting down sends every queued email before stopping the workers."""
+        subjects = [f"email {i}" for i in range(120)]
+        self.send(*subjects)
+        self.pool.shutdown()
+
+        self.assertEqual(FakeEmailBackend.sent, subjects)
+        self.assertFalse(any(thread.is_alive() for thread in self.pool.threads))
+
+
+class SuperuserEmailsTests(TestCase):
+    """Tests of the cached emails of the superusers receiving the admin alerts."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            username="admin", password="pass12345", email="admin@example.com"
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def assertInvalidated(self, change):
+        """Assert the cached emails are dropped once `change` is committed."""
+        get_superuser_emails()
+        with self.captureOnCommitCallbacks(execute=True):
+            change()
+            # Still cached until the change is committed
+            self.assertIsNotNone(cache.get(SUPERUSER_EMAILS_KEY))
+        self.assertIsNone(cache.get(SUPERUSER_EMAILS_KEY))
+
+    def test_recipient_fields_invalidate(self):
+        """Saving a field deciding the recipients invalidates the emails."""
+        for field, value in [
+            ("email", "root@example.com"),
+            ("is_active", False),
+            ("is_superuser", False),
+        ]:
+            with self.subTest(field=field):
+                setattr(self.admin, field, value)
+                self.assertInvalidated(lambda: self.admin.save(update_fields=[field]))
+
+        self.assertEqual(get_superuser_emails(), [])
+
+    def test_full_save_invalidates(self):
+        """Saving a user with all its fields invalidates the emails."""
+        self.admin.email = "root@example.com"
+        self.assertInvalidated(self.admin.save)
+        self.assertEqual(get_superuser_emails(), ["root@example.com"])
+
+    def test_new_superuser_invalidates(self):
+        """Creating or deleting a superuser invalidates the emails."""
+        self.assertInvalidated(
+            lambda: User.objects.create_superuser(
+                username="root", password="pass12345", email="root@example.com"
+            )
+        )
+        self.assertEqual(
+            sorted(get_superuser_emails()), ["admin@example.com", "root@example.com"]
+        )
+        self.assertInvalidated(User.objects.get(username="root").delete)
+
+    def test_last_login_keeps_cache(self):
+        """Updating `last_login` on login keeps the cached emails."""
+        self.assertEqual(get_superuser_emails(), ["admin@example.com"])
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            update_last_login(None, self.admin)
+        self.assertEqual(callbacks, [])
+        self.assertEqual(cache.get(SUPERUSER_EMAILS_KEY), ["admin@example.com"])
+
+
+@mock.patch("mail.utils.mail_utils.MAIL_USE_OUTBOX", True)
+class OutboxEmailTests(TestCase):
+    """Tests of the database outbox sent by the mail worker."""
+
+    def create_email(self, **kwargs) -> OutboxEmail:
+        return OutboxEmail.objects.create(
+            subject="Cafe Vand Login Code",
+            body="Your login code is: 123456",
+            recipients=["admin@example.com"],
+            **kwargs,
+        )
+
+    def test_claim_reserves_emails(self):
+        """Claimed emails count an attempt and are not claimed again meanwhile."""
+        due = [self.create_email() for _ in range(3)]
+        self.create_email(next_attempt_at=timezone.now() + timedelta(minutes=5))
+
+        claimed = OutboxEmail.objects.claim(2)
+        self.assertEqual([email.pk for email in claimed], [email.pk for email in due[:2]])
+        self.assertEqual([email.attempts for email in claimed], [1, 1])
+
+        email = OutboxEmail.objects.get(pk=claimed[0].pk)
+        self.assertEqual(email.attempts, 1)
+        self.assertGreater(
+            email.next_attempt_at,
+            timezone.now() + timedelta(seconds=MAIL_CLAIM_TIMEOUT - 5),
+        )
+        # Only the last due email is left to claim
+        self.assertEqual([email.pk for email in OutboxEmail.objects.claim(10)], [due[2].pk])
+        self.assertEqual(OutboxEmail.objects.claim(10), [])
+
+    def test_mark_sent_clears_body(self):
+        """A sent email keeps no body, which may hold an OTP code."""
+        self.create_email()
+        email = OutboxEmail.objects.claim(1)[0]
+        email.mark_sent()
+
+        email.refresh_from_db()
+        self.assertEqual(email.status, OutboxEmail.Status.SENT)
+        self.assertEqual(email.body, "")
+        self.assertIsNotNone(email.sent_at)
+
+    def test_mark_failed_backoff(self):
+        """Failed attempts are retried later and later, up to `MAIL_MAX_ATTEMPTS`."""
+        email = self.create_email()
+        delays = []
+        for attempts in range(1, MAIL_MAX_ATTEMPTS):
+            email.attempts = attempts
+            with mock.patch("mail.models.outbox_model.random.uniform", return_value=1):
+                before = timezone.now()
+                email.mark_failed("Connection refused")
+            delays.append((email.next_attempt_at - before).total_seconds())
+
+            email.refresh_from_db()
+            self.assertEqual(email.status, OutboxEmail.Status.PENDING)
+            self.assertEqual(email.last_error, "Connection refused")
+            self.assertNotEqual(email.body, "")
+
+        self.assertEqual(delays, sorted(delays))
+        self.assertAlmostEqual(delays[1] / delays[0], 2, places=2)
+
+        email.attempts = MAIL_MAX_ATTEMPTS
+        email.mark_failed("Connection refused")
+        email.refresh_from_db()
+        self.assertEqual(email.status, OutboxEmail.Status.FAILED)
+        self.assertEqual(email.body, "")
+
+    def test_rolled_back_with_request(self):
+        """The OTP email is only sent if the OTP it carries was saved."""
+        user = User.objects.create_user(
+            username="admin", password="pass12345", email="admin@example.com"
+        )
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            otp_id, otp_code = DatabaseOtpStore().create(user)
+            async_mail_login_otp(user, otp_code)
+            self.assertEqual(OutboxEmail.objects.count(), 1)
+            raise RuntimeError("Request failed")
+
+        self.assertFalse(LoginOtp.objects.exists())
+        self.assertFalse(OutboxEmail.objects.exists())
+
+
+@mock.patch("mail.utils.mail_utils.MAIL_USE_OUTBOX", True)
+@mock.patch("mail.utils.alert_utils.MAIL_DIGEST_WINDOW", 300)
+class AlertDigestTests(TestCase):
+    """Tests of the superuser alerts coalesced into digest emails."""
+
+    @classmethod
+    def setUpTestData(cls):
+        User.objects.create_superuser(
+            username="admin", password="pass12345", email="admin@example.com"
+        )
+
+    def setUp(self):
+        cache.clear()
+        logger_patcher = mock.patch("mail.utils.alert_utils.logger")
+        logger_patcher.start()
+        self.addCleanup(logger_patcher.stop)
+
+    def test_alerts_coalesced(self):
+        """The alerts of a window are sent as one email counting them by event and user."""
+        for _ in range(3):
+            queue_superuser_alert("failed login", "staff", "Failed login of staff")
+        queue_superuser_alert("failed login", "other", "Failed login of other")
+        queue_superuser_alert("login", "staff", "Login of staff")
+        self.assertFalse(OutboxEmail.objects.exists())
+
+        self.assertEqual(send_alert_digest(), 5)
+        self.assertFalse(AdminAlert.objects.exists())
+        email = OutboxEmail.objects.get()
+        self.assertEqual(email.recipients, ["admin@example.com"])
+        self.assertTrue(email.body.startswith("5 alerts from "))
+        self.assertIn("failed login: 4\n  staff: 3\n  other: 1", email.body)
+        self.assertIn("login: 1\n  staff: 1", email.body)
+
+        # Nothing left for the next digest
+        self.assertEqual(send_alert_digest(), 0)
+        self.assertEqual(OutboxEmail.objects.count(), 1)
+
+    @mock.patch("mail.utils.alert_utils.DIGEST_CHUNK_SIZE", 2)
+    def test_alerts_counted_across_chunks(self):
+        """Alerts locked in several chunks are counted once each."""
+        for _ in range(5):
+            queue_superuser_alert("failed login", "staff", "Failed login of staff")
+
+        self.assertEqual(send_alert_digest(), 5)
+        self.assertIn("failed login: 5\n  staff: 5", OutboxEmail.objects.get().body)
+
+    @mock.patch("mail.utils.alert_utils.MAIL_DIGEST_MAX_USERS", 2)
+    def test_max_users_truncated(self):
+        """Only the users with the most alerts are listed, the others are summed up."""
+        for username, count in [("first", 4), ("second", 3), ("third", 2), ("fourth", 1)]:
+            for _ in range(count):
+                queue_superuser_alert("failed login", username, "Failed login")
+
+        send_alert_digest()
+        body = OutboxEmail.objects.get().body
+        self.assertIn(
+            "failed login: 10\n  first: 4\n  second: 3\n  2 other users: 3", body
+        )
+        self.assertNotIn("third", body)
+
+    def test_without_window_sent_right_away(self):
+        """Without a digest window every alert is sent on its own."""
+        with mock.patch("mail.utils.alert_utils.MAIL_DIGEST_WINDOW", 0):
+            queue_superuser_alert("failed login", "staff", "Failed login of staff")
+
+        self.assertFalse(AdminAlert.objects.exists())
+        self.assertEqual(OutboxEmail.objects.get().body, "Failed login of staff")
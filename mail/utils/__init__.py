@@ -2,7 +2,11 @@ from .mail_utils import (
     mail_login_otp,
     notify_superusers,
     # async
+    queue_email,
     async_notify_user,
     async_mail_login_otp,
     async_notify_superusers,
 )
+from .pool_utils import mail_pool
+from .recipient_utils import get_superuser_emails
+from .alert_utils import queue_superuser_alert, send_alert_digest
@@ -0,0 +1,133 @@
+from logging import getLogger
+
+from django.utils import timezone
+from django.db import transaction
+from django.db.models import Count, Max, Min
+
+from mail.models import AdminAlert
+from mail.mail_settings import MAIL_DIGEST_WINDOW, MAIL_DIGEST_MAX_USERS
+from .mail_utils import queue_email, async_notify_superusers
+from .recipient_utils import get_superuser_emails
+
+
+logger = getLogger("email_v1")
+
+# Alerts locked and counted at a time when sending a digest
+DIGEST_CHUNK_SIZE = 5000
+
+
+def queue_superuser_alert(event: str, username: str, message: str):
+    """
+    Alert all active superusers of an event, in the next digest email.
+
+    Without `MAIL_DIGEST_WINDOW` the alert is sent on its own right away, as
+    critical alerts are with `async_notify_superusers`.
+
+    Args:
+        event (str): Short name of the event, alerts are counted by it.
+        username (str): The user the event is about.
+        message (str): The alert sent when not digested.
+    """
+    if not MAIL_DIGEST_WINDOW:
+        async_notify_superusers(message)
+        return
+
+    # Nobody to send the digest to
+    if not get_superuser_emails():
+        return
+
+    AdminAlert.objects.create(event=event, username=username)
+
+
+def format_alert_digest(rows: list) -> str:
+    """
+    Return the body of a digest email from the alert counts of each event
+    and user, listing the `MAIL_DIGEST_MAX_USERS` users with the most alerts
+    of each event.
+    """
+    events = {}
+    for row in rows:
+        events.setdefault(row["event"], []).append(row)
+
+    total = sum(row["count"] for row in rows)
+    first = timezone.localtime(min(row["first"] for row in rows))
+    last = timezone.localtime(max(row["last"] for row in rows))
+    lines = [f"{total} alerts from {first:%Y-%m-%d %H:%M:%S} to {last:%Y-%m-%d %H:%M:%S}."]
+
+    for event, event_rows in sorted(
+        events.items(), key=lambda item: -sum(row["count"] for row in item[1])
+    ):
+        event_rows.sort(key=lambda row: -row["count"])
+        lines.append("")
+        lines.append(f"{event}: {sum(row['count'] for row in event_rows)}")
+        for row in event_rows[:MAIL_DIGEST_MAX_USERS]:
+            lines.append(f"  {row['username'] or '-'}: {row['count']}")
+
+        others = event_rows[MAIL_DIGEST_MAX_USERS:]
+        if others:
+            lines.append(
+                f"  {len(others)} other users: {sum(row['count'] for row in others)}"
+            )
+
+    return "\n".join(lines)
+
+
+def send_alert_digest() -> int:
+    """
+    Send the buffered superuser alerts as one digest email and delete them.
+
+    The alerts are locked, counted and deleted in chunks of
+    `DIGEST_CHUNK_SIZE`, skipping the ones locked by another worker, and the
+    digest is queued in the same transaction, so concurrent workers never
+    count an alert twice.
+
+    Returns:
+        int: The number of alerts sent.
+    """
+    counts = {}
+    with transaction.atomic():
+        # Alerts raised while sending are left for the next digest
+        last_id = AdminAlert.objects.aggregate(last_id=Max("id"))["last_id"]
+        if last_id is None:
+            return 0
+
+        while True:
+            alert_ids = list(
+                AdminAlert.objects.select_for_update(skip_locked=True)
+                .filter(id__lte=last_id)
+                .order_by("id")
+                .values_list("id", flat=True)[:DIGEST_CHUNK_SIZE]
+            )
+            if not alert_ids:
+                break
+
+            alerts = AdminAlert.objects.filter(id__in=alert_ids)
+            for row in alerts.values("event", "username").annotate(
+                count=Count("id"), first=Min("created_at"), last=Max("created_at")
+            ):
+                key = (row["event"], row["username"])
+                if key in counts:
+                    row["count"] += counts[key]["count"]
+                    row["first"] = min(row["first"], counts[key]["first"])
+                    row["last"] = max(row["last"], counts[key]["last"])
+                counts[key] = row
+            alerts.delete()
+
+        if not counts:
+            return 0
+
+        rows = list(counts.values())
+        superusers_emails = get_superuser_emails()
+        if superusers_emails:
+            queue_email(
+                "Cafe Vand Admins Alert Digest!",
+                format_alert_digest(rows),
+                superusers_emails,
+                is_admin_alert=True,
+            )
+
+    sent = sum(row["count"] for row in rows)
+    logger.info(
+        f"Info:Admin alert digest queued | Detail:alerts={sent} | Date:{timezone.now()}"
+    )
+    return sent
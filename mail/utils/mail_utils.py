@@ -1,57 +1,41 @@
-import threading
 from logging import getLogger
 from users.models import User
 
 from django.conf import settings
 from django.utils import timezone
-from django.core.mail import send_mail
+from django.core.mail import EmailMessage, send_mail
+
+from mail.models import OutboxEmail
+from mail.mail_settings import MAIL_USE_OUTBOX
+from .pool_utils import mail_pool
+from .recipient_utils import get_superuser_emails
 
 
 logger = getLogger("email_v1")
 
 
-class EmailThread(threading.Thread):
-    """Thread for sending emails asynchronously."""
-
-    def __init__(
-        self,
-        subject: str,
-        message: str,
-        from_email: str,
-        recipient_list: list,
-        fail_silently=False,
-        is_admin_alert=False,
-    ):
-        self.subject = subject
-        self.message = message
-        self.from_email = from_email
-        self.recipient_list = recipient_list
-        self.fail_silently = fail_silently
-        self.is_admin_alert = is_admin_alert
-        threading.Thread.__init__(self)
-
-    def run(self):
-        try:
-            send_mail(
-                subject=self.subject,
-                message=self.message,
-                from_email=self.from_email,
-                recipient_list=self.recipient_list,
-                fail_silently=self.fail_silently,
-            )
-            if self.is_admin_alert:
-                logger.info(
-                    f"Info:Async email sent | Detail:subject={self.subject} | Date:{timezone.now()}"
-                )
-            else:
-                logger.info(
-                    f"Info:Async email sent | Detail:subject={self.subject}, emails={self.recipient_list} | Date:{timezone.now()}"
-                )
-
-        except Exception as e:
-            logger.error(
-                f"Error:Failed to send async email | Detail:subject={self.subject}, error={str(e)} | Date:{timezone.now()}"
-            )
+def queue_email(subject: str, message: str, recipient_list: list, is_admin_alert=False):
+    """
+    Send an email asynchronously.
+
+    With `MAIL_USE_OUTBOX` the email is written to the outbox, in the current
+    transaction, and sent by the mail worker. Otherwise it is queued on the
+    worker pool of this process.
+    """
+    if MAIL_USE_OUTBOX:
+        OutboxEmail.objects.create(
+            subject=subject,
+            body=message,
+            from_email=settings.DEFAULT_FROM_EMAIL or "",
+            recipients=list(recipient_list),
+            is_admin_alert=is_admin_alert,
+        )
+        return
+
+    mail_pool.send(
+        EmailMessage(subject, message, settings.DEFAULT_FROM_EMAIL, list(recipient_list)),
+        is_admin_alert=is_admin_alert,
+    )
 
 
 def async_notify_user(user: User, message: str):
@@ -63,13 +47,7 @@ def async_notify_user(user: User, message: str):
     subject = "Cafe Vand Alert!"
 
     # Send Alert asynchronously
-    EmailThread(
-        subject=subject,
-        message=message,
-        from_email=settings.DEFAULT_FROM_EMAIL,
-        recipient_list=[user_email],
-        is_admin_alert=False,
-    ).start()
+    queue_email(subject, message, [user_email])
 
 
 def async_mail_login_otp(user: User, otp_code: str):
@@ -80,32 +58,18 @@ def async_mail_login_otp(user: User, otp_code: str):
     message = f"Welcome back {username}! Your login code is: {otp_code}"
 
     # Send OTP asynchronously
-    EmailThread(
-        subject=subject,
-        message=message,
-        from_email=settings.DEFAULT_FROM_EMAIL,
-        recipient_list=[user_email],
-        is_admin_alert=False,
-    ).start()
+    queue_email(subject, message, [user_email])
 
 
 def async_notify_superusers(message: str):
     """Send an alert email to all active superusers asynchronously."""
     subject = "Cafe Vand Admins Alert!"
 
-    superusers_emails = User.objects.filter(
-        is_superuser=True, is_active=True
-    ).values_list("email", flat=True)
+    superusers_emails = get_superuser_emails()
 
     if superusers_emails:
-        # Send OTP asynchronously
-        EmailThread(
-            subject=subject,
-            message=message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=superusers_emails,
-            is_admin_alert=True,
-        ).start()
+        # Send Alert asynchronously
+        queue_email(subject, message, superusers_emails, is_admin_alert=True)
 
 
 def mail_login_otp(user: User, otp_code: str):
@@ -139,9 +103,7 @@ def notify_superusers(message: str):
     subject = "Cafe Vand Admin Alert!"
 
     try:
-        superusers_emails = User.objects.filter(
-            is_superuser=True, is_active=True
-        ).values_list("email", flat=True)
+        superusers_emails = get_superuser_emails()
 
         if superusers_emails:
             send_mail(
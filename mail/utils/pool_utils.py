@@ -0,0 +1,222 @@
+import os
+import queue
+import smtplib
+import atexit
+import threading
+from logging import getLogger
+
+from django.utils import timezone
+from django.core.mail import get_connection
+
+from mail.mail_settings import (
+    MAIL_WORKERS,
+    MAIL_QUEUE_SIZE,
+    MAIL_BATCH_SIZE,
+    MAIL_QUEUE_TIMEOUT,
+    MAIL_CONNECTION_IDLE_TIMEOUT,
+)
+
+
+logger = getLogger("email_v1")
+
+# Queued to tell a worker to stop, after the emails queued before it
+_STOP = object()
+
+
+def open_connection():
+    """
+    Return a new opened email connection. `send_messages` closes the
+    connections it opens itself, this one stays open until closed.
+    """
+    connection = get_connection()
+    connection.open()
+    return connection
+
+
+def is_connection_error(error: Exception) -> bool:
+    """
+    Return whether an error of `send_messages` is a failure of the connection,
+    rather than of the email. SMTP errors subclass `OSError` too.
+    """
+    if isinstance(error, smtplib.SMTPServerDisconnected):
+        return True
+    return isinstance(error, OSError) and not isinstance(error, smtplib.SMTPException)
+
+
+def close_connection(connection):
+    """Close an email connection, returning `None` to reset it."""
+    if connection is not None:
+        try:
+            connection.close()
+        except Exception:
+            pass  # Already unusable
+    return None
+
+
+class EmailWorkerPool:
+    """
+    Process-wide pool of email worker threads fed by a bounded queue, used
+    for the async emails when the outbox is disabled.
+
+    Each worker keeps its own SMTP connection open between emails and sends
+    what is queued in batches over it, so a burst of emails costs a few
+    connections instead of one thread and one TLS handshake per email.
+    Connections idle for `MAIL_CONNECTION_IDLE_TIMEOUT` are closed.
+
+    When the queue is full, `send` holds the caller back for up to
+    `MAIL_QUEUE_TIMEOUT` seconds before dropping the email. The workers are
+    started on the first email of each process, so forked workers get their
+    own, and `shutdown` sends what is queued before the process exits.
+    """
+
+    def __init__(
+        self,
+        workers: int = MAIL_WORKERS,
+        queue_size: int = MAIL_QUEUE_SIZE,
+        batch_size: int = MAIL_BATCH_SIZE,
+    ):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.queue = None
+        self.threads = []
+        self.pid = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start the workers of this process, if not running yet."""
+        with self._lock:
+            if self.pid == os.getpid():
+                return
+            # Threads and queue of a parent process do not survive a fork
+            self.queue = queue.Queue(maxsize=self.queue_size)
+            self.threads = [
+                threading.Thread(target=self.run, name=f"mail-{i}", daemon=True)
+                for i in range(self.workers)
+            ]
+            for thread in self.threads:
+                thread.start()
+            self.pid = os.getpid()
+
+    def send(self, message, is_admin_alert: bool = False) -> bool:
+        """
+        Queue an `EmailMessage` to be sent by the workers.
+
+        Returns:
+            bool: Whether the email was queued, `False` if the queue stayed
+            full for `MAIL_QUEUE_TIMEOUT` seconds and the email was dropped.
+        """
+        self.start()
+        try:
+            self.queue.put((message, is_admin_alert), timeout=MAIL_QUEUE_TIMEOUT)
+        except queue.Full:
+            logger.error(
+                f"Error:Email queue full, email dropped | Detail:subject={message.subject} | Date:{timezone.now()}"
+            )
+            return False
+        return True
+
+    def next_batch(self) -> list:
+        """
+        Wait for the next queued emails, up to `batch_size` of them.
+
+        Returns:
+            list: ``(message, is_admin_alert)`` tuples, `_STOP` being last if
+            queued, or an empty list after `MAIL_CONNECTION_IDLE_TIMEOUT`
+            seconds without emails.
+        """
+        try:
+            batch = [self.queue.get(timeout=MAIL_CONNECTION_IDLE_TIMEOUT)]
+        except queue.Empty:
+            return []
+
+        while batch[-1] is not _STOP and len(batch) < self.batch_size:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def run(self):
+        """Send the queued emails until stopped, reusing one SMTP connection."""
+        connection = None
+        while True:
+            batch = self.next_batch()
+            stop = bool(batch) and batch[-1] is _STOP
+            entries = batch[:-1] if stop else batch
+
+            if entries:
+                connection = self.send_batch(connection, entries)
+            if not batch or stop:
+                # Idle or stopping, servers drop idle connections anyway
+                connection = close_connection(connection)
+
+            for _ in batch:
+                self.queue.task_done()
+            if stop:
+                return
+
+    def send_batch(self, connection, entries: list):
+        """
+        Send a batch of emails one at a time over the connection, so an email
+        refused by the server does not hold back the others.
+
+        Returns:
+            The connection to reuse for the next batch, `None` after a failure.
+        """
+        for message, is_admin_alert in entries:
+            connection, error = self.send_message(connection, message)
+            if error is not None:
+                logger.error(
+                    f"Error:Failed to send async email | Detail:subject={message.subject}, error={str(error)} | Date:{timezone.now()}"
+                )
+            elif is_admin_alert:
+                logger.info(
+                    f"Info:Async email sent | Detail:subject={message.subject} | Date:{timezone.now()}"
+                )
+            else:
+                logger.info(
+                    f"Info:Async email sent | Detail:subject={message.subject}, emails={message.to} | Date:{timezone.now()}"
+                )
+        return connection
+
+    def send_message(self, connection, message) -> tuple:
+        """
+        Send an email over the connection, retrying once over a new connection
+        if the server closed it. Errors of the email itself, such as refused
+        recipients, are not retried and leave the connection open.
+
+        Returns:
+            tuple: The connection to reuse and the error, `None` if sent.
+        """
+        for attempt in range(2):
+            try:
+                if connection is None:
+                    connection = open_connection()
+                connection.send_messages([message])
+                return connection, None
+            except Exception as e:
+                if not is_connection_error(e):
+                    return connection, e
+                connection = close_connection(connection)
+                if attempt:
+                    return None, e
+
+    def shutdown(self, timeout: float = 10):
+        """Send the queued emails and stop the workers of this process."""
+        with self._lock:
+            if self.pid != os.getpid():
+                return
+            threads, self.pid = self.threads, None
+
+        for _ in threads:
+            try:
+                self.queue.put(_STOP, timeout=timeout)
+            except queue.Full:
+                break
+        for thread in threads:
+            thread.join(timeout)
+
+
+mail_pool = EmailWorkerPool()
+atexit.register(mail_pool.shutdown)
@@ -0,0 +1,37 @@
+from django.db import transaction
+from django.core.cache import cache
+
+from users.models import User
+
+
+# Emails of the active superusers, shared by every worker
+SUPERUSER_EMAILS_KEY = "mail:superuser_emails"
+SUPERUSER_EMAILS_TIMEOUT = 60 * 60 * 24
+
+# User fields deciding who receives the admin alerts
+RECIPIENT_FIELDS = frozenset({"is_superuser", "is_active", "email"})
+
+
+def get_superuser_emails() -> list:
+    """
+    Return the emails of the active superusers, the recipients of the admin
+    alerts, from the cache. Superusers without an email are left out.
+    """
+    emails = cache.get(SUPERUSER_EMAILS_KEY)
+    if emails is None:
+        emails = list(
+            User.objects.filter(is_superuser=True, is_active=True)
+            .exclude(email__isnull=True)
+            .exclude(email="")
+            .values_list("email", flat=True)
+        )
+        cache.set(SUPERUSER_EMAILS_KEY, emails, SUPERUSER_EMAILS_TIMEOUT)
+    return emails
+
+
+def invalidate_superuser_emails(using=None):
+    """
+    Drop the cached superuser emails once the current transaction commits,
+    so a concurrent request cannot cache them again from before the change.
+    """
+    transaction.on_commit(lambda: cache.delete(SUPERUSER_EMAILS_KEY), using=using)
@@ -36,6 +36,7 @@ class ProductAdmin(admin.ModelAdmin):
         "name",
         "slug",
         "category",
+        "current_price",
         "is_active",
         "created_at",
         "updated_at",
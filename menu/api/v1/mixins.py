@@ -0,0 +1,69 @@
+from django.http import StreamingHttpResponse
+from rest_framework.request import Request
+from rest_framework.renderers import JSONRenderer
+
+
+def stream_json_list(rows, serializer, context=None, chunk_size: int = 1000):
+    """
+    Yield a JSON array of the serialized rows, one chunk of rows at a time.
+
+    Each chunk is serialized and rendered with the same renderer as regular
+    responses, so the output matches the non streamed payload item by item
+    while only one chunk is ever held in memory.
+    """
+    renderer = JSONRenderer()
+    yield b"["
+
+    separator = b""
+    chunk = []
+    for row in rows.iterator(chunk_size=chunk_size):
+        chunk.append(row)
+        if len(chunk) == chunk_size:
+            # Render the chunk as an array and drop its brackets
+            yield separator + renderer.render(serializer.serialize(chunk, context))[1:-1]
+            separator = b","
+            chunk = []
+
+    if chunk:
+        yield separator + renderer.render(serializer.serialize(chunk, context))[1:-1]
+    yield b"]"
+
+
+class CompiledListMixin:
+    """
+    List mixin for generic views that serializes `.values()` rows with a
+    compiled serializer instead of DRF serializing model instances.
+
+    When `allow_streaming` is set, ``?stream=true`` returns the whole list,
+    unpaginated, as a streamed JSON array with bounded memory use.
+    """
+
+    compiled_serializer = None
+    allow_streaming = False
+    stream_chunk_size = 1000
+    stream_query_param = "stream"
+
+    def is_streaming(self, request: Request) -> bool:
+        """Return whether the client asked for a streamed list."""
+        value = request.query_params.get(self.stream_query_param, "")
+        return self.allow_streaming and value.lower() in ("1", "true")
+
+    def list(self, request: Request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset()).values(
+            *self.compiled_serializer.columns
+        )
+        context = self.get_serializer_context()
+
+        if self.is_streaming(request):
+            # Same order as the paginated list
+            rows = queryset.order_by("-created_at", "-pk")
+            return StreamingHttpResponse(
+                stream_json_list(
+                    rows, self.compiled_serializer, context, self.stream_chunk_size
+                ),
+                content_type="application/json",
+            )
+
+        page = self.paginate_queryset(queryset)
+        data = self.compiled_serializer.serialize(page, context)
+        return self.get_paginated_response(data)
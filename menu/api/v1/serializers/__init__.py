@@ -1,8 +1,14 @@
-from .menu_serializer import MenuSerializer, MenuProductSerializer, MenuDetailSerializer
+from .menu_serializer import (
+    MenuSerializer,
+    MenuProductSerializer,
+    MenuDetailSerializer,
+    MenuSearchSerializer,
+)
 
 from .category_serializer import (
     CategorySerializer,
     CategoryCreateUpdateSerializer,
+    CategoryIconSerializer,
     CategoryDetailSerializer,
 )
 
@@ -12,4 +18,19 @@ from .product_serializer import (
     ProductUpdateCreateSerializer,
 )
 
-from .price_serializer import PriceSerializer
+from .price_serializer import (
+    PriceSerializer,
+    PriceHistorySerializer,
+    PriceHistoryFilterSerializer,
+    PriceAdjustmentSerializer,
+)
+
+from .compiled_serializer import (
+    CompiledSerializer,
+    serialize_menu,
+    aserialize_menu,
+    compiled_category_serializer,
+    compiled_product_serializer,
+    compiled_price_serializer,
+    compiled_price_history_serializer,
+)
@@ -1,6 +1,8 @@
 import os
 import base64
+from pathlib import Path
 
+from PIL import Image
 from rest_framework import serializers
 from django.core.files.base import ContentFile
 from django.utils.translation import gettext_lazy as _
@@ -13,6 +15,10 @@ from menu.menu_settings import Category_ICON_MAX_SIZE as size_limit
 # Load allowed extensions from environment variable
 ALLOWED_EXTENSIONS = os.environ.get("ALLOWED_EXTENSIONS", "png,jpg,jpeg").split(",")
 
+# Largest width and height of an uploaded icon, in pixels, checked from the
+# image header before anything is decoded
+ICON_UPLOAD_MAX_DIMENSION = 4096
+
 
 class CategorySerializer(serializers.ModelSerializer):
     """
@@ -101,6 +107,15 @@ class CategoryCreateUpdateSerializer(serializers.ModelSerializer):
             # Decode base64 string
             format, imgstr = value.split(";base64,")
             ext = format.split("/")[-1]  # Extract file extension
+
+            # Reject oversized images before decoding them, from the base64 length
+            if len(imgstr) * 3 // 4 > size_limit + 2:
+                raise serializers.ValidationError(
+                    _(
+                        f"Image file is too large (more than {size_limit / 1024 / 1024} MB) !"
+                    )
+                )
+
             data = base64.b64decode(imgstr)  # Decode the image data
             file = ContentFile(data, name=f"image.{ext}")  # Create a ContentFile object
 
@@ -116,6 +131,70 @@ class CategoryCreateUpdateSerializer(serializers.ModelSerializer):
         return value
 
 
+class CategoryIconSerializer(serializers.Serializer):
+    """
+    Serializer validating a category icon streamed to a temporary file by
+    `IconUploadHandler`, and setting it as the category icon.
+
+    The image is checked from its header only, nothing is decoded. An
+    upload the handler stopped is reported from ``upload_error`` in the
+    context.
+    """
+
+    icon = serializers.FileField()
+
+    upload_error_messages = {
+        "too_large": _(
+            f"Image file is too large (more than {size_limit / 1024 / 1024} MB) !"
+        ),
+        "invalid": _("Upload a valid PNG or JPEG image."),
+    }
+
+    def to_internal_value(self, data):
+        upload_error = self.context.get("upload_error")
+        if upload_error:
+            raise serializers.ValidationError(
+                {"icon": [self.upload_error_messages[upload_error]]}
+            )
+        return super().to_internal_value(data)
+
+    def validate_icon(self, value):
+        """
+        Validate the image format and dimensions from its header.
+        Args:
+            value (UploadedFile): The uploaded icon.
+        Returns:
+            UploadedFile: The icon, named after its actual format.
+        Raises:
+            serializers.ValidationError: If the image is not an allowed format or too large.
+        """
+        try:
+            with Image.open(value) as image:  # Only reads the header
+                image_format, dimensions = image.format, image.size
+        except (OSError, Image.DecompressionBombError):
+            raise serializers.ValidationError(self.upload_error_messages["invalid"])
+
+        ext = {"PNG": "png", "JPEG": "jpg"}.get(image_format)
+        if ext not in ALLOWED_EXTENSIONS:
+            raise serializers.ValidationError(self.upload_error_messages["invalid"])
+        if max(dimensions) > ICON_UPLOAD_MAX_DIMENSION:
+            raise serializers.ValidationError(
+                _(
+                    f"Image is too large (more than {ICON_UPLOAD_MAX_DIMENSION}x{ICON_UPLOAD_MAX_DIMENSION} pixels) !"
+                )
+            )
+
+        value.seek(0)
+        value.name = f"{Path(value.name).stem}.{ext}"
+        return value
+
+    def update(self, instance, validated_data):
+        # The temporary file is moved into the storage, not copied
+        instance.icon = validated_data["icon"]
+        instance.save()
+        return instance
+
+
 class CategoryDetailSerializer(serializers.ModelSerializer):
     """
     Serializer for the Category model, used for creating and reading category instances.
@@ -0,0 +1,204 @@
+import decimal
+from functools import cached_property
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.settings import api_settings
+from rest_framework.relations import PrimaryKeyRelatedField
+
+from menu.models import Product
+from .price_serializer import PriceSerializer, PriceHistorySerializer
+from .product_serializer import ProductSerializer
+from .category_serializer import CategorySerializer
+from .menu_serializer import MenuProductSerializer, MenuDetailSerializer
+
+
+class CompiledSerializer:
+    """
+    Read-only serializer compiled from a DRF serializer class.
+
+    The DRF fields are turned once into a list of ``(output name, column,
+    converter)`` mappings, which are then applied to plain `.values()` rows.
+    The output is the same data the DRF serializer produces for the model
+    instances, without the per-field `to_representation` machinery.
+
+    Nested serializers are not fetched: the caller puts their already
+    serialized value in the row under the field name. `SerializerMethodField`
+    fields must be given in ``method_fields`` as ``{name: (column, function)}``.
+    """
+
+    def __init__(self, serializer_class, method_fields=None):
+        self.serializer_class = serializer_class
+        self.method_fields = method_fields or {}
+
+    @cached_property
+    def mappings(self) -> list:
+        """Return the ``(name, column, field)`` mapping of each serializer field."""
+        mappings = []
+        for name, field in self.serializer_class().fields.items():
+            if field.write_only:
+                continue
+            if name in self.method_fields:
+                column, _ = self.method_fields[name]
+            elif isinstance(field, serializers.BaseSerializer):
+                column = name
+            else:
+                column = field.source.replace(".", "__")
+            mappings.append((name, column, field))
+        return mappings
+
+    @cached_property
+    def columns(self) -> list:
+        """Return the columns to pass to `.values()`, nested fields excluded."""
+        columns = []
+        for _, column, field in self.mappings:
+            if isinstance(field, serializers.BaseSerializer) or column in columns:
+                continue
+            columns.append(column)
+        return columns
+
+    def get_converter(self, name, field, context):
+        """
+        Return ``(converter, convert_none)`` for a field, where the converter
+        turns a column value into its representation, `None` meaning as is.
+        """
+        if name in self.method_fields:
+            return self.method_fields[name][1], True
+
+        if isinstance(field, (serializers.BaseSerializer, PrimaryKeyRelatedField)):
+            return None, False
+        if isinstance(field, (serializers.CharField, serializers.BooleanField)):
+            return None, False
+        if isinstance(field, serializers.UUIDField) and field.uuid_format == "hex_verbose":
+            return str, False
+
+        if isinstance(field, serializers.DateTimeField):
+            output_format = getattr(field, "format", api_settings.DATETIME_FORMAT)
+            field_timezone = getattr(field, "timezone", None) or (
+                timezone.get_current_timezone() if settings.USE_TZ else None
+            )
+            if output_format.lower() == "iso-8601" and field_timezone is not None:
+
+                def convert_datetime(value):
+                    value = value.astimezone(field_timezone).isoformat()
+                    if value.endswith("+00:00"):
+                        value = value[:-6] + "Z"
+                    return value
+
+                return convert_datetime, False
+
+        if isinstance(field, serializers.DecimalField):
+            coerce_to_string = getattr(
+                field, "coerce_to_string", api_settings.COERCE_DECIMAL_TO_STRING
+            )
+            if coerce_to_string and not field.localize and not field.normalize_output:
+                quantum = decimal.Decimal(".1") ** field.decimal_places
+                decimal_context = decimal.getcontext().copy()
+                decimal_context.prec = field.max_digits
+
+                def convert_decimal(value):
+                    value = value.quantize(
+                        quantum, rounding=field.rounding, context=decimal_context
+                    )
+                    return "{:f}".format(value)
+
+                return convert_decimal, False
+
+        if isinstance(field, serializers.FileField):
+            use_url = getattr(field, "use_url", api_settings.UPLOADED_FILES_USE_URL)
+            model_field = self.serializer_class.Meta.model._meta.get_field(field.source)
+            storage = model_field.storage
+            request = context.get("request")
+
+            def convert_file(value):
+                if not value:
+                    return None
+                if not use_url:
+                    return value
+                url = storage.url(value)
+                return request.build_absolute_uri(url) if request is not None else url
+
+            return convert_file, False
+
+        # Fall back to the DRF field itself for anything else
+        field = self.serializer_class(context=context).fields[name]
+        return field.to_representation, False
+
+    def serialize(self, rows, context=None) -> list:
+        """Turn `.values()` rows into the payload dicts of the serializer."""
+        context = context or {}
+        converters = [
+            (name, column, *self.get_converter(name, field, context))
+            for name, column, field in self.mappings
+        ]
+
+        data = []
+        for row in rows:
+            item = {}
+            for name, column, converter, convert_none in converters:
+                value = row[column]
+                if converter is not None and (value is not None or convert_none):
+                    value = converter(value)
+                item[name] = value
+            data.append(item)
+        return data
+
+
+compiled_menu_product_serializer = CompiledSerializer(
+    MenuProductSerializer,
+    method_fields={
+        # Same as `MenuProductSerializer.get_price`
+        "price": ("current_price", lambda value: value if value is not None else 0),
+    },
+)
+compiled_menu_detail_serializer = CompiledSerializer(MenuDetailSerializer)
+compiled_category_serializer = CompiledSerializer(CategorySerializer)
+compiled_product_serializer = CompiledSerializer(ProductSerializer)
+compiled_price_serializer = CompiledSerializer(PriceSerializer)
+compiled_price_history_serializer = CompiledSerializer(PriceHistorySerializer)
+
+
+def group_menu(category_rows: list, product_rows: list, context=None) -> list:
+    """
+    Serialize category and product `.values()` rows into the
+    `MenuDetailSerializer` payload, nesting the products under their category.
+    """
+    products = compiled_menu_product_serializer.serialize(product_rows, context)
+
+    # Group the serialized products by category, keeping their order
+    category_products = {row["id"]: [] for row in category_rows}
+    for row, product in zip(product_rows, products):
+        category_products[row["category_id"]].append(product)
+
+    for row in category_rows:
+        row["products"] = category_products[row["id"]]
+
+    return compiled_menu_detail_serializer.serialize(category_rows, context)
+
+
+def get_menu_products(category_rows: list):
+    """Return the `.values()` queryset of the active products of the categories."""
+    return Product.objects.filter(
+        is_active=True,  # Filter only active products
+        category_id__in=[row["id"] for row in category_rows],
+    ).values("category_id", *compiled_menu_product_serializer.columns)
+
+
+def serialize_menu(categories, context=None) -> list:
+    """
+    Serialize a queryset of categories with their active products into the
+    `MenuDetailSerializer` payload, using two `.values()` queries.
+    """
+    category_rows = list(categories.values(*compiled_menu_detail_serializer.columns))
+    product_rows = list(get_menu_products(category_rows))
+    return group_menu(category_rows, product_rows, context)
+
+
+async def aserialize_menu(categories, context=None) -> list:
+    """Async version of `serialize_menu`, using the async ORM."""
+    category_rows = [
+        row async for row in categories.values(*compiled_menu_detail_serializer.columns)
+    ]
+    product_rows = [row async for row in get_menu_products(category_rows)]
+    return group_menu(category_rows, product_rows, context)
@@ -2,12 +2,39 @@ from rest_framework import serializers
 from menu.models import Category, Product
 
 
+class IconVariantsField(serializers.Field):
+    """
+    Read-only field for `Category.icon_variants`, returning the variant URLs
+    as ``{format: {width: url}}``, smallest first, ready for a ``srcset``.
+    Empty until the variants of a new icon are generated.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs["read_only"] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        storage = Category._meta.get_field("icon").storage
+        request = self.context.get("request")
+
+        variants = {}
+        for image_format, widths in value.items():
+            variants[image_format] = {}
+            for width, name in sorted(widths.items(), key=lambda item: int(item[0])):
+                url = storage.url(name)
+                variants[image_format][width] = (
+                    request.build_absolute_uri(url) if request is not None else url
+                )
+        return variants
+
+
 class MenuSerializer(serializers.ModelSerializer):
     """
     Serializer for `Category` model to represent a category in the menu.
     """
 
     icon = serializers.ImageField(read_only=True)
+    iconVariants = IconVariantsField(source="icon_variants")
     createdAt = serializers.DateTimeField(source="created_at", read_only=True)
     updatedAt = serializers.DateTimeField(source="updated_at", read_only=True)
 
@@ -18,6 +45,7 @@ class MenuSerializer(serializers.ModelSerializer):
             "name",
             "slug",
             "icon",
+            "iconVariants",
             "createdAt",
             "updatedAt",
         ]
@@ -26,6 +54,7 @@ class MenuSerializer(serializers.ModelSerializer):
             "name",
             "slug",
             "icon",
+            "iconVariants",
             "createdAt",
             "updatedAt",
         ]
@@ -63,11 +92,7 @@ class MenuProductSerializer(serializers.ModelSerializer):
         """
         Returns the most recent active price for the given product.
         """
-        return (
-            obj.most_recent_active_price
-            if obj.most_recent_active_price is not None
-            else 0
-        )
+        return obj.current_price if obj.current_price is not None else 0
 
 
 class MenuDetailSerializer(serializers.ModelSerializer):
@@ -78,6 +103,7 @@ class MenuDetailSerializer(serializers.ModelSerializer):
 
     products = MenuProductSerializer(many=True, read_only=True)
     icon = serializers.ImageField(required=False, allow_null=True)
+    iconVariants = IconVariantsField(source="icon_variants")
     createdAt = serializers.DateTimeField(source="created_at", read_only=True)
     updatedAt = serializers.DateTimeField(source="updated_at", read_only=True)
 
@@ -88,6 +114,7 @@ class MenuDetailSerializer(serializers.ModelSerializer):
             "name",
             "slug",
             "icon",
+            "iconVariants",
             "products",
             "createdAt",
             "updatedAt",
@@ -97,7 +124,17 @@ class MenuDetailSerializer(serializers.ModelSerializer):
             "name",
             "slug",
             "icon",
+            "iconVariants",
             "products",
             "createdAt",
             "updatedAt",
         ]
+
+
+class MenuSearchSerializer(serializers.Serializer):
+    """
+    Serializer validating the query parameters of the menu search endpoint.
+    """
+
+    q = serializers.CharField(max_length=100, trim_whitespace=True)
+    limit = serializers.IntegerField(min_value=1, max_value=50, default=10)
@@ -1,7 +1,20 @@
-from menu.models import Price
+from decimal import Decimal, ROUND_CEILING, ROUND_FLOOR, ROUND_HALF_UP
+
+from django.db import transaction
+from menu.models import Category, Product, Price
 from rest_framework import serializers
 
 
+# Rounding modes of the bulk price adjustment
+ROUNDING_MODES = {
+    "nearest": ROUND_HALF_UP,
+    "up": ROUND_CEILING,
+    "down": ROUND_FLOOR,
+}
+# Largest amount `Price.amount` can hold
+MAX_PRICE_AMOUNT = Decimal("99999999.99")
+
+
 class PriceSerializer(serializers.ModelSerializer):
     """
     Serializer for the `Price` model used for read and write operations.
@@ -25,3 +38,130 @@ class PriceSerializer(serializers.ModelSerializer):
             "createdAt",
         ]
         read_only_fields = ["id", "createdAt", "updatedAt"]
+
+
+class PriceHistoryFilterSerializer(serializers.Serializer):
+    """
+    Serializer validating the query parameters of the price history endpoint.
+
+    All filters are optional, except that `bucket` needs a `product` or a
+    `category`. Without `bucket` the matching prices are listed, with it they
+    are downsampled into one row per product and bucket.
+    """
+
+    product = serializers.SlugField(required=False, allow_unicode=True)
+    category = serializers.SlugField(required=False, allow_unicode=True)
+    start = serializers.DateTimeField(required=False)
+    end = serializers.DateTimeField(required=False)
+    bucket = serializers.ChoiceField(choices=["day", "week", "month"], required=False)
+    # Superseded prices are inactive, they are the history
+    include_inactive = serializers.BooleanField(default=True)
+
+    def validate(self, attrs):
+        if "start" in attrs and "end" in attrs and attrs["start"] > attrs["end"]:
+            raise serializers.ValidationError({"end": "End must be after start."})
+        # The buckets are not paginated, bound them to a product or a category
+        if "bucket" in attrs and not ("product" in attrs or "category" in attrs):
+            raise serializers.ValidationError(
+                {"bucket": "Buckets need a product or a category."}
+            )
+        return attrs
+
+
+class PriceHistorySerializer(serializers.Serializer):
+    """
+    Read-only serializer for a price history bucket, as returned by
+    `PriceQuerySet.bucketed`.
+    """
+
+    product = serializers.UUIDField(source="product_id")
+    bucket = serializers.DateTimeField()
+    first = serializers.DecimalField(max_digits=10, decimal_places=2)
+    last = serializers.DecimalField(max_digits=10, decimal_places=2)
+    min = serializers.DecimalField(max_digits=10, decimal_places=2)
+    max = serializers.DecimalField(max_digits=10, decimal_places=2)
+    count = serializers.IntegerField()
+
+
+class PriceAdjustmentSerializer(serializers.Serializer):
+    """
+    Serializer applying a percentage or absolute adjustment to the current
+    price of every active product of the given categories.
+
+    New amounts are rounded to a multiple of `roundTo`, products whose
+    amount does not change are skipped.
+    """
+
+    categories = serializers.SlugRelatedField(
+        many=True,
+        slug_field="slug",
+        queryset=Category.objects.all(),
+        allow_empty=False,
+    )
+    mode = serializers.ChoiceField(choices=["percent", "absolute"])
+    value = serializers.DecimalField(max_digits=10, decimal_places=2)
+    roundTo = serializers.DecimalField(
+        max_digits=10, decimal_places=2, min_value=Decimal("0.01"), default=Decimal("0.01")
+    )
+    rounding = serializers.ChoiceField(choices=list(ROUNDING_MODES), default="nearest")
+
+    def adjust(self, amount: Decimal) -> Decimal:
+        """Return the adjusted and rounded amount."""
+        data = self.validated_data
+        if data["mode"] == "percent":
+            amount = amount * (1 + data["value"] / 100)
+        else:
+            amount = amount + data["value"]
+
+        steps = (amount / data["roundTo"]).quantize(
+            Decimal(1), rounding=ROUNDING_MODES[data["rounding"]]
+        )
+        return (steps * data["roundTo"]).quantize(Decimal("0.01"))
+
+    def create(self, validated_data) -> dict:
+        """
+        Create the adjusted prices with one `bulk_create` and deactivate the
+        previous ones with one update, all in one transaction.
+
+        Returns:
+            dict: A summary of the adjustment.
+
+        Raises:
+            ValidationError: If an adjusted amount is out of range.
+        """
+        categories = validated_data["categories"]
+
+        with transaction.atomic():
+            # Lock the products so no price is added while adjusting
+            products = (
+                Product.objects.select_for_update()
+                .filter(category__in=categories, is_active=True)
+                .order_by("pk")
+                .values_list("pk", "current_price")
+            )
+
+            prices, unchanged, without_price = [], 0, 0
+            for product_id, current_price in products:
+                if current_price is None:
+                    without_price += 1
+                    continue
+
+                amount = self.adjust(current_price)
+                if not 0 <= amount <= MAX_PRICE_AMOUNT:
+                    raise serializers.ValidationError(
+                        {"value": [f"The adjusted price {amount} is out of range."]}
+                    )
+                if amount == current_price:
+                    unchanged += 1
+                    continue
+                prices.append(Price(product_id=product_id, amount=amount))
+
+            deactivated, created = Price.objects.supersede(prices)
+
+        return {
+            "categories": [category.slug for category in categories],
+            "adjusted": len(created),
+            "unchanged": unchanged,
+            "withoutPrice": without_price,
+            "deactivatedPrices": deactivated,
+        }
@@ -1,3 +1,4 @@
+from django.db import transaction
 from rest_framework import serializers
 from menu.models import Product, Price
 from .price_serializer import PriceSerializer
@@ -12,7 +13,7 @@ class ProductSerializer(serializers.ModelSerializer):
     createdAt = serializers.DateTimeField(source="created_at", read_only=True)
     updatedAt = serializers.DateTimeField(source="updated_at", read_only=True)
     price = serializers.DecimalField(
-        source="most_recent_active_price",
+        source="current_price",
         max_digits=10,
         decimal_places=2,
         read_only=True,
@@ -62,7 +63,7 @@ class ProductDetailSerializer(serializers.ModelSerializer):
     price = serializers.DecimalField(
         max_digits=10,
         decimal_places=2,
-        source="most_recent_active_price",
+        source="current_price",
         read_only=True,
     )
     categoryName = serializers.CharField(source="category.name", read_only=True)
@@ -124,11 +125,13 @@ class ProductUpdateCreateSerializer(serializers.ModelSerializer):
         Create a new product with a new price.
         """
         new_price = validated_data.pop("newPrice", 0)
-        product = Product.objects.create(**validated_data)
 
-        # Create a new price
-        if new_price is not None:
-            Price.objects.create(product=product, amount=new_price)
+        with transaction.atomic():
+            product = Product.objects.create(**validated_data)
+
+            # Create a new price
+            if new_price is not None:
+                Price.objects.create(product=product, amount=new_price)
 
         return product
 
@@ -141,23 +144,15 @@ class ProductUpdateCreateSerializer(serializers.ModelSerializer):
         # Pop the newPrice from the validated data
         new_price = validated_data.pop("newPrice", None)
 
-        # Update product fields that are passed in validated_data
-        for attr, value in validated_data.items():
-            setattr(instance, attr, value)
-        instance.save()
-
-        # Check if the new price is provided and is different from the most recent price
-        if new_price is not None:
-            # Fetch the most recent active price for the product
-            most_recent_active_price = (
-                instance.prices.filter(is_active=True).order_by("-created_at").first()
-            )
-
-            # Only create a new price if it's different from the current most recent active price
-            if (
-                most_recent_active_price is None
-                or most_recent_active_price.amount != new_price
-            ):
+        with transaction.atomic():
+            # Update product fields that are passed in validated_data
+            for attr, value in validated_data.items():
+                setattr(instance, attr, value)
+            instance.save()
+
+            # Only create a new price if it's different from the current price,
+            # creating it also updates the product's denormalized current price
+            if new_price is not None and instance.current_price != new_price:
                 Price.objects.create(product=instance, amount=new_price)
 
         return instance
@@ -1,15 +1,26 @@
+from django.conf import settings
 from django.urls import path
 from menu.api.v1.views import (
     MenuListView,
     MenuDetailView,
+    AsyncMenuListView,
+    AsyncMenuDetailView,
+    MenuSearchView,
     PriceListView,
+    PriceHistoryView,
+    PriceAdjustmentView,
     PriceDetailView,
     ProductListCreateView,
     ProductDetailUpdateView,
     CategoryListCreateView,
     CategoryDetailUpdateView,
+    CategoryIconUploadView,
 )
 
+# The ASGI deployment serves the public menu with the native async views
+if settings.ASYNC_VIEWS:
+    MenuListView, MenuDetailView = AsyncMenuListView, AsyncMenuDetailView
+
 urlpatterns = [
     # menu urls
     path("menu-list/", MenuListView.as_view(), name="menu-list-v1"),
@@ -18,8 +29,11 @@ urlpatterns = [
         MenuDetailView.as_view(),
         name="menu-detail",
     ),
+    path("search/", MenuSearchView.as_view(), name="menu-search-v1"),
     # prices urls
     path("prices/", PriceListView.as_view(), name="price-list-v1"),
+    path("prices/history/", PriceHistoryView.as_view(), name="price-history-v1"),
+    path("prices/adjust/", PriceAdjustmentView.as_view(), name="price-adjust-v1"),
     path("prices/<uuid:pk>/", PriceDetailView.as_view(), name="price-detail-v1"),
     # products urls
     path("products/", ProductListCreateView.as_view(), name="product-list-v1"),
@@ -35,4 +49,9 @@ urlpatterns = [
         CategoryDetailUpdateView.as_view(),
         name="category-detail",
     ),
+    path(
+        "categories/<slug:slug>/icon/",
+        CategoryIconUploadView.as_view(),
+        name="category-icon-v1",
+    ),
 ]
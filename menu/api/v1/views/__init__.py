@@ -2,11 +2,15 @@ from .menu_views import (
     MenuViewSet,
     MenuListView,
     MenuDetailView,
+    AsyncMenuListView,
+    AsyncMenuDetailView,
+    MenuSearchView,
 )
 
 from .category_view import (
     CategoryListCreateView,
     CategoryDetailUpdateView,
+    CategoryIconUploadView,
     CategoryViewSet,
 )
 
@@ -18,6 +22,8 @@ from .product_view import (
 
 from .price_view import (
     PriceListView,
+    PriceHistoryView,
+    PriceAdjustmentView,
     PriceDetailView,
     PriceViewSet,
 )
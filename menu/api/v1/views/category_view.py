@@ -1,17 +1,28 @@
-from menu.models import Category, Product, Price
+from menu.models import Category
 from menu.api.v1.serializers import (
     CategorySerializer,
     CategoryDetailSerializer,
     CategoryCreateUpdateSerializer,
+    CategoryIconSerializer,
+    compiled_category_serializer,
 )
+from menu.api.v1.mixins import CompiledListMixin
+from menu.api.v1.pagination import KeysetCursorPagination
+from menu.utils.upload_utils import IconUploadHandler, MULTIPART_OVERHEAD
 
 from rest_framework import viewsets
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.parsers import MultiPartParser
 from rest_framework.permissions import IsAdminUser
-from django.db.models import OuterRef, Subquery, Prefetch
-from rest_framework.generics import ListCreateAPIView, RetrieveUpdateDestroyAPIView
+from rest_framework.generics import (
+    GenericAPIView,
+    ListCreateAPIView,
+    RetrieveUpdateDestroyAPIView,
+)
 
 
-class CategoryListCreateView(ListCreateAPIView):
+class CategoryListCreateView(CompiledListMixin, ListCreateAPIView):
     """
     View for listing and creating `Category` instances.
 
@@ -26,6 +37,8 @@ class CategoryListCreateView(ListCreateAPIView):
     # Fetch products and their prices for efficient querying
     queryset = Category.objects.all()
     permission_classes = [IsAdminUser]
+    pagination_class = KeysetCursorPagination
+    compiled_serializer = compiled_category_serializer
     http_method_names = ["get", "post"]
 
     def get_serializer_class(self):
@@ -70,18 +83,51 @@ class CategoryDetailUpdateView(RetrieveUpdateDestroyAPIView):
         return CategoryDetailSerializer
 
     def get_queryset(self):
-        return Category.objects.prefetch_related(
-            Prefetch(
-                "products",
-                queryset=Product.objects.annotate(
-                    most_recent_active_price=Subquery(
-                        Price.objects.filter(product=OuterRef("pk"), is_active=True)
-                        .order_by("-created_at")
-                        .values("amount")[:1]
-                    )
-                ),
-            )
-        )
+        return Category.objects.prefetch_related("products")
+
+
+class CategoryIconUploadView(GenericAPIView):
+    """
+    View for uploading the icon of a `Category` as ``multipart/form-data``.
+
+    The ``icon`` file is streamed to a temporary file and moved into the
+    storage, never held in memory. Requests whose body is larger than the
+    icon size limit are rejected without being read, and an upload is
+    stopped as soon as it grows past the limit or does not start with a PNG
+    or JPEG signature.
+
+    HTTP Methods:
+    - PUT: Replace the icon of a category.
+    """
+
+    lookup_field = "slug"
+    queryset = Category.objects.all()
+    permission_classes = [IsAdminUser]
+    parser_classes = [MultiPartParser]
+    serializer_class = CategoryIconSerializer
+    http_method_names = ["put"]
+
+    def put(self, request: Request, *args, **kwargs):
+        """
+        Validate the uploaded icon and set it as the category icon.
+        Returns:
+            Response: The updated category.
+        """
+        category = self.get_object()
+        handler = IconUploadHandler(request)
+
+        if int(request.META.get("CONTENT_LENGTH") or 0) > handler.max_size + MULTIPART_OVERHEAD:
+            handler.error, data = "too_large", {}
+        else:
+            # Must be set before the request body is read
+            request.upload_handlers = [handler]
+            data = request.data
+
+        context = {**self.get_serializer_context(), "upload_error": handler.error}
+        serializer = self.get_serializer(category, data=data, context=context)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(CategorySerializer(category, context=self.get_serializer_context()).data)
 
 
 class CategoryViewSet(viewsets.ModelViewSet):
@@ -1,126 +1,276 @@
-from menu.models import Category, Price, Product
+import inspect
+
+from menu.models import Category
+from menu.utils import (
+    get_menu_list,
+    get_menu_detail,
+    get_menu_slugs,
+    aget_menu_list,
+    aget_menu_detail,
+    aget_menu_slugs,
+    search_index,
+)
+from menu.utils.compression_utils import get_accepted_encoding
+from menu.menu_version import (
+    get_menu_version,
+    aget_menu_version,
+    get_menu_last_modified,
+)
+from VandAPI.async_views import AsyncAPIView
 from menu.api.v1.serializers import (
     MenuSerializer,
     MenuDetailSerializer,
+    MenuSearchSerializer,
 )
 
+from rest_framework.views import APIView
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.throttling import ScopedRateThrottle
 from rest_framework.permissions import AllowAny
 from rest_framework.viewsets import ReadOnlyModelViewSet
 from rest_framework.generics import ListAPIView, RetrieveAPIView
-from django.db.models import OuterRef, Subquery, BooleanField, Prefetch
+from django.http import Http404, HttpResponse
+from django.utils.http import http_date, quote_etag
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers,
+)
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+from django.views.decorators.vary import vary_on_headers
+
+
+def get_request_menu_version(request) -> str:
+    """
+    Return the menu version for the request, reading it once per request so
+    the headers and the response body are built from the same version.
+    """
+    if not hasattr(request, "menu_version"):
+        request.menu_version = get_menu_version()
+    return request.menu_version
+
 
+def get_request_encoding(request):
+    """
+    Return the content encoding negotiated for the request, or `None` to
+    send the payload uncompressed.
+    """
+    if not hasattr(request, "menu_encoding"):
+        request.menu_encoding = get_accepted_encoding(
+            request.META.get("HTTP_ACCEPT_ENCODING", "")
+        )
+    return request.menu_encoding
 
+
+def is_menu_category(request, slug) -> bool:
+    """
+    Return whether the menu version of the request has an active category
+    with the slug, `True` for the endpoints without one.
+    """
+    return slug is None or slug in get_menu_slugs(request, get_request_menu_version(request))
+
+
+def menu_etag(request, *args, slug=None, **kwargs):
+    """
+    Return the current menu version as the ETag of the menu endpoints,
+    suffixed with the content encoding since each variant has its own bytes.
+    Returns `None` for an unknown category, which is answered with a 404.
+    """
+    if not is_menu_category(request, slug):
+        return None
+    version = get_request_menu_version(request)
+    encoding = get_request_encoding(request)
+    return f"{version}-{encoding}" if encoding else version
+
+
+def menu_last_modified(request, *args, slug=None, **kwargs):
+    """Return the time the current menu version was created."""
+    if not is_menu_category(request, slug):
+        return None
+    return get_menu_last_modified(get_request_menu_version(request))
+
+
+# Answer conditional requests with 304 from the menu version and the cached
+# category slugs, without touching the database or the menu payloads.
+menu_condition = condition(etag_func=menu_etag, last_modified_func=menu_last_modified)
+
+
+def menu_response(content: bytes, encoding) -> HttpResponse:
+    """Return the response for a menu snapshot payload."""
+    response = HttpResponse(content, content_type="application/json")
+    if encoding:
+        response["Content-Encoding"] = encoding
+    # Make clients revalidate instead of guessing a freshness lifetime
+    patch_cache_control(response, no_cache=True)
+    return response
+
+
+@method_decorator(vary_on_headers("Accept-Encoding"), name="get")
+@method_decorator(menu_condition, name="get")
 class MenuListView(ListAPIView):
     """
     API view to list all active categories.
 
     This view provides a read-only endpoint to retrieve a list of categories
-    that are marked as active. The `MenuSerializer` is used to serialize the
-    category data.
+    that are marked as active. The response is served from the pre-serialized
+    menu snapshot, which is rebuilt whenever the menu changes. Responses carry
+    an ETag and Last-Modified derived from the menu version so polling clients
+    get a 304 while the menu is unchanged, and are sent gzip or brotli encoded
+    from compressed bytes cached per menu version when the client accepts it.
     """
 
     http_method_names = ["get"]
     permission_classes = [AllowAny]
     serializer_class = MenuDetailSerializer
+    queryset = Category.objects.filter(is_active=True)
 
-    def get_queryset(self):
+    def list(self, request: Request, *args, **kwargs):
         """
-        Return a queryset of active categories with prefetch related active products
-        and their most recent active prices.
-
-        This method filters for active categories and their associated active products.
-        It uses a subquery to get the most recent active price for each product and
-        annotates this information to the product queryset. The category queryset is
-        prefetched with these annotated products to optimize database access.
-
-        Returns:
-            QuerySet: A queryset of active categories with prefetch related active products
-            and their most recent active prices.
+        Return the menu list payload straight from the menu snapshot.
         """
-        # Subquery to fetch the most recent active price for a product
-        most_recent_active_price_subquery = (
-            Price.objects.filter(
-                product=OuterRef("pk"),
-                is_active=True,  # Filter only active prices
-            )
-            .order_by("-created_at")
-            .values("amount")[:1]
-        )
-
-        # Filter for active categories and their active products
-        return Category.objects.filter(is_active=True).prefetch_related(
-            Prefetch(
-                "products",
-                queryset=Product.objects.filter(
-                    is_active=True  # Filter only active products
-                )
-                .annotate(
-                    most_recent_active_price=Subquery(
-                        most_recent_active_price_subquery, output_field=BooleanField()
-                    )
-                )
-                .prefetch_related("prices"),
-            )
-        )
+        encoding = get_request_encoding(request)
+        content = get_menu_list(request, get_request_menu_version(request), encoding)
+        return menu_response(content, encoding)
 
 
+@method_decorator(vary_on_headers("Accept-Encoding"), name="get")
+@method_decorator(menu_condition, name="get")
 class MenuDetailView(RetrieveAPIView):
     """
     API view to retrieve details of a specific category.
 
     This view provides a read-only endpoint to retrieve a single category's
-    details based on its slug. The `MenuDetailSerializer` is used to serialize
-    the category and its related products.
-
-    Methods:
-        get_queryset: Customize the queryset to include active products and their
-        most recent active prices.
+    details based on its slug. The response is served from the pre-serialized
+    menu snapshot, which is rebuilt whenever the menu changes. Responses carry
+    an ETag and Last-Modified derived from the menu version so polling clients
+    get a 304 while the menu is unchanged, and are sent gzip or brotli encoded
+    from compressed bytes cached per menu version when the client accepts it.
     """
 
     lookup_field = "slug"
     http_method_names = ["get"]
     permission_classes = [AllowAny]
     serializer_class = MenuDetailSerializer
+    queryset = Category.objects.filter(is_active=True)
 
-    def get_queryset(self):
+    def retrieve(self, request: Request, *args, **kwargs):
         """
-        Return a queryset of active categories with prefetch related active products
-        and their most recent active prices.
+        Return the category payload straight from the menu snapshot.
 
-        This method filters for active categories and their associated active products.
-        It uses a subquery to get the most recent active price for each product and
-        annotates this information to the product queryset. The category queryset is
-        prefetched with these annotated products to optimize database access.
-
-        Returns:
-            QuerySet: A queryset of active categories with prefetch related active products
-            and their most recent active prices.
+        Raises:
+            Http404: If there is no active category with the given slug.
         """
-        # Subquery to fetch the most recent active price for a product
-        most_recent_active_price_subquery = (
-            Price.objects.filter(
-                product=OuterRef("pk"),
-                is_active=True,  # Filter only active prices
-            )
-            .order_by("-created_at")
-            .values("amount")[:1]
+        encoding = get_request_encoding(request)
+        content = get_menu_detail(
+            request,
+            kwargs[self.lookup_field],
+            get_request_menu_version(request),
+            encoding,
+        )
+        if content is None:
+            raise Http404("No Category matches the given query.")
+        return menu_response(content, encoding)
+
+
+class AsyncMenuView(AsyncAPIView):
+    """
+    Base of the async menu views, answering conditional requests like
+    `menu_condition` and serving the payload returned by `get_content`.
+
+    Subclasses must define ``async def get_content(self, request, encoding,
+    **kwargs)`` returning the payload bytes, checked when they are defined.
+    """
+
+    get_content = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if not inspect.iscoroutinefunction(cls.get_content):
+            raise TypeError(f"{cls.__name__} must define an async get_content method.")
+
+    async def get(self, request, *args, **kwargs):
+        request.menu_version = await aget_menu_version()
+        # An unknown category is not modified either, check it first
+        slug = kwargs.get("slug")
+        if slug is not None and slug not in await aget_menu_slugs(
+            request, request.menu_version
+        ):
+            raise Http404("No Category matches the given query.")
+
+        encoding = get_request_encoding(request)
+        etag = quote_etag(menu_etag(request))
+        last_modified = int(menu_last_modified(request).timestamp())
+
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
         )
+        if response is None:
+            content = await self.get_content(request, encoding, **kwargs)
+            response = menu_response(content, encoding)
+
+        response["ETag"] = etag
+        response["Last-Modified"] = http_date(last_modified)
+        patch_vary_headers(response, ["Accept-Encoding"])
+        return response
+
+
+class AsyncMenuListView(AsyncMenuView):
+    """
+    Async version of `MenuListView` for the ASGI deployment, reading the
+    menu snapshot through the async cache and building it with the async ORM.
+    """
+
+    async def get_content(self, request, encoding, **kwargs):
+        return await aget_menu_list(request, request.menu_version, encoding)
 
-        # Filter for active categories and their active products
-        return Category.objects.filter(is_active=True).prefetch_related(
-            Prefetch(
-                "products",
-                queryset=Product.objects.filter(
-                    is_active=True  # Filter only active products
-                )
-                .annotate(
-                    most_recent_active_price=Subquery(
-                        most_recent_active_price_subquery, output_field=BooleanField()
-                    )
-                )
-                .prefetch_related("prices"),
-            )
+
+class AsyncMenuDetailView(AsyncMenuView):
+    """
+    Async version of `MenuDetailView` for the ASGI deployment, reading the
+    menu snapshot through the async cache and building it with the async ORM.
+    """
+
+    async def get_content(self, request, encoding, slug=None, **kwargs):
+        """
+        Raises:
+            Http404: If there is no active category with the given slug.
+        """
+        content = await aget_menu_detail(request, slug, request.menu_version, encoding)
+        if content is None:
+            raise Http404("No Category matches the given query.")
+        return content
+
+
+class MenuSearchView(APIView):
+    """
+    API view for typeahead search over the active categories and products.
+
+    Queries are answered from the in-process search index, without hitting
+    the database while the menu is unchanged. Names are matched on word
+    prefixes and, from three characters, anywhere inside words, with
+    Persian/Arabic letter and digit variants, diacritics and ZWNJs
+    normalized. Typeahead sends a request per keystroke, so the endpoint has
+    its own throttle scope instead of the default anonymous rate.
+    """
+
+    http_method_names = ["get"]
+    permission_classes = [AllowAny]
+    throttle_classes = [ScopedRateThrottle]
+    throttle_scope = "menu_search_v1"
+
+    def get(self, request: Request, *args, **kwargs):
+        """
+        Return the categories and products matching every word of `q`,
+        categories and names starting with the query first.
+        """
+        serializer = MenuSearchSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        results = search_index.search(
+            serializer.validated_data["q"], serializer.validated_data["limit"]
         )
+        return Response({"results": results})
 
 
 class MenuViewSet(ReadOnlyModelViewSet):
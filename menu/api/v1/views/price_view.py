@@ -1,12 +1,29 @@
+from functools import cached_property
+
 from menu.models import Price
-from menu.api.v1.serializers import PriceSerializer
+from menu.api.v1.serializers import (
+    PriceSerializer,
+    PriceHistoryFilterSerializer,
+    PriceAdjustmentSerializer,
+    compiled_price_serializer,
+    compiled_price_history_serializer,
+)
+from menu.api.v1.mixins import CompiledListMixin
+from menu.api.v1.pagination import KeysetCursorPagination
 
 from rest_framework import viewsets
+from rest_framework.request import Request
+from rest_framework.response import Response
 from rest_framework.permissions import IsAdminUser
-from rest_framework.generics import ListCreateAPIView, RetrieveUpdateDestroyAPIView
+from rest_framework.generics import (
+    GenericAPIView,
+    ListAPIView,
+    ListCreateAPIView,
+    RetrieveUpdateDestroyAPIView,
+)
 
 
-class PriceListView(ListCreateAPIView):
+class PriceListView(CompiledListMixin, ListCreateAPIView):
     """
     View for listing and creating `Price` instances.
 
@@ -21,9 +38,105 @@ class PriceListView(ListCreateAPIView):
     queryset = Price.objects.all()
     serializer_class = PriceSerializer
     permission_classes = [IsAdminUser]
+    pagination_class = KeysetCursorPagination
+    compiled_serializer = compiled_price_serializer
+    allow_streaming = True
     http_method_names = ["get", "post"]
 
 
+class PriceHistoryView(CompiledListMixin, ListAPIView):
+    """
+    View for querying the price history of products.
+
+    Prices are filtered by product slug, category slug and a ``start``/``end``
+    range on their creation time, superseded prices included unless
+    ``include_inactive=false``. Filtering by product uses the
+    ``(product, is_active, created_at)`` index.
+
+    Without ``bucket`` the prices are listed like `PriceListView`. With
+    ``bucket=day|week|month`` and a product or category, they are downsampled
+    in SQL into one row per product and bucket holding the first, last, min
+    and max amount.
+
+    HTTP Methods:
+    - GET: List the price history.
+    """
+
+    queryset = Price.objects.all()
+    serializer_class = PriceSerializer
+    permission_classes = [IsAdminUser]
+    pagination_class = KeysetCursorPagination
+    compiled_serializer = compiled_price_serializer
+    allow_streaming = True
+    http_method_names = ["get"]
+
+    @cached_property
+    def filters(self) -> dict:
+        """
+        Return the validated query parameters.
+
+        Raises:
+            ValidationError: If a query parameter is invalid.
+        """
+        serializer = PriceHistoryFilterSerializer(data=self.request.query_params)
+        serializer.is_valid(raise_exception=True)
+        return serializer.validated_data
+
+    def filter_queryset(self, queryset):
+        filters = self.filters
+        if not filters["include_inactive"]:
+            queryset = queryset.filter(is_active=True)
+        else:
+            # Always true, but lets the index range scan `created_at` per state
+            queryset = queryset.filter(is_active__in=[True, False])
+        if "product" in filters:
+            queryset = queryset.filter(product__slug=filters["product"])
+        if "category" in filters:
+            queryset = queryset.filter(product__category__slug=filters["category"])
+        if "start" in filters:
+            queryset = queryset.filter(created_at__gte=filters["start"])
+        if "end" in filters:
+            queryset = queryset.filter(created_at__lt=filters["end"])
+        return queryset
+
+    def list(self, request: Request, *args, **kwargs):
+        """
+        List the matching prices, or their buckets when ``bucket`` is given.
+        """
+        if "bucket" not in self.filters:
+            return super().list(request, *args, **kwargs)
+
+        rows = self.filter_queryset(self.get_queryset()).bucketed(self.filters["bucket"])
+        return Response(
+            compiled_price_history_serializer.serialize(
+                rows, self.get_serializer_context()
+            )
+        )
+
+
+class PriceAdjustmentView(GenericAPIView):
+    """
+    View for adjusting the prices of whole categories at once.
+
+    A percentage or absolute adjustment is applied to the current price of
+    every active product of the given categories. The new prices are created
+    with one bulk insert and the previous ones deactivated with one update,
+    all in one transaction.
+
+    HTTP Methods:
+    - POST: Adjust the prices and return a summary.
+    """
+
+    serializer_class = PriceAdjustmentSerializer
+    permission_classes = [IsAdminUser]
+    http_method_names = ["post"]
+
+    def post(self, request: Request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response(serializer.save())
+
+
 class PriceDetailView(RetrieveUpdateDestroyAPIView):
     """
     View for retrieving, updating, and deleting a single `Price` instance.
@@ -1,17 +1,19 @@
-from menu.models import Product, Price
+from menu.models import Product
 from menu.api.v1.serializers import (
     ProductSerializer,
     ProductDetailSerializer,
     ProductUpdateCreateSerializer,
+    compiled_product_serializer,
 )
+from menu.api.v1.mixins import CompiledListMixin
+from menu.api.v1.pagination import KeysetCursorPagination
 
 from rest_framework import viewsets
-from django.db.models import OuterRef, Subquery
 from rest_framework.permissions import IsAdminUser
 from rest_framework.generics import ListCreateAPIView, RetrieveUpdateDestroyAPIView
 
 
-class ProductListCreateView(ListCreateAPIView):
+class ProductListCreateView(CompiledListMixin, ListCreateAPIView):
     """
     View for listing and creating `Product` instances.
 
@@ -21,6 +23,9 @@ class ProductListCreateView(ListCreateAPIView):
     """
 
     permission_classes = [IsAdminUser]
+    pagination_class = KeysetCursorPagination
+    compiled_serializer = compiled_product_serializer
+    allow_streaming = True
     serializer_class = ProductSerializer
     http_method_names = ["get", "post"]
 
@@ -37,23 +42,12 @@ class ProductListCreateView(ListCreateAPIView):
 
     def get_queryset(self):
         """
-        Annotate each Product with the most recent active price and include the category data
+        Return products with their category data, the most recent active price
+        is read from the denormalized `current_price` column.
         """
-        return (
-            Product.objects.annotate(
-                most_recent_active_price=Subquery(
-                    Price.objects.filter(
-                        product=OuterRef("pk"), is_active=True
-                    )  # Filter active prices for each product
-                    .order_by(
-                        "-created_at"
-                    )  # Order by creation date to get the latest price
-                    .values("amount")[:1]
-                )
-            )
-            .select_related("category")  # Include the related category in the query
-            .prefetch_related("prices")
-        )  # Prefetch related prices to optimize queries
+        return Product.objects.select_related(
+            "category"
+        )  # Include the related category in the query
 
 
 class ProductDetailUpdateView(RetrieveUpdateDestroyAPIView):
@@ -84,19 +78,10 @@ class ProductDetailUpdateView(RetrieveUpdateDestroyAPIView):
 
     def get_queryset(self):
         """
-        Annotate each Product with the most recent active price using a Subquery
+        Return products with their price history, the most recent active price
+        is read from the denormalized `current_price` column.
         """
-        return Product.objects.annotate(
-            most_recent_active_price=Subquery(
-                Price.objects.filter(
-                    product=OuterRef("pk"), is_active=True
-                )  # Filter active prices for each product
-                .order_by(
-                    "-created_at"
-                )  # Order by creation date to get the latest price
-                .values("amount")[:1]  # Select the amount of the most recent price
-            )
-        ).prefetch_related(
+        return Product.objects.prefetch_related(
             "prices"
         )  # Prefetch related prices to optimize queries
 
@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class MenuConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'menu'
+
+    def ready(self):
+        # Register the menu invalidation signal receivers
+        from menu import signals  # noqa: F401
+
+        # Register the deployment checks of the menu
+        from menu import checks  # noqa: F401
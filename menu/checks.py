@@ -0,0 +1,51 @@
+import os
+
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+
+# Cache backends whose entries are only seen by the process that set them
+PROCESS_LOCAL_CACHE_BACKENDS = ("django.core.cache.backends.locmem.LocMemCache",)
+
+
+def get_worker_count():
+    """
+    Return the number of server workers set through the environment, or
+    `None` if unknown.
+    """
+    workers = os.environ.get("GUNICORN_WORKERS") or os.environ.get("WEB_CONCURRENCY")
+    return int(workers) if workers else None
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_menu_cache(app_configs=None, workers=None, **kwargs):
+    """
+    Check that the menu version is shared by every worker.
+
+    Each worker bumps the menu version in its own cache with a process-local
+    backend, so the other workers would serve their menu snapshot after an
+    edit until restarted. Allowed with `DEBUG` or a single worker.
+
+    Args:
+        workers (int): Number of workers of the server, read from the
+            environment if not given.
+    """
+    if settings.DEBUG:
+        return []
+    if settings.CACHES["default"]["BACKEND"] not in PROCESS_LOCAL_CACHE_BACKENDS:
+        return []
+
+    workers = workers or get_worker_count()
+    if workers == 1:
+        return []
+    return [
+        Error(
+            "The default cache is local to each process, so a menu edit is "
+            "only seen by the worker that handled it.",
+            hint=(
+                "Set CACHE_BACKEND and CACHE_LOCATION to a shared cache such as "
+                "redis or memcached, or run a single worker with GUNICORN_WORKERS=1."
+            ),
+            id="menu.E001",
+        )
+    ]
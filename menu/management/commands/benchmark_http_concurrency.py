@@ -0,0 +1,176 @@
+import time
+import asyncio
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure how many concurrent keep-alive connections a running server "
+        "sustains on an endpoint, to compare the WSGI and ASGI deployments."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--url",
+            default="http://127.0.0.1:8000/vand-api/v1/menu/menu-list/",
+            help="URL requested by every connection (default: the menu list).",
+        )
+        parser.add_argument(
+            "--connections",
+            default="10,50,100,250,500",
+            help="Comma separated concurrency levels to run (default: 10,50,100,250,500).",
+        )
+        parser.add_argument(
+            "--duration",
+            type=float,
+            default=10,
+            help="Seconds each concurrency level runs for (default: 10).",
+        )
+        parser.add_argument(
+            "--max-latency",
+            type=float,
+            default=500,
+            help="p99 latency in ms a level must stay under to count as sustained (default: 500).",
+        )
+        parser.add_argument(
+            "--header",
+            action="append",
+            default=[],
+            dest="headers",
+            help='Extra request header, e.g. "Accept-Encoding: gzip" (repeatable).',
+        )
+
+    def handle(self, *args, **options):
+        url = urlsplit(options["url"])
+        if url.scheme not in ("http", "https"):
+            raise CommandError("Only http and https URLs are supported.")
+
+        try:
+            levels = [int(level) for level in options["connections"].split(",")]
+        except ValueError:
+            raise CommandError("--connections must be comma separated integers.")
+
+        capacity = 0
+        for connections in levels:
+            result = asyncio.run(
+                self.run_level(url, options["headers"], connections, options["duration"])
+            )
+            sustained = not result["errors"] and result["p99"] <= options["max_latency"]
+            if sustained:
+                capacity = connections
+
+            self.stdout.write(
+                f"connections={connections} | requests={result['requests']} | "
+                f"errors={result['errors']} | rps={result['rps']:,.0f} | "
+                f"p50={result['p50']:.1f}ms | p99={result['p99']:.1f}ms | "
+                f"sustained={sustained}"
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Sustained up to {capacity} concurrent connections.")
+        )
+
+    async def run_level(self, url, headers, connections: int, duration: float) -> dict:
+        """Run `connections` concurrent clients for `duration` seconds."""
+        path = url.path or "/"
+        if url.query:
+            path = f"{path}?{url.query}"
+        request = "".join(
+            [
+                f"GET {path} HTTP/1.1\r\n",
+                f"Host: {url.netloc}\r\n",
+                "Connection: keep-alive\r\n",
+                *(f"{header}\r\n" for header in headers),
+                "\r\n",
+            ]
+        ).encode("latin-1")
+
+        latencies, errors = [], [0]
+        deadline = time.perf_counter() + duration
+        await asyncio.gather(
+            *(
+                self.run_client(url, request, deadline, latencies, errors)
+                for _ in range(connections)
+            )
+        )
+
+        latencies.sort()
+        count = len(latencies)
+        return {
+            "requests": count,
+            "errors": errors[0],
+            "rps": count / duration,
+            "p50": latencies[count // 2] * 1000 if count else 0,
+            "p99": latencies[min(count - 1, int(count * 0.99))] * 1000 if count else 0,
+        }
+
+    async def run_client(self, url, request: bytes, deadline: float, latencies, errors):
+        """Send requests over one keep-alive connection until the deadline."""
+        port = url.port or (443 if url.scheme == "https" else 80)
+        reader = writer = None
+
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                if writer is None:
+                    reader, writer = await asyncio.open_connection(
+                        url.hostname, port, ssl=url.scheme == "https" or None
+                    )
+                writer.write(request)
+                await writer.drain()
+                status, keep_alive = await self.read_response(reader)
+            except (OSError, asyncio.IncompleteReadError, ValueError):
+                errors[0] += 1
+                writer = self.close(writer)
+                await asyncio.sleep(0.01)
+                continue
+
+            if status >= 400:
+                errors[0] += 1
+            else:
+                latencies.append(time.perf_counter() - started)
+            if not keep_alive:
+                writer = self.close(writer)
+
+        self.close(writer)
+
+    @staticmethod
+    async def read_response(reader):
+        """
+        Read one HTTP/1.1 response.
+
+        Returns:
+            tuple: ``(status, keep_alive)``.
+        """
+        status_line = await reader.readline()
+        if not status_line:
+            raise asyncio.IncompleteReadError(status_line, None)
+        status = int(status_line.split()[1])
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip().lower()
+
+        if headers.get("transfer-encoding") == "chunked":
+            while True:
+                size = int((await reader.readline()).split(b";")[0], 16)
+                await reader.readexactly(size + 2)  # Chunk and its CRLF
+                if size == 0:
+                    break
+        else:
+            await reader.readexactly(int(headers.get("content-length", 0)))
+
+        return status, headers.get("connection") != "close"
+
+    @staticmethod
+    def close(writer):
+        """Close a connection, returning `None` to reset it."""
+        if writer is not None:
+            writer.close()
+        return None
@@ -0,0 +1,106 @@
+import time
+
+from django.db.models import Prefetch
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from menu.models import Category, Product
+from menu.utils.snapshot_utils import SnapshotRequest
+from menu.api.v1.serializers import (
+    MenuDetailSerializer,
+    CategorySerializer,
+    ProductSerializer,
+    serialize_menu,
+    compiled_category_serializer,
+    compiled_product_serializer,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the compiled menu, category and product serializers against "
+        "the DRF serializers on the current database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=20,
+            help="Number of times each payload is built (default: 20).",
+        )
+        parser.add_argument(
+            "--base-url",
+            default="http://localhost:8000/",
+            help="Base URL used to build absolute icon URLs.",
+        )
+
+    def handle(self, *args, **options):
+        renderer = JSONRenderer()
+        iterations = options["iterations"]
+        context = {"request": SnapshotRequest(options["base_url"])}
+        # The categories of the menu snapshot, see `build_menu_snapshot`
+        menu = Category.objects.filter(is_active=True)
+
+        payloads = {
+            "menu": (
+                lambda: MenuDetailSerializer(
+                    menu.prefetch_related(
+                        Prefetch("products", queryset=Product.objects.filter(is_active=True))
+                    ),
+                    many=True,
+                    context=context,
+                ).data,
+                lambda: serialize_menu(menu, context=context),
+            ),
+            "categories": (
+                lambda: CategorySerializer(
+                    Category.objects.all(), many=True, context=context
+                ).data,
+                lambda: compiled_category_serializer.serialize(
+                    Category.objects.values(*compiled_category_serializer.columns),
+                    context,
+                ),
+            ),
+            "products": (
+                lambda: ProductSerializer(
+                    Product.objects.select_related("category"),
+                    many=True,
+                    context=context,
+                ).data,
+                lambda: compiled_product_serializer.serialize(
+                    Product.objects.values(*compiled_product_serializer.columns),
+                    context,
+                ),
+            ),
+        }
+
+        for name, (drf_payload, compiled_payload) in payloads.items():
+            drf_content = renderer.render(drf_payload())
+            compiled_content = renderer.render(compiled_payload())
+            objects = self.count_objects(compiled_payload())
+
+            drf_rate = self.measure(drf_payload, objects, iterations)
+            compiled_rate = self.measure(compiled_payload, objects, iterations)
+
+            self.stdout.write(
+                f"{name}: {objects} objects | "
+                f"drf={drf_rate:,.0f} objects/sec | "
+                f"compiled={compiled_rate:,.0f} objects/sec | "
+                f"speedup={compiled_rate / drf_rate if drf_rate else 0:.1f}x | "
+                f"identical={drf_content == compiled_content}"
+            )
+
+    @staticmethod
+    def count_objects(data) -> int:
+        """Count the serialized objects, nested products included."""
+        return sum(1 + len(item.get("products", [])) for item in data)
+
+    @staticmethod
+    def measure(build_payload, objects: int, iterations: int) -> float:
+        """Return the number of serialized objects per second, queries included."""
+        started = time.perf_counter()
+        for _ in range(iterations):
+            build_payload()
+        elapsed = time.perf_counter() - started
+        return objects * iterations / elapsed if elapsed else 0
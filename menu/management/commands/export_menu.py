@@ -0,0 +1,62 @@
+import sys
+import time
+from contextlib import nullcontext
+
+from django.core.management.base import BaseCommand, CommandError
+
+from menu.utils.catalog_utils import (
+    CATALOG_FIELDS,
+    CATALOG_FORMATS,
+    export_catalog,
+    write_catalog,
+    get_catalog_format,
+)
+
+
+class Command(BaseCommand):
+    help = "Export categories, products or prices to a CSV or JSONL file."
+
+    def add_arguments(self, parser):
+        parser.add_argument("model", choices=list(CATALOG_FIELDS))
+        parser.add_argument("path", help='File to write, "-" for stdout.')
+        parser.add_argument(
+            "--format",
+            choices=CATALOG_FORMATS,
+            help="File format (default: from the file extension, csv for stdout).",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=2000,
+            help="Number of rows fetched from the database at a time (default: 2000).",
+        )
+
+    def handle(self, *args, **options):
+        path, model = options["path"], options["model"]
+        catalog_format = get_catalog_format(path, options["format"])
+
+        started = time.perf_counter()
+        try:
+            file = (
+                nullcontext(sys.stdout)
+                if path == "-"
+                else open(path, "w", newline="", encoding="utf-8")
+            )
+            with file as file:
+                rows = write_catalog(
+                    file,
+                    catalog_format,
+                    CATALOG_FIELDS[model],
+                    export_catalog(model, options["chunk_size"]),
+                )
+        except OSError as e:
+            raise CommandError(str(e))
+
+        # Keep stdout clean for the exported rows
+        elapsed = time.perf_counter() - started
+        self.stderr.write(
+            self.style.SUCCESS(
+                f"Successfully exported {rows} {model} rows in {elapsed:.2f}s "
+                f"({rows / elapsed if elapsed else 0:,.0f} rows/sec)."
+            )
+        )
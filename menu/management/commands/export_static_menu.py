@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from menu.menu_settings import MENU_EXPORT_BASE_URL
+from menu.utils.export_utils import export_menu_files, get_export_dir
+
+
+class Command(BaseCommand):
+    help = (
+        "Render the public menu into static JSON files with precompressed "
+        "variants and a manifest, to be served directly by the web server."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--base-url",
+            default=MENU_EXPORT_BASE_URL,
+            help="Base URL used to build absolute icon URLs (default: MENU_EXPORT_BASE_URL).",
+        )
+        parser.add_argument(
+            "--output-dir",
+            default=None,
+            help="Output directory (default: MENU_EXPORT_DIR or STATIC_ROOT/menu).",
+        )
+
+    def handle(self, *args, **options):
+        if not options["base_url"]:
+            raise CommandError("Set MENU_EXPORT_BASE_URL or pass --base-url.")
+
+        directory = options["output_dir"] or get_export_dir()
+        manifest = export_menu_files(options["base_url"], directory)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Successfully exported the menu ({manifest['version']}) with "
+                f"{len(manifest['detail'])} categories to {directory}."
+            )
+        )
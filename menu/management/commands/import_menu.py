@@ -0,0 +1,79 @@
+import sys
+import time
+from functools import partial
+from contextlib import nullcontext
+
+from django.utils import timezone
+from django.core.management.base import BaseCommand, CommandError
+
+from menu.menu_version import defer_menu_invalidation
+from menu.utils.catalog_utils import (
+    CATALOG_FORMATS,
+    CATALOG_IMPORTERS,
+    CatalogError,
+    import_prices,
+    batched,
+    read_catalog,
+    get_catalog_format,
+    resize_imported_icons,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Import categories, products or prices from a CSV or JSONL file, "
+        "upserting categories and products on their slug in batches."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("model", choices=list(CATALOG_IMPORTERS))
+        parser.add_argument("path", help='File to import, "-" for stdin.')
+        parser.add_argument(
+            "--format",
+            choices=CATALOG_FORMATS,
+            help="File format (default: from the file extension, csv for stdin).",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of rows written per query (default: 1000).",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        catalog_format = get_catalog_format(path, options["format"])
+        import_batch = CATALOG_IMPORTERS[options["model"]]
+        if import_batch is import_prices:
+            # A product's rows may span batches, only its last row is kept
+            import_batch = partial(import_prices, imported={})
+
+        started_at, started = timezone.now(), time.perf_counter()
+        rows = 0
+        try:
+            file = (
+                nullcontext(sys.stdin)
+                if path == "-"
+                else open(path, newline="", encoding="utf-8")
+            )
+            # Invalidate the menu once at the end instead of after every batch
+            with file as file, defer_menu_invalidation():
+                for batch in batched(read_catalog(file, catalog_format), options["batch_size"]):
+                    rows += import_batch(batch)
+                    if options["verbosity"] > 1:
+                        self.stdout.write(f"Imported {rows} rows...")
+        except (CatalogError, OSError) as e:
+            raise CommandError(f"{e} ({rows} rows were imported before the error).")
+
+        message = f"Successfully imported {rows} {options['model']} rows"
+        if options["model"] == "category":
+            # Resized at the end, `bulk_create` sends no `post_save` signal
+            message += f" and resized {resize_imported_icons(started_at)} icons"
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{message} in {elapsed:.2f}s "
+                f"({rows / elapsed if elapsed else 0:,.0f} rows/sec)."
+            )
+        )
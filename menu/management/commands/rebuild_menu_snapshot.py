@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from menu.menu_version import bump_menu_version
+from menu.utils.snapshot_utils import SnapshotRequest, store_menu_snapshot
+
+
+class Command(BaseCommand):
+    help = "Force a rebuild of the pre-serialized public menu snapshot."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--base-url",
+            action="append",
+            default=[],
+            dest="base_urls",
+            help="Also build the snapshot for this base URL, e.g. https://example.com/ (repeatable).",
+        )
+
+    def handle(self, *args, **options):
+        # Bumping the version invalidates the snapshot on every worker and
+        # rebuilds it for every base URL it has already been served from.
+        version = bump_menu_version()
+
+        for base_url in options["base_urls"]:
+            store_menu_snapshot(SnapshotRequest(base_url), version)
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Successfully rebuilt the menu snapshot ({version}).")
+        )
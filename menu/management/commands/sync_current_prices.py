@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from menu.models import Product
+from menu.models.price_model import sync_current_prices
+
+
+class Command(BaseCommand):
+    help = "Backfill or repair the denormalized current price of products."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "slugs",
+            nargs="*",
+            help="Slugs of the products to sync, all products if omitted.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of products synced per transaction (default: 500).",
+        )
+
+    def handle(self, *args, **options):
+        products = Product.objects.order_by("pk")
+        if options["slugs"]:
+            products = products.filter(slug__in=options["slugs"])
+
+        product_ids = list(products.values_list("pk", flat=True))
+        batch_size = options["batch_size"]
+
+        # Sync in batches so the product rows are never locked for long
+        updated = 0
+        for start in range(0, len(product_ids), batch_size):
+            updated += sync_current_prices(product_ids[start : start + batch_size])
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Successfully synced the current price of {updated} products.")
+        )
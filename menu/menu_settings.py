@@ -3,3 +3,28 @@ import os
 # Get the image max size from environment variables, defaulting to 1MB (1048576 bytes) if not set
 limit: int = int(os.environ.get("Category_ICON_MAX_SIZE", 1))  # Default to 1MB
 Category_ICON_MAX_SIZE = limit * 1024 * 1024  # Convert to bytes
+
+# How long (in seconds) a pre-serialized menu snapshot is kept in the cache, defaulting to 24 hours
+MENU_SNAPSHOT_TIMEOUT = int(os.environ.get("MENU_SNAPSHOT_TIMEOUT", 60 * 60 * 24))
+
+# Bounds of the per-process LRU cache kept in front of the shared menu snapshot
+MENU_LOCAL_CACHE_MAX_ENTRIES = int(os.environ.get("MENU_LOCAL_CACHE_MAX_ENTRIES", 512))
+MENU_LOCAL_CACHE_MAX_SIZE = (
+    int(os.environ.get("MENU_LOCAL_CACHE_MAX_SIZE", 16)) * 1024 * 1024
+)  # Default to 16MB
+# Seconds an entry is kept in the per-process cache, bounding how long a worker
+# missing a menu version bump can serve a stale menu, defaulting to 30 seconds
+MENU_LOCAL_CACHE_TTL = float(os.environ.get("MENU_LOCAL_CACHE_TTL", 30))
+
+# Base URL used for the icon URLs of the static menu export, the export is
+# triggered automatically after menu edits only when this is set
+MENU_EXPORT_BASE_URL = os.environ.get("MENU_EXPORT_BASE_URL", "")
+# Directory the static menu is exported to, defaulting to STATIC_ROOT/menu
+MENU_EXPORT_DIR = os.environ.get("MENU_EXPORT_DIR", "")
+# Seconds to wait after the last menu edit before exporting, defaulting to 5 seconds
+MENU_EXPORT_DELAY = float(os.environ.get("MENU_EXPORT_DELAY", 5))
+
+# Bounding sizes (in pixels) of the WebP and original format icon variants, defaulting to 64,128,256,512
+MENU_ICON_VARIANT_SIZES = [
+    int(size) for size in os.environ.get("MENU_ICON_VARIANT_SIZES", "64,128,256,512").split(",")
+]
@@ -0,0 +1,116 @@
+import time
+import threading
+from functools import partial
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.dispatch import Signal
+from django.core.cache import cache
+
+
+# Cache key holding the current menu version, shared by every worker through
+# the configured cache backend.
+MENU_VERSION_KEY = "menu:version"
+
+# Sent after the menu version has been bumped, receives the new ``version``.
+menu_changed = Signal()
+
+# Per-thread state of `defer_menu_invalidation`
+_deferred = threading.local()
+
+# Per-thread database aliases with writes whose menu version bump has not run yet
+_pending = threading.local()
+
+
+def _new_menu_version() -> str:
+    """Generate a new, time ordered menu version token."""
+    return f"{time.time_ns():x}"
+
+
+def get_menu_version() -> str:
+    """
+    Return the current menu version.
+
+    The version is created lazily the first time it is requested, `cache.add`
+    guarantees that concurrent workers agree on a single value.
+    """
+    version = cache.get(MENU_VERSION_KEY)
+    if version is None:
+        cache.add(MENU_VERSION_KEY, _new_menu_version(), None)
+        version = cache.get(MENU_VERSION_KEY)
+    return version
+
+
+async def aget_menu_version() -> str:
+    """Async version of `get_menu_version`."""
+    version = await cache.aget(MENU_VERSION_KEY)
+    if version is None:
+        await cache.aadd(MENU_VERSION_KEY, _new_menu_version(), None)
+        version = await cache.aget(MENU_VERSION_KEY)
+    return version
+
+
+def get_menu_last_modified(version: str) -> datetime:
+    """Return the time the given menu version was created."""
+    return datetime.fromtimestamp(int(version, 16) / 1e9, tz=timezone.utc)
+
+
+def bump_menu_version() -> str:
+    """Replace the menu version and notify `menu_changed` receivers."""
+    version = _new_menu_version()
+    cache.set(MENU_VERSION_KEY, version, None)
+    menu_changed.send(sender=None, version=version)
+    return version
+
+
+def _bump_pending_menu_version(using: str):
+    """
+    Bump the menu version for the committed writes on `using`, once for all
+    the bumps scheduled by the transaction.
+    """
+    aliases = getattr(_pending, "aliases", set())
+    if using in aliases:
+        aliases.discard(using)
+        bump_menu_version()
+
+
+def invalidate_menu(using=None):
+    """
+    Schedule a menu version bump once the current transaction commits.
+
+    Multiple writes inside the same transaction only bump the version once,
+    the first commit hook to run bumps it for all of them. Outside of a
+    transaction the version is bumped immediately.
+    """
+    if getattr(_deferred, "active", False):
+        _deferred.pending = True
+        return
+
+    using = using or DEFAULT_DB_ALIAS
+    if not hasattr(_pending, "aliases"):
+        _pending.aliases = set()
+    # Hooks lost to a rollback leave the alias pending, harmlessly, as only
+    # a committed write has a hook to bump it
+    _pending.aliases.add(using)
+    transaction.on_commit(partial(_bump_pending_menu_version, using), using=using)
+
+
+@contextmanager
+def defer_menu_invalidation():
+    """
+    Collapse every menu invalidation of the block into a single one at its
+    end, for bulk writes spread over many transactions.
+    """
+    if getattr(_deferred, "active", False):
+        # Nested, the outermost block invalidates
+        yield
+        return
+
+    _deferred.active, _deferred.pending = True, False
+    try:
+        yield
+    finally:
+        _deferred.active = False
+        if _deferred.pending:
+            invalidate_menu()
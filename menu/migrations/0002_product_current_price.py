@@ -0,0 +1,36 @@
+# Generated by Django 5.1 on 2026-10-18 15:19
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_current_prices(apps, schema_editor):
+    Price = apps.get_model('menu', 'Price')
+    Product = apps.get_model('menu', 'Product')
+    latest_price = Price.objects.filter(product=OuterRef('pk'), is_active=True).order_by('-created_at')
+    Product.objects.update(
+        current_price=Subquery(latest_price.values('amount')[:1]),
+        current_price_source=Subquery(latest_price.values('pk')[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menu', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='current_price',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, max_digits=10, null=True, verbose_name='current price'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='current_price_source',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='menu.price', verbose_name='current price source'),
+        ),
+        migrations.RunPython(backfill_current_prices, migrations.RunPython.noop),
+    ]
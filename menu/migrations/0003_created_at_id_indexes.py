@@ -0,0 +1,25 @@
+# Generated by Django 5.1 on 2026-10-18 15:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menu', '0002_product_current_price'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='category',
+            index=models.Index(fields=['-created_at', '-id'], name='menu_catego_created_f987bf_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='price',
+            index=models.Index(fields=['-created_at', '-id'], name='menu_price_created_0b4e51_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['-created_at', '-id'], name='menu_produc_created_0273c3_idx'),
+        ),
+    ]
@@ -1,15 +1,14 @@
 import os
 import uuid
-from PIL import Image
 
 from django.db import models
 from django_cleanup import cleanup
-from django.dispatch import receiver
 from django.utils.text import slugify
 from django.core.exceptions import ValidationError
 from django.utils.translation import gettext_lazy as _
 
 from menu.menu_settings import Category_ICON_MAX_SIZE as size_limit
+from .menu_queryset import MenuQuerySet
 
 
 # Load allowed extensions from environment variable
@@ -28,22 +27,44 @@ class Category(models.Model):
     name = models.CharField(_("name"), max_length=60)
     slug = models.SlugField(_("slug"), max_length=60, unique=True)
     icon = models.ImageField(_("icon"), upload_to=category_icon_upload_to, blank=True)
+    # {format: {width: storage name}}, generated in the background from the icon
+    icon_variants = models.JSONField(
+        _("icon variants"), default=dict, blank=True, editable=False
+    )
 
     is_active = models.BooleanField(_("is active"), default=True)
     updated_at = models.DateTimeField(_("updated at"), auto_now=True)
     created_at = models.DateTimeField(_("created at"), auto_now_add=True)
 
+    objects = MenuQuerySet.as_manager()
+
     class Meta:
         ordering = ["-created_at"]
         verbose_name = _("category")
         verbose_name_plural = _("categories")
         indexes = [
             models.Index(fields=["name", "slug", "is_active"]),
+            models.Index(fields=["-created_at", "-id"]),
         ]
 
     def __str__(self):
         return self.name
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored icon, so it is only processed again once changed
+        if "icon" in field_names:
+            instance._loaded_icon = values[field_names.index("icon")]
+        return instance
+
+    @property
+    def icon_changed(self) -> bool:
+        """Whether the icon differs from the one loaded from the database."""
+        if "icon" in self.get_deferred_fields():
+            return False
+        return self.icon.name != getattr(self, "_loaded_icon", None)
+
     def clean(self):
         super().clean()
 
@@ -66,14 +87,25 @@ class Category(models.Model):
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.name)
+
+        if self.icon_changed:
+            # Generated again for the new icon, see `process_category_icon`
+            self.icon_variants = {}
+        elif not self._state.adding and kwargs.get("update_fields") is None:
+            # Leave the variants to the background processing, an instance
+            # loaded before they were generated must not overwrite them.
+            # Deferred fields are left out, as a regular save would
+            deferred = self.get_deferred_fields()
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name != "icon_variants"
+                and field.attname not in deferred
+            ]
         super().save(*args, **kwargs)
 
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or "icon" in update_fields:
+            self._loaded_icon = self.icon.name
 
-@receiver(models.signals.post_save, sender=Category)
-def resize_icon(sender, instance, **kwargs):
-    """Resize the icon image if it's larger than 512x512 pixels."""
-    if instance.icon:
-        img = Image.open(instance.icon.path)
-        if img.width > 512 or img.height > 512:
-            img.thumbnail((512, 512))
-            img.save(instance.icon.path)
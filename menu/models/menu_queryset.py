@@ -0,0 +1,28 @@
+from django.db import models
+from menu.menu_version import invalidate_menu
+
+
+class MenuQuerySet(models.QuerySet):
+    """
+    QuerySet shared by the menu models.
+
+    `update` (also used by `bulk_update`) and `bulk_create` bypass model
+    signals, so they invalidate the menu themselves. This keeps admin actions
+    and other bulk writes from leaving a stale menu snapshot behind.
+    """
+
+    def update(self, **kwargs):
+        rows = super().update(**kwargs)
+        if rows:
+            invalidate_menu(using=self.db)
+        return rows
+
+    update.alters_data = True
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = super().bulk_create(objs, *args, **kwargs)
+        if objs:
+            invalidate_menu(using=self.db)
+        return objs
+
+    bulk_create.alters_data = True
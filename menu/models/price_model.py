@@ -1,9 +1,142 @@
 import uuid
-from django.db import models
+from django.db import models, transaction
+from django.dispatch import receiver
+from django.db.models import F, Count, Max, Min, OuterRef, RowRange, Subquery, Window
+from django.db.models.functions import FirstValue, LastValue, Trunc
+from .menu_queryset import MenuQuerySet
 from .product_model import Product
+from .category_model import Category
 from django.utils.translation import gettext_lazy as _
 
 
+# Price fields that can change which price is a product's current price
+CURRENT_PRICE_FIELDS = {"product", "product_id", "amount", "is_active", "created_at"}
+
+
+def sync_current_prices(product_ids=None, using=None) -> int:
+    """
+    Recompute the denormalized current price of the given products.
+
+    The current price is the most recent active price of a product. The
+    products are locked first so concurrent price writes are applied one at
+    a time.
+
+    Args:
+        product_ids: Ids of the products to sync, all products if `None`.
+        using: The database alias to use.
+
+    Returns:
+        int: The number of updated products.
+    """
+    products = Product.objects.using(using)
+    if product_ids is not None:
+        products = products.filter(pk__in=list(product_ids))
+
+    latest_price = (
+        Price.objects.using(using)
+        .filter(product=OuterRef("pk"), is_active=True)
+        .order_by("-created_at")
+    )
+
+    with transaction.atomic(using=using):
+        list(products.select_for_update().order_by("pk").values_list("pk"))
+        return products.update(
+            current_price=Subquery(latest_price.values("amount")[:1]),
+            current_price_source=Subquery(latest_price.values("pk")[:1]),
+        )
+
+
+class PriceQuerySet(MenuQuerySet):
+    """
+    QuerySet for `Price` that keeps the products' current price in sync on
+    bulk writes, which do not send model signals.
+    """
+
+    def update(self, **kwargs):
+        if not CURRENT_PRICE_FIELDS.intersection(kwargs):
+            return super().update(**kwargs)
+
+        with transaction.atomic(using=self.db):
+            product_ids = set(self.values_list("product_id", flat=True))
+            rows = super().update(**kwargs)
+            if "product" in kwargs or "product_id" in kwargs:
+                product = kwargs.get("product", kwargs.get("product_id"))
+                product_ids.add(getattr(product, "pk", product))
+            if rows:
+                sync_current_prices(product_ids, using=self.db)
+        return rows
+
+    update.alters_data = True
+
+    def bulk_create(self, objs, *args, **kwargs):
+        with transaction.atomic(using=self.db):
+            objs = super().bulk_create(objs, *args, **kwargs)
+            if objs:
+                sync_current_prices({obj.product_id for obj in objs}, using=self.db)
+        return objs
+
+    bulk_create.alters_data = True
+
+    def supersede(self, prices) -> tuple:
+        """
+        Create new current prices, deactivating the active prices of their
+        products with a single set-based update, in one transaction.
+
+        The current prices of the products are resynced once, after both
+        writes, instead of once by each of them.
+
+        Args:
+            prices: Unsaved `Price` instances, at most one per product.
+
+        Returns:
+            tuple: The number of deactivated prices and the created prices.
+        """
+        product_ids = {price.product_id for price in prices}
+        with transaction.atomic(using=self.db):
+            active = self.filter(product_id__in=product_ids, is_active=True)
+            deactivated = super(PriceQuerySet, active).update(is_active=False)
+            created = super().bulk_create(prices)
+            sync_current_prices(product_ids, using=self.db)
+        return deactivated, created
+
+    supersede.alters_data = True
+
+    def bucketed(self, kind: str):
+        """
+        Downsample the prices into time buckets per product.
+
+        The first, last, min and max amount and the number of prices of each
+        bucket are computed in SQL with window functions, so only one row per
+        product and bucket is returned.
+
+        Args:
+            kind: The bucket size, ``day``, ``week`` or ``month``.
+
+        Returns:
+            QuerySet: `.values()` rows with ``product_id``, ``bucket``,
+            ``first``, ``last``, ``min``, ``max`` and ``count``, oldest first.
+        """
+        window = {
+            "partition_by": [F("product_id"), F("bucket")],
+            "order_by": [F("created_at").asc(), F("id").asc()],
+            # Whole bucket, not the rows up to the current one
+            "frame": RowRange(start=None, end=None),
+        }
+        return (
+            self.annotate(bucket=Trunc("created_at", kind))
+            .annotate(
+                first=Window(FirstValue("amount"), **window),
+                last=Window(LastValue("amount"), **window),
+                min=Window(Min("amount"), **window),
+                max=Window(Max("amount"), **window),
+                count=Window(Count("id"), **window),
+            )
+            .values("product_id", "bucket", "first", "last", "min", "max", "count")
+            .distinct()
+            .order_by("product_id", "bucket")
+        )
+
+
 class Price(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     product = models.ForeignKey(
@@ -16,13 +149,39 @@ class Price(models.Model):
     updated_at = models.DateTimeField(_("updated at"), auto_now=True)
     created_at = models.DateTimeField(_("created at"), auto_now_add=True)
 
+    objects = PriceQuerySet.as_manager()
+
     class Meta:
         verbose_name = "price"
         verbose_name_plural = "prices"
         ordering = ["-created_at"]
         indexes = [
             models.Index(fields=["product", "is_active", "created_at"]),
+            models.Index(fields=["-created_at", "-id"]),
         ]
 
     def __str__(self):
         return f"{self.product.name} - {str(self.amount)}"
+
+    def save(self, *args, **kwargs):
+        # Save the price and sync its product's current price in one transaction
+        with transaction.atomic(using=kwargs.get("using")):
+            super().save(*args, **kwargs)
+
+
+@receiver(models.signals.post_save, sender=Price)
+def sync_current_price_on_save(sender, instance, using, **kwargs):
+    """Sync the current price of the product a price was saved for."""
+    sync_current_prices([instance.product_id], using=using)
+
+
+@receiver(models.signals.post_delete, sender=Price)
+def sync_current_price_on_delete(sender, instance, using, origin=None, **kwargs):
+    """
+    Sync the current price of the product a price was deleted from.
+
+    Skipped when the price is deleted because its product or category is.
+    """
+    origin_model = origin.model if isinstance(origin, models.QuerySet) else type(origin)
+    if origin_model not in (Product, Category):
+        sync_current_prices([instance.product_id], using=using)
@@ -1,9 +1,14 @@
 import uuid
 from django.db import models
+from .menu_queryset import MenuQuerySet
 from .category_model import Category
 from django.utils.translation import gettext_lazy as _
 
 
+# Fields kept in sync with the product's prices
+DENORMALIZED_FIELDS = ("current_price", "current_price_source")
+
+
 class Product(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     category = models.ForeignKey(
@@ -13,10 +18,31 @@ class Product(models.Model):
     name = models.CharField(_("name"), max_length=60)
     slug = models.SlugField(_("slug"), max_length=60, unique=True)
 
+    # Denormalized most recent active price, maintained by `sync_current_prices`
+    current_price = models.DecimalField(
+        _("current price"),
+        max_digits=10,
+        decimal_places=2,
+        null=True,
+        blank=True,
+        editable=False,
+    )
+    current_price_source = models.ForeignKey(
+        "Price",
+        verbose_name=_("current price source"),
+        on_delete=models.SET_NULL,
+        related_name="+",
+        null=True,
+        blank=True,
+        editable=False,
+    )
+
     is_active = models.BooleanField(_("is active"), default=True)
     updated_at = models.DateTimeField(_("updated at"), auto_now=True)
     created_at = models.DateTimeField(_("created at"), auto_now_add=True)
 
+    objects = MenuQuerySet.as_manager()
+
     class Meta:
         verbose_name = "product"
         verbose_name_plural = "products"
@@ -24,7 +50,19 @@ class Product(models.Model):
         ordering = ["-created_at"]
         indexes = [
             models.Index(fields=["name", "slug", "is_active"]),
+            models.Index(fields=["-created_at", "-id"]),
         ]
 
     def __str__(self):
         return self.name
+
+    def save(self, *args, **kwargs):
+        # Never write the denormalized price back from a possibly stale instance,
+        # it is only ever updated by `sync_current_prices`.
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in DENORMALIZED_FIELDS
+            ]
+        super().save(*args, **kwargs)
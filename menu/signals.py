@@ -0,0 +1,59 @@
+from django.db import transaction
+from django.db.models import signals
+from django.dispatch import receiver
+
+from menu.models import Category, Product, Price
+from menu.utils import (
+    schedule_menu_rebuild,
+    schedule_menu_export,
+    delete_icon_variants,
+    schedule_icon_processing,
+)
+from menu.menu_version import invalidate_menu, menu_changed
+
+
+@receiver(signals.post_save, sender=Price)
+@receiver(signals.post_save, sender=Product)
+@receiver(signals.post_save, sender=Category)
+@receiver(signals.post_delete, sender=Price)
+@receiver(signals.post_delete, sender=Product)
+@receiver(signals.post_delete, sender=Category)
+def invalidate_menu_on_change(sender, using, **kwargs):
+    """Invalidate the menu whenever a category, product or price changes."""
+    invalidate_menu(using=using)
+
+
+@receiver(signals.post_save, sender=Category)
+def process_icon_on_change(sender, instance, using, update_fields=None, **kwargs):
+    """
+    Resize the category icon and build its variants in the background once
+    the save is committed, only when the icon changed.
+    """
+    if update_fields is not None and "icon" not in update_fields:
+        return
+    if instance.icon and instance.icon_changed:
+        pk, name = instance.pk, instance.icon.name
+        transaction.on_commit(lambda: schedule_icon_processing(pk, name), using=using)
+
+
+@receiver(signals.post_delete, sender=Category)
+def delete_icon_variants_on_delete(sender, instance, using, **kwargs):
+    """Delete the icon variants of a deleted category once committed."""
+    if instance.icon:
+        storage, name = instance.icon.storage, instance.icon.name
+        transaction.on_commit(lambda: delete_icon_variants(storage, name), using=using)
+
+
+@receiver(menu_changed)
+def rebuild_menu_on_change(sender, version, **kwargs):
+    """
+    Rebuild the cached menu snapshots for the new menu version in the
+    background, so the commit is not held up by serializing the menu.
+    """
+    schedule_menu_rebuild(version)
+
+
+@receiver(menu_changed)
+def export_menu_on_change(sender, version, **kwargs):
+    """Schedule a debounced static export of the menu."""
+    schedule_menu_export()
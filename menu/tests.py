@@ -1,3 +1,1590 @@
-from django.test import TestCase
+import io
+import os
+import gzip
+import hashlib
+import json
+import uuid
+import base64
+import shutil
+import tempfile
+from unittest import mock
+from decimal import Decimal
+from datetime import datetime, timedelta
 
-# Create your tests here.
+from django.urls import reverse
+from django.db import connection, transaction
+from django.db.models import Prefetch
+from django.http import StreamingHttpResponse
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from django.core.cache import cache, caches
+from django.core.management import CommandError, call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test.utils import CaptureQueriesContext
+from rest_framework.request import Request
+from rest_framework.exceptions import NotFound
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework.renderers import JSONRenderer
+from PIL import Image
+from django.test import AsyncRequestFactory
+
+from users.models import User
+from menu.models import Category, Product, Price
+from menu.api.v1.serializers import (
+    MenuDetailSerializer,
+    ProductSerializer,
+    PriceSerializer,
+    serialize_menu,
+    compiled_product_serializer,
+    compiled_price_serializer,
+)
+from menu.api.v1.mixins import stream_json_list
+from menu.api.v1.pagination import KeysetCursorPagination
+from menu.api.v1.views import PriceListView, ProductListCreateView
+from menu.utils.search_utils import SearchIndex, normalize_text, tokenize
+from menu.api.v1.views import AsyncMenuListView, AsyncMenuDetailView
+from menu.api.v1.views.menu_views import AsyncMenuView
+from menu.menu_settings import Category_ICON_MAX_SIZE
+from menu.checks import check_shared_menu_cache
+from menu.menu_version import MENU_VERSION_KEY, get_menu_version, invalidate_menu
+from menu.utils.lru_utils import LRUCache
+from menu.utils.compression_utils import COMPRESSORS, get_accepted_encoding, gzip_compress
+from menu.utils.export_utils import MENU_EXPORT_MANIFEST, export_menu_files
+from menu.utils.catalog_utils import CatalogError, import_prices, read_catalog
+from menu.utils.snapshot_utils import SnapshotRequest, get_menu_list, local_cache
+from menu.utils.snapshot_utils import rebuild_current_menu_snapshots, schedule_menu_rebuild
+from menu.utils.upload_utils import IconUploadHandler
+from menu.utils.icon_utils import ICON_MAX_DIMENSION, build_icon_variants, process_category_icon
+
+
+class MenuReadPathTests(TestCase):
+    """
+    Regression tests for the public menu read path, which must never load
+    the price history of the products.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        for c in range(3):
+            category = Category.objects.create(
+                name=f"Category {c}", slug=f"category-{c}"
+            )
+            for p in range(5):
+                product = Product.objects.create(
+                    category=category,
+                    name=f"Product {c}-{p}",
+                    slug=f"product-{c}-{p}",
+                    is_active=p != 4,
+                )
+                for amount in range(10):
+                    Price.objects.create(product=product, amount=Decimal(amount))
+
+    def setUp(self):
+        # The menu snapshot is cached, start every test from a cold cache
+        cache.clear()
+
+    def test_menu_list_queries(self):
+        """Building the menu takes one query for categories and one for products."""
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse("menu-list-v1"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(context.captured_queries), 2)
+        for query in context.captured_queries:
+            self.assertNotIn(Price._meta.db_table, query["sql"])
+
+    def test_menu_detail_queries(self):
+        """The detail endpoint is served from the same lean snapshot."""
+        url = reverse("menu-detail", kwargs={"slug": "category-1"})
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(context.captured_queries), 2)
+        for query in context.captured_queries:
+            self.assertNotIn(Price._meta.db_table, query["sql"])
+
+    def test_menu_rows_fetched(self):
+        """Only active products are fetched, with only the payload columns."""
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse("menu-list-v1"))
+
+        category_query, product_query = (q["sql"] for q in context.captured_queries)
+        self.assertEqual(category_query.split(" FROM ")[0].count(","), 6)
+        self.assertEqual(product_query.split(" FROM ")[0].count(","), 6)
+
+        products = [
+            product for category in response.json() for product in category["products"]
+        ]
+        self.assertEqual(len(products), Product.objects.filter(is_active=True).count())
+        self.assertEqual(products[0]["price"], 9.0)
+
+    def test_menu_served_from_snapshot(self):
+        """Once built, the menu is served without touching the database."""
+        self.client.get(reverse("menu-list-v1"))
+
+        with self.assertNumQueries(0):
+            self.client.get(reverse("menu-list-v1"))
+
+
+class KeysetCursorPaginationTests(TestCase):
+    """Tests of the cursor pagination of the admin list endpoints."""
+
+    @classmethod
+    def setUpTestData(cls):
+        created_at = timezone.now()
+        for c in range(7):
+            Category.objects.create(name=f"Category {c}", slug=f"category-{c}")
+        categories = list(Category.objects.order_by("slug"))
+        # The three last categories share a creation date
+        for c, category in enumerate(categories):
+            category.created_at = created_at - timedelta(minutes=min(c, 4))
+        Category.objects.bulk_update(categories, ["created_at"])
+        cls.expected = list(
+            Category.objects.order_by("-created_at", "-pk").values_list("pk", flat=True)
+        )
+
+    def paginate(self, url: str):
+        paginator = KeysetCursorPagination()
+        request = Request(APIRequestFactory().get(url))
+        page = paginator.paginate_queryset(Category.objects.all(), request)
+        return paginator, [category.pk for category in page]
+
+    def test_next_and_previous_pages(self):
+        """Pages follow each other through ties on `created_at`, both ways."""
+        paginator, first_page = self.paginate("/?page_size=3")
+        self.assertEqual(first_page, self.expected[:3])
+        self.assertIsNone(paginator.get_previous_link())
+
+        paginator, second_page = self.paginate(paginator.get_next_link())
+        self.assertEqual(second_page, self.expected[3:6])
+
+        next_paginator, last_page = self.paginate(paginator.get_next_link())
+        self.assertEqual(last_page, self.expected[6:])
+        self.assertIsNone(next_paginator.get_next_link())
+
+        paginator, previous_page = self.paginate(paginator.get_previous_link())
+        self.assertEqual(previous_page, first_page)
+
+    def test_malformed_cursors(self):
+        """Malformed cursors are answered with a 404, not a server error."""
+        for position in (
+            "not base64!",
+            base64.urlsafe_b64encode(b"0|2024-01-01T00:00:00+00:00").decode(),
+            base64.urlsafe_b64encode(b"0|yesterday|" + str(uuid.uuid4()).encode()).decode(),
+            base64.urlsafe_b64encode(b"0|2024-01-01T00:00:00+00:00|x").decode(),
+            base64.urlsafe_b64encode(b"\xff\xfe").decode(),
+        ):
+            with self.subTest(position=position), self.assertRaises(NotFound):
+                self.paginate(f"/?cursor={position}")
+
+    def test_naive_cursor(self):
+        """A cursor without an offset is read in the current time zone."""
+        created_at = timezone.localtime(Category.objects.get(slug="category-1").created_at)
+        position = f"0|{created_at.replace(tzinfo=None).isoformat()}|{uuid.UUID(int=0)}"
+        _, page = self.paginate(
+            f"/?cursor={base64.urlsafe_b64encode(position.encode()).decode()}"
+        )
+        self.assertEqual(page, self.expected[2:])
+
+
+class AsyncMenuViewTests(TestCase):
+    """Tests of the async menu views served by the ASGI deployment."""
+
+    @classmethod
+    def setUpTestData(cls):
+        for c in range(2):
+            category = Category.objects.create(name=f"Category {c}", slug=f"category-{c}")
+            for p in range(3):
+                product = Product.objects.create(
+                    category=category, name=f"Product {c}-{p}", slug=f"product-{c}-{p}"
+                )
+                Price.objects.create(product=product, amount=Decimal(p + 1))
+
+    def setUp(self):
+        cache.clear()
+
+    async def get(self, view, headers=None, **kwargs):
+        request = AsyncRequestFactory().get("/", headers=headers)
+        return await view.as_view()(request, **kwargs)
+
+    async def test_list_matches_sync_view(self):
+        """The async list view serves the same JSON as the sync view."""
+        response = await self.get(AsyncMenuListView)
+        sync_response = await self.async_client.get(reverse("menu-list-v1"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content), sync_response.json())
+
+    async def test_detail_matches_sync_view(self):
+        """The async detail view serves the same JSON as the sync view, 404 if unknown."""
+        response = await self.get(AsyncMenuDetailView, slug="category-1")
+        sync_response = await self.async_client.get(
+            reverse("menu-detail", kwargs={"slug": "category-1"})
+        )
+        self.assertEqual(json.loads(response.content), sync_response.json())
+
+        response = await self.get(AsyncMenuDetailView, slug="unknown")
+        self.assertEqual(response.status_code, 404)
+
+    async def test_not_modified(self):
+        """A request with the current ETag is answered with a 304."""
+        response = await self.get(AsyncMenuListView)
+        etag = response["ETag"]
+
+        response = await self.get(AsyncMenuListView, headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+
+    async def test_unknown_category_not_found(self):
+        """A request for an unknown category with the current ETag is a 404, not a 304."""
+        response = await self.get(AsyncMenuDetailView, slug="category-1")
+        headers = {"If-None-Match": response["ETag"]}
+
+        response = await self.get(AsyncMenuDetailView, headers=headers, slug="category-1")
+        self.assertEqual(response.status_code, 304)
+
+        response = await self.get(AsyncMenuDetailView, headers=headers, slug="unknown")
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(response.has_header("ETag"))
+
+        sync_response = await self.async_client.get(
+            reverse("menu-detail", kwargs={"slug": "unknown"}), headers=headers
+        )
+        self.assertEqual(sync_response.status_code, 404)
+        self.assertFalse(sync_response.has_header("ETag"))
+
+    def test_get_content_required(self):
+        """A subclass without an async `get_content` fails when defined."""
+        with self.assertRaises(TypeError):
+
+            class BrokenMenuView(AsyncMenuView):
+                pass
+
+
+class MenuConditionalRequestTests(TestCase):
+    """Tests of the conditional requests answered by the sync menu views."""
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name="Drinks", slug="drinks")
+        cls.tea = Product.objects.create(category=category, name="Tea", slug="tea")
+        Price.objects.create(product=cls.tea, amount=Decimal("10.00"))
+
+    def setUp(self):
+        cache.clear()
+        patcher = mock.patch("menu.signals.schedule_menu_rebuild")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def urls(self) -> list:
+        return [reverse("menu-list-v1"), reverse("menu-detail", kwargs={"slug": "drinks"})]
+
+    def test_if_none_match(self):
+        """A request with the current ETag is a 304, answered without the database."""
+        for url in self.urls():
+            with self.subTest(url):
+                etag = self.client.get(url)["ETag"]
+
+                with self.assertNumQueries(0):
+                    response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response["ETag"], etag)
+                self.assertEqual(response.content, b"")
+
+                response = self.client.get(url, HTTP_IF_NONE_MATCH='"stale"')
+                self.assertEqual(response.status_code, 200)
+
+    def test_if_modified_since(self):
+        """A request with the current Last-Modified is a 304, an older date a 200."""
+        for url in self.urls():
+            with self.subTest(url):
+                last_modified = self.client.get(url)["Last-Modified"]
+
+                response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+                self.assertEqual(response.status_code, 304)
+
+                response = self.client.get(
+                    url, HTTP_IF_MODIFIED_SINCE="Mon, 05 Jan 2026 10:00:00 GMT"
+                )
+                self.assertEqual(response.status_code, 200)
+
+    def test_price_edit_changes_etag(self):
+        """A new price changes the ETag, so the old one gets the new menu."""
+        etags = [self.client.get(url)["ETag"] for url in self.urls()]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Price.objects.create(product=self.tea, amount=Decimal("12.50"))
+
+        for url, etag in zip(self.urls(), etags):
+            with self.subTest(url):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+                self.assertNotEqual(response["ETag"], etag)
+                self.assertIn(b"12.5", response.content)
+
+
+class CurrentPriceTests(TestCase):
+    """
+    Tests of the denormalized current price of the products, which must
+    follow every way prices are written.
+    """
+
+    def setUp(self):
+        category = Category.objects.create(name="Category", slug="category")
+        self.product = Product.objects.create(
+            category=category, name="Product", slug="product"
+        )
+
+    def assertCurrentPrice(self, amount, source=None):
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.current_price, amount)
+        if source is not None or amount is None:
+            self.assertEqual(self.product.current_price_source, source)
+
+    def test_new_price_becomes_current(self):
+        """The latest active price becomes the current price."""
+        self.assertCurrentPrice(None)
+        first = Price.objects.create(product=self.product, amount=Decimal("10.00"))
+        self.assertCurrentPrice(Decimal("10.00"), first)
+        second = Price.objects.create(product=self.product, amount=Decimal("12.50"))
+        self.assertCurrentPrice(Decimal("12.50"), second)
+
+        # An inactive price never becomes current
+        Price.objects.create(product=self.product, amount=Decimal("99.00"), is_active=False)
+        self.assertCurrentPrice(Decimal("12.50"), second)
+
+    def test_delete_falls_back(self):
+        """Deleting the current price falls back to the previous one, then to NULL."""
+        first = Price.objects.create(product=self.product, amount=Decimal("10.00"))
+        second = Price.objects.create(product=self.product, amount=Decimal("12.50"))
+
+        second.delete()
+        self.assertCurrentPrice(Decimal("10.00"), first)
+        first.delete()
+        self.assertCurrentPrice(None)
+
+    def test_queryset_update(self):
+        """A queryset update, which sends no signal, resyncs the current price."""
+        first = Price.objects.create(product=self.product, amount=Decimal("10.00"))
+        second = Price.objects.create(product=self.product, amount=Decimal("12.50"))
+
+        Price.objects.filter(pk=second.pk).update(is_active=False)
+        self.assertCurrentPrice(Decimal("10.00"), first)
+        Price.objects.filter(pk=first.pk).update(amount=Decimal("11.00"))
+        self.assertCurrentPrice(Decimal("11.00"), first)
+        Price.objects.filter(product=self.product).update(is_active=False)
+        self.assertCurrentPrice(None)
+
+    def test_bulk_create(self):
+        """Bulk created prices, which send no signal, resync the current price."""
+        prices = Price.objects.bulk_create(
+            [Price(product=self.product, amount=Decimal(amount)) for amount in ("5", "6")]
+        )
+        self.product.refresh_from_db()
+        self.assertIn(self.product.current_price_source, prices)
+        self.assertEqual(
+            self.product.current_price, self.product.current_price_source.amount
+        )
+
+    def test_supersede(self):
+        """Superseding deactivates the active prices and makes the new one current."""
+        old = Price.objects.create(product=self.product, amount=Decimal("10.00"))
+        deactivated, (new,) = Price.objects.supersede(
+            [Price(product=self.product, amount=Decimal("15.00"))]
+        )
+
+        self.assertEqual(deactivated, 1)
+        old.refresh_from_db()
+        self.assertFalse(old.is_active)
+        self.assertCurrentPrice(Decimal("15.00"), new)
+
+
+class PriceAdjustmentTests(TestCase):
+    """Tests of the bulk price adjustment of whole categories."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            username="admin", password="pass12345", is_staff=True
+        )
+        cls.category = Category.objects.create(name="Category", slug="category")
+        other = Category.objects.create(name="Other", slug="other")
+        cls.products = {}
+        for slug, amount in (("tea", "10.00"), ("coffee", "23.40"), ("cake", None)):
+            product = Product.objects.create(category=cls.category, name=slug, slug=slug)
+            if amount is not None:
+                Price.objects.create(product=product, amount=Decimal(amount))
+            cls.products[slug] = product
+        cls.other = Product.objects.create(category=other, name="Juice", slug="juice")
+        Price.objects.create(product=cls.other, amount=Decimal("10.00"))
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def adjust(self, **data):
+        return self.client.post(
+            reverse("price-adjust-v1"), {"categories": ["category"], **data}, format="json"
+        )
+
+    def current_prices(self) -> dict:
+        return dict(
+            Product.objects.filter(category=self.category).values_list("slug", "current_price")
+        )
+
+    def test_percent_rounding(self):
+        """Percentage adjustments are rounded to `roundTo` in the chosen direction."""
+        response = self.adjust(mode="percent", value="10", roundTo="0.50")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["adjusted"], 2)
+        self.assertEqual(response.data["withoutPrice"], 1)
+        # 23.40 * 1.1 = 25.74, nearest multiple of 0.50
+        self.assertEqual(
+            self.current_prices(),
+            {"tea": Decimal("11.00"), "coffee": Decimal("25.50"), "cake": None},
+        )
+
+        self.adjust(mode="percent", value="5", roundTo="1", rounding="up")
+        # 11.55 and 26.775, rounded up to whole amounts
+        self.assertEqual(
+            self.current_prices(),
+            {"tea": Decimal("12.00"), "coffee": Decimal("27.00"), "cake": None},
+        )
+
+        self.adjust(mode="percent", value="-5", roundTo="1", rounding="down")
+        # 11.40 and 25.65, rounded down
+        self.assertEqual(
+            self.current_prices(),
+            {"tea": Decimal("11.00"), "coffee": Decimal("25.00"), "cake": None},
+        )
+
+    def test_absolute_adjustment(self):
+        """Absolute adjustments create one new current price per changed product."""
+        response = self.adjust(mode="absolute", value="2.00")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["deactivatedPrices"], 2)
+        self.assertEqual(
+            self.current_prices(),
+            {"tea": Decimal("12.00"), "coffee": Decimal("25.40"), "cake": None},
+        )
+        self.assertEqual(Price.objects.filter(product=self.products["tea"]).count(), 2)
+        # Other categories are left alone
+        self.other.refresh_from_db()
+        self.assertEqual(self.other.current_price, Decimal("10.00"))
+
+    def test_negative_result_rejected(self):
+        """An adjustment making a price negative is rejected, changing nothing."""
+        response = self.adjust(mode="absolute", value="-15.00")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("value", response.data)
+        self.assertEqual(
+            self.current_prices(),
+            {"tea": Decimal("10.00"), "coffee": Decimal("23.40"), "cake": None},
+        )
+        self.assertEqual(Price.objects.count(), 3)
+
+    def test_admin_only(self):
+        """Only admins can adjust prices."""
+        self.client.force_authenticate(None)
+        self.assertEqual(self.adjust(mode="absolute", value="1").status_code, 401)
+
+
+class SearchIndexTests(TestCase):
+    """Tests of the typeahead search over the menu names."""
+
+    @classmethod
+    def setUpTestData(cls):
+        drinks = Category.objects.create(name="نوشیدنی", slug="drinks")
+        cakes = Category.objects.create(name="Ice Cakes", slug="ice-cakes")
+        for category, name, slug in (
+            (drinks, "Ice Latte", "ice-latte"),
+            (drinks, "Latte Ice Cream Special", "latte-ice-cream"),
+            (drinks, "چای کرک", "karak-tea"),
+            (drinks, "کیک ۱۲ تکه", "cake-12"),
+            (drinks, "نیم\u200cپز", "half-cooked"),
+            (cakes, "Cheese Cake", "cheese-cake"),
+        ):
+            Product.objects.create(category=category, name=name, slug=slug)
+
+    def setUp(self):
+        cache.clear()
+        self.index = SearchIndex()
+
+    def search(self, query: str) -> list:
+        return [result["slug"] for result in self.index.search(query)]
+
+    def test_normalize_text(self):
+        """Arabic letters and digits are unified with their Persian forms."""
+        self.assertEqual(normalize_text("كيك ٣"), normalize_text("کیک ۳"))
+        self.assertEqual(normalize_text("كيك ٣"), "کیک 3")
+        self.assertEqual(normalize_text("  Café\tLATTE "), "café latte")
+
+    def test_tokenize_zwnj(self):
+        """A word with a ZWNJ is indexed both split and joined."""
+        self.assertEqual(tokenize(normalize_text("نیم\u200cپز")), {"نیم", "پز", "نیمپز"})
+
+    def test_persian_arabic_variants(self):
+        """Queries typed with Arabic letters, digits or ZWNJs find Persian names."""
+        self.assertEqual(self.search("كرك"), ["karak-tea"])
+        self.assertEqual(self.search("چاي"), ["karak-tea"])
+        self.assertEqual(self.search("12"), ["cake-12"])
+        self.assertEqual(self.search("١٢"), ["cake-12"])
+        self.assertEqual(self.search("نیمپز"), ["half-cooked"])
+        self.assertEqual(self.search("نیم\u200cپز"), ["half-cooked"])
+
+    def test_every_word_matched(self):
+        """Results match every word of the query, in any order, from 3 letters inside words."""
+        self.assertEqual(self.search("cake cheese"), ["cheese-cake"])
+        self.assertEqual(self.search("hees"), ["cheese-cake"])
+        self.assertEqual(self.search("latte tea"), [])
+
+    def test_ranking(self):
+        """Categories come first, then names starting with the query as typed."""
+        self.assertEqual(self.search("ice"), ["ice-cakes", "ice-latte", "latte-ice-cream"])
+        # The longer name starts with the query, the shorter one has its words reversed
+        self.assertEqual(self.search("latte ice"), ["latte-ice-cream", "ice-latte"])
+        self.assertEqual(self.search("ice latte"), ["ice-latte", "latte-ice-cream"])
+
+
+class CategoryIconUploadTests(TestCase):
+    """
+    Tests of the category icon upload, which streams the icon to a temporary
+    file and stops reading an invalid or oversized upload.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            username="admin", password="pass12345", is_staff=True
+        )
+        cls.category = Category.objects.create(name="Category", slug="category")
+
+    @classmethod
+    def setUpClass(cls):
+        media_root = tempfile.mkdtemp()
+        cls.addClassCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        cls.enterClassContext(override_settings(MEDIA_ROOT=media_root))
+        super().setUpClass()
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        image = io.BytesIO()
+        Image.new("RGB", (32, 32), "red").save(image, "PNG")
+        self.png = image.getvalue()
+
+    def upload(self, content: bytes, name: str = "icon.png", **extra):
+        return self.client.put(
+            reverse("category-icon-v1", kwargs={"slug": self.category.slug}),
+            {"icon": SimpleUploadedFile(name, content)},
+            format="multipart",
+            **extra,
+        )
+
+    def test_valid_png(self):
+        """A PNG is stored as the category icon, named after its format."""
+        response = self.upload(self.png, name="icon.jpg")
+        self.assertEqual(response.status_code, 200)
+
+        self.category.refresh_from_db()
+        self.assertTrue(self.category.icon.name.endswith(".png"))
+        with self.category.icon.open("rb") as icon:
+            self.assertEqual(icon.read(), self.png)
+
+    def test_invalid_files_rejected(self):
+        """Files that are not a whole PNG or JPEG, or too large, are rejected."""
+        oversize = self.png + b"\0" * Category_ICON_MAX_SIZE
+        for label, content in [
+            ("text", b"This is not an image, only some text."),
+            ("tiny", b"GIF"),
+            ("truncated", self.png[:20]),
+            ("oversize", oversize),
+        ]:
+            with self.subTest(label):
+                response = self.upload(content)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("icon", response.data)
+
+        self.category.refresh_from_db()
+        self.assertFalse(self.category.icon)
+
+    def test_text_stops_upload(self):
+        """An upload not starting with an image signature is not read further."""
+        with mock.patch.object(
+            IconUploadHandler,
+            "receive_data_chunk",
+            autospec=True,
+            side_effect=IconUploadHandler.receive_data_chunk,
+        ) as receive_data_chunk:
+            response = self.upload(b"Not an image" * 40_000)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(receive_data_chunk.call_count, 1)
+
+    def test_content_length_precheck(self):
+        """A request announcing a body over the size limit is rejected unread."""
+        with mock.patch.object(IconUploadHandler, "receive_data_chunk") as receive_data_chunk:
+            response = self.upload(
+                self.png, CONTENT_LENGTH=str(Category_ICON_MAX_SIZE * 2)
+            )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("icon", response.data)
+        receive_data_chunk.assert_not_called()
+
+
+class MenuInvalidationTests(TestCase):
+    """Tests of the menu version bumps scheduled by the menu writes."""
+
+    def setUp(self):
+        cache.clear()
+        patcher = mock.patch("menu.signals.schedule_menu_rebuild")
+        self.schedule_menu_rebuild = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_bumped_once_per_transaction(self):
+        """Every write of a transaction is covered by a single bump on commit."""
+        version = get_menu_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            category = Category.objects.create(name="Category", slug="category")
+            for p in range(3):
+                Product.objects.create(category=category, name=f"Product {p}", slug=f"product-{p}")
+            self.assertEqual(get_menu_version(), version)
+
+        self.assertNotEqual(get_menu_version(), version)
+        self.schedule_menu_rebuild.assert_called_once_with(get_menu_version())
+
+    def test_bumped_after_rollback(self):
+        """A write committed after a rolled back one still bumps the version."""
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                invalidate_menu()
+                raise RuntimeError("Request failed")
+        self.schedule_menu_rebuild.assert_not_called()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            invalidate_menu()
+        self.schedule_menu_rebuild.assert_called_once()
+
+    def test_rebuild_queued_on_commit(self):
+        """The snapshots are rebuilt by the background worker, not by the committing request."""
+        self.schedule_menu_rebuild.side_effect = schedule_menu_rebuild
+        with mock.patch("menu.utils.snapshot_utils._rebuild_executor") as executor:
+            with self.captureOnCommitCallbacks(execute=True):
+                Category.objects.create(name="Category", slug="category")
+
+        executor.submit.assert_called_once_with(
+            rebuild_current_menu_snapshots, get_menu_version()
+        )
+
+    def test_stale_rebuild_skipped(self):
+        """A rebuild queued for a version replaced since is skipped."""
+        version = get_menu_version()
+        with (
+            mock.patch("menu.utils.snapshot_utils.rebuild_menu_snapshots") as rebuild,
+            mock.patch("menu.utils.snapshot_utils.connections"),
+        ):
+            rebuild_current_menu_snapshots("0")
+            rebuild.assert_not_called()
+            rebuild_current_menu_snapshots(version)
+            rebuild.assert_called_once_with(version)
+
+
+class SharedMenuCacheTests(TestCase):
+    """
+    Tests of the menu version shared by the workers through the cache, which
+    every worker must see bumped after an edit.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cache_dir = tempfile.mkdtemp()
+        cls.addClassCleanup(shutil.rmtree, cache_dir, ignore_errors=True)
+        cls.enterClassContext(
+            override_settings(
+                CACHES={
+                    "default": {
+                        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+                        "LOCATION": cache_dir,
+                    }
+                }
+            )
+        )
+        super().setUpClass()
+
+    def setUp(self):
+        cache.clear()
+
+    def test_bump_from_other_worker(self):
+        """A version bumped by another worker bypasses the snapshot kept in memory."""
+        request = SnapshotRequest("http://testserver/")
+        Category.objects.create(name="Tea", slug="tea")
+        self.assertEqual([c["slug"] for c in json.loads(get_menu_list(request))], ["tea"])
+
+        # Only bumped on commit here, bump it through another cache client
+        Category.objects.bulk_create([Category(name="Cake", slug="cake")])
+        other_worker_cache = caches.create_connection("default")
+        other_worker_cache.set(MENU_VERSION_KEY, f"{int(get_menu_version(), 16) + 1:x}", None)
+
+        self.assertEqual(
+            sorted(c["slug"] for c in json.loads(get_menu_list(request))), ["cake", "tea"]
+        )
+
+    def test_local_cache_ttl(self):
+        """Entries of the per-process cache expire after its TTL."""
+        local_cache = LRUCache(max_entries=10, max_bytes=1024, ttl=30)
+        with mock.patch("menu.utils.lru_utils.time.monotonic", return_value=100):
+            local_cache.set("menu", b"payload")
+        with mock.patch("menu.utils.lru_utils.time.monotonic", return_value=129):
+            self.assertEqual(local_cache.get("menu"), b"payload")
+        with mock.patch("menu.utils.lru_utils.time.monotonic", return_value=130):
+            self.assertIsNone(local_cache.get("menu"))
+        self.assertEqual((len(local_cache), local_cache.size), (0, 0))
+
+    def test_local_cache_backend_check(self):
+        """Several workers without DEBUG must not keep the menu version per process."""
+        locmem = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+        with override_settings(DEBUG=False, CACHES=locmem):
+            self.assertEqual(
+                [error.id for error in check_shared_menu_cache(workers=9)], ["menu.E001"]
+            )
+            self.assertEqual(check_shared_menu_cache(workers=1), [])
+        with override_settings(DEBUG=True, CACHES=locmem):
+            self.assertEqual(check_shared_menu_cache(workers=9), [])
+        with override_settings(DEBUG=False):
+            self.assertEqual(check_shared_menu_cache(workers=9), [])
+
+
+class PriceHistoryTests(TestCase):
+    """Tests of the price history and its downsampling into time buckets."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            username="admin", password="pass12345", is_staff=True
+        )
+        drinks = Category.objects.create(name="Drinks", slug="drinks")
+        food = Category.objects.create(name="Food", slug="food")
+        cls.tea = Product.objects.create(category=drinks, name="Tea", slug="tea")
+        cls.coffee = Product.objects.create(category=drinks, name="Coffee", slug="coffee")
+        cls.cake = Product.objects.create(category=food, name="Cake", slug="cake")
+
+        # 2026-01-05 is a Monday
+        cls.tea_prices = cls.create_prices(
+            cls.tea,
+            [
+                ("2026-01-05 10:00", "10.00"),
+                ("2026-01-05 15:00", "12.00"),
+                ("2026-01-06 09:00", "11.00"),
+                ("2026-01-20 09:00", "9.00"),
+                ("2026-02-10 09:00", "15.00"),
+            ],
+        )
+        cls.coffee_prices = cls.create_prices(cls.coffee, [("2026-01-07 09:00", "20.00")])
+        cls.cake_prices = cls.create_prices(cls.cake, [("2026-01-07 09:00", "30.00")])
+
+    @classmethod
+    def create_prices(cls, product, prices) -> list:
+        """Create the prices of a product, superseding each with the next."""
+        created = []
+        for created_at, amount in prices:
+            price = Price.objects.create(product=product, amount=Decimal(amount))
+            Price.objects.filter(pk=price.pk).update(created_at=cls.at(created_at))
+            created.append(price.pk)
+        Price.objects.filter(pk__in=created[:-1]).update(is_active=False)
+        return created
+
+    @staticmethod
+    def at(value: str) -> datetime:
+        return timezone.make_aware(datetime.fromisoformat(value))
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def history(self, **params):
+        return self.client.get(reverse("price-history-v1"), params)
+
+    def history_ids(self, **params) -> set:
+        response = self.history(page_size=200, **params)
+        self.assertEqual(response.status_code, 200)
+        return {uuid.UUID(price["id"]) for price in response.json()["results"]}
+
+    def test_filters(self):
+        """Prices are filtered by product, category and creation time, superseded ones included."""
+        self.assertEqual(self.history_ids(product="tea"), set(self.tea_prices))
+        self.assertEqual(
+            self.history_ids(category="drinks"), {*self.tea_prices, *self.coffee_prices}
+        )
+        self.assertEqual(
+            self.history_ids(start=self.at("2026-01-06 00:00"), end=self.at("2026-01-20 09:00")),
+            {self.tea_prices[2], self.coffee_prices[0], self.cake_prices[0]},
+        )
+        self.assertEqual(
+            self.history_ids(product="tea", include_inactive="false"), {self.tea_prices[-1]}
+        )
+        self.assertEqual(len(self.history_ids()), 7)
+
+    def test_invalid_filters(self):
+        """A range ending before it starts, or unbounded buckets, are rejected."""
+        response = self.history(start=self.at("2026-02-01 00:00"), end=self.at("2026-01-01 00:00"))
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("end", response.json())
+
+        response = self.history(bucket="day")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("bucket", response.json())
+
+    def test_buckets(self):
+        """Each bucket holds the first, last, min and max amount and the price count."""
+        expected = {
+            "day": [
+                ("2026-01-05", "10.00", "12.00", "10.00", "12.00", 2),
+                ("2026-01-06", "11.00", "11.00", "11.00", "11.00", 1),
+                ("2026-01-20", "9.00", "9.00", "9.00", "9.00", 1),
+                ("2026-02-10", "15.00", "15.00", "15.00", "15.00", 1),
+            ],
+            "week": [
+                ("2026-01-05", "10.00", "11.00", "10.00", "12.00", 3),
+                ("2026-01-19", "9.00", "9.00", "9.00", "9.00", 1),
+                ("2026-02-09", "15.00", "15.00", "15.00", "15.00", 1),
+            ],
+            "month": [
+                ("2026-01-01", "10.00", "9.00", "9.00", "12.00", 4),
+                ("2026-02-01", "15.00", "15.00", "15.00", "15.00", 1),
+            ],
+        }
+        for bucket, rows in expected.items():
+            with self.subTest(bucket=bucket):
+                response = self.history(product="tea", bucket=bucket)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(
+                    [
+                        (
+                            row["bucket"][:10],
+                            row["first"],
+                            row["last"],
+                            row["min"],
+                            row["max"],
+                            row["count"],
+                        )
+                        for row in response.json()
+                    ],
+                    rows,
+                )
+                self.assertEqual(
+                    {row["product"] for row in response.json()}, {str(self.tea.pk)}
+                )
+
+    def test_category_buckets(self):
+        """Buckets of a category hold one row per product and bucket."""
+        response = self.history(category="drinks", bucket="month")
+        self.assertEqual(
+            sorted((row["product"], row["bucket"][:10]) for row in response.json()),
+            sorted(
+                [
+                    (str(self.tea.pk), "2026-01-01"),
+                    (str(self.tea.pk), "2026-02-01"),
+                    (str(self.coffee.pk), "2026-01-01"),
+                ]
+            ),
+        )
+
+
+class CatalogImportExportTests(TestCase):
+    """Tests of the streamed catalog import and export commands."""
+
+    @classmethod
+    def setUpTestData(cls):
+        drinks = Category.objects.create(
+            name="Drinks", slug="drinks", icon="category_icons/drinks.png"
+        )
+        Category.objects.create(name="Food", slug="food", is_active=False)
+        for slug, amount in (("tea", "10.00"), ("coffee", "23.40")):
+            product = Product.objects.create(category=drinks, name=slug.title(), slug=slug)
+            Price.objects.create(product=product, amount=Decimal(amount))
+        Product.objects.create(category=drinks, name="Water", slug="water")
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.directory = directory
+        patcher = mock.patch("menu.menu_version.bump_menu_version")
+        self.bump_menu_version = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def path(self, name: str) -> str:
+        return f"{self.directory}/{name}"
+
+    def write(self, name: str, content: str) -> str:
+        with open(self.path(name), "w", encoding="utf-8") as file:
+            file.write(content)
+        return self.path(name)
+
+    def read(self, name: str) -> str:
+        with open(self.path(name), encoding="utf-8") as file:
+            return file.read()
+
+    def call(self, command: str, *args) -> str:
+        stdout = io.StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command(command, *args, stdout=stdout, stderr=io.StringIO())
+        return stdout.getvalue()
+
+    def test_round_trip(self):
+        """A catalog exported then imported into an empty menu is the same catalog."""
+        for catalog_format in ("csv", "jsonl"):
+            with self.subTest(format=catalog_format):
+                names = {
+                    model: f"{model}.{catalog_format}" for model in ("category", "product", "price")
+                }
+                for model, name in names.items():
+                    self.call("export_menu", model, self.path(name))
+                current_prices = dict(Product.objects.values_list("slug", "current_price"))
+
+                Category.objects.all().delete()
+                for model, name in names.items():
+                    self.call("import_menu", model, self.path(name))
+
+                self.assertEqual(
+                    dict(Product.objects.values_list("slug", "current_price")), current_prices
+                )
+                for model in ("category", "product"):
+                    self.call("export_menu", model, self.path(f"again-{names[model]}"))
+                    self.assertEqual(self.read(f"again-{names[model]}"), self.read(names[model]))
+
+    def test_upsert_by_slug(self):
+        """Rows update the categories and products with their slug, or create them."""
+        path = self.write(
+            "category.csv",
+            "slug,name,is_active\ndrinks,Hot Drinks,true\ncake,Cakes,false\ncake,Cake,true\n",
+        )
+        output = self.call("import_menu", "category", path)
+        self.assertIn("Successfully imported 2 category rows", output)
+
+        drinks = Category.objects.get(slug="drinks")
+        self.assertEqual(drinks.name, "Hot Drinks")
+        # Rows without an icon keep the icon of the category
+        self.assertEqual(drinks.icon.name, "category_icons/drinks.png")
+        self.assertEqual(Category.objects.get(slug="cake").name, "Cake")
+        self.assertEqual(Category.objects.count(), 3)
+
+        path = self.write(
+            "product.jsonl",
+            '{"slug": "tea", "name": "Green Tea", "category": "cake"}\n'
+            '{"slug": "cookie", "name": "Cookie", "category": "cake", "is_active": false}\n',
+        )
+        self.call("import_menu", "product", path)
+        tea = Product.objects.get(slug="tea")
+        self.assertEqual((tea.name, tea.category.slug), ("Green Tea", "cake"))
+        self.assertFalse(Product.objects.get(slug="cookie").is_active)
+        # The prices of an upserted product are kept
+        self.assertEqual(tea.current_price, Decimal("10.00"))
+
+    def test_prices(self):
+        """Only the last row of a product is added, unchanged or out of range amounts are not."""
+        path = self.write(
+            "price.csv",
+            "product,amount\ntea,11\ncoffee,23.40\ntea,12.5\nwater,5\n",
+        )
+        output = self.call("import_menu", "price", path, "--batch-size=2")
+        # The second tea row replaces the first one across batches
+        self.assertIn("Successfully imported 3 price rows", output)
+        self.assertEqual(
+            dict(Product.objects.values_list("slug", "current_price")),
+            {"tea": Decimal("12.50"), "coffee": Decimal("23.40"), "water": Decimal("5.00")},
+        )
+        self.assertEqual(Price.objects.filter(product__slug="tea").count(), 2)
+
+        for amount in ("-1", "100000000", "NaN", "abc"):
+            with self.subTest(amount=amount):
+                path = self.write("price.csv", f"product,amount\ntea,{amount}\n")
+                with self.assertRaisesMessage(CommandError, "Line 2"):
+                    self.call("import_menu", "price", path)
+        self.assertEqual(Price.objects.filter(product__slug="tea").count(), 2)
+
+    def test_prices_within_batch(self):
+        """The rows of a product in one batch add a single price."""
+        rows = [(2, {"product": "tea", "amount": "11"}), (3, {"product": "tea", "amount": "12"})]
+        self.assertEqual(import_prices(rows), 1)
+        self.assertEqual(Product.objects.get(slug="tea").current_price, Decimal("12.00"))
+
+    def test_unknown_references(self):
+        """Rows of an unknown category or product are rejected with their line."""
+        path = self.write("product.csv", "slug,name,category\nbread,Bread,bakery\n")
+        with self.assertRaisesMessage(CommandError, "Line 2: Unknown category 'bakery'."):
+            self.call("import_menu", "product", path)
+
+        path = self.write(
+            "price.jsonl",
+            '{"product": "tea", "amount": "1"}\n\n{"product": "bread", "amount": "1"}\n',
+        )
+        with self.assertRaisesMessage(CommandError, "Line 3: Unknown product 'bread'."):
+            self.call("import_menu", "price", path)
+        self.assertFalse(Product.objects.filter(slug="bread").exists())
+
+    def test_non_object_rows(self):
+        """A JSONL line that is not an object is rejected with its line."""
+        for text in ("[]", '"tea"', "1"):
+            with self.subTest(text=text):
+                lines = read_catalog(io.StringIO(f'{{"slug": "tea"}}\n{text}\n'), "jsonl")
+                self.assertEqual(next(lines), (1, {"slug": "tea"}))
+                with self.assertRaisesMessage(CatalogError, "Line 2: A row must be a JSON object."):
+                    next(lines)
+
+    def test_single_invalidation(self):
+        """The menu is invalidated once per import, not once per batch."""
+        path = self.write(
+            "product.csv",
+            "slug,name,category\n" + "".join(f"p{i},Product {i},drinks\n" for i in range(5)),
+        )
+        self.call("import_menu", "product", path, "--batch-size=2")
+        self.assertEqual(Product.objects.filter(slug__startswith="p").count(), 5)
+        self.bump_menu_version.assert_called_once()
+
+
+class CompiledSerializerTests(TestCase):
+    """
+    Tests that the compiled serializers render the same bytes as the DRF
+    serializers they are compiled from.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        drinks = Category.objects.create(
+            name="Drinks",
+            slug="drinks",
+            icon="category_icons/drinks.png",
+            icon_variants={
+                "webp": {"128": "category_icons/v/drinks-128.webp", "64": "category_icons/v/drinks-64.webp"}
+            },
+        )
+        food = Category.objects.create(name="خوراک", slug="food")  # No icon
+        Category.objects.create(name="Hidden", slug="hidden", is_active=False)
+
+        tea = Product.objects.create(category=drinks, name="Tea", slug="tea")
+        Price.objects.create(product=tea, amount=Decimal("10.5"), is_active=False)
+        Price.objects.create(product=tea, amount=Decimal("12.25"))
+        Product.objects.create(category=drinks, name="Water", slug="water")  # No price
+        Product.objects.create(category=food, name="Cake", slug="cake", is_active=False)
+
+    def setUp(self):
+        self.context = {"request": SnapshotRequest("http://testserver/")}
+
+    def assertSameBytes(self, drf_data, compiled_data):
+        renderer = JSONRenderer()
+        self.assertEqual(renderer.render(compiled_data), renderer.render(drf_data))
+
+    def test_menu(self):
+        """The menu and a category detail, with their active products."""
+        categories = Category.objects.filter(is_active=True).prefetch_related(
+            Prefetch("products", queryset=Product.objects.filter(is_active=True))
+        )
+        menu = serialize_menu(Category.objects.filter(is_active=True), self.context)
+        self.assertSameBytes(
+            MenuDetailSerializer(categories, many=True, context=self.context).data, menu
+        )
+
+        for category in categories:
+            with self.subTest(category=category.slug):
+                detail = serialize_menu(
+                    Category.objects.filter(is_active=True, slug=category.slug), self.context
+                )
+                self.assertSameBytes(
+                    MenuDetailSerializer(category, context=self.context).data, detail[0]
+                )
+
+    def test_products(self):
+        """The product list, products without a price included."""
+        self.assertSameBytes(
+            ProductSerializer(Product.objects.all(), many=True, context=self.context).data,
+            compiled_product_serializer.serialize(
+                Product.objects.values(*compiled_product_serializer.columns), self.context
+            ),
+        )
+
+    def test_prices(self):
+        """The price list, inactive prices included."""
+        self.assertSameBytes(
+            PriceSerializer(Price.objects.all(), many=True, context=self.context).data,
+            compiled_price_serializer.serialize(
+                Price.objects.values(*compiled_price_serializer.columns), self.context
+            ),
+        )
+
+
+class StreamedListTests(TestCase):
+    """Tests that a streamed list holds the same items as the paginated one."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            username="admin", password="pass12345", is_staff=True
+        )
+        drinks = Category.objects.create(name="Drinks", slug="drinks")
+        for index in range(7):
+            product = Product.objects.create(
+                category=drinks, name=f"Product {index}", slug=f"product-{index}"
+            )
+            Price.objects.create(product=product, amount=Decimal(index + 1))
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+        # Several chunks with a partial last one
+        for view in (PriceListView, ProductListCreateView):
+            patcher = mock.patch.object(view, "stream_chunk_size", 3)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def assertStreamMatchesList(self, url_name):
+        listed = self.client.get(reverse(url_name), {"page_size": 200})
+        self.assertEqual(listed.status_code, 200)
+
+        streamed = self.client.get(reverse(url_name), {"stream": "true"})
+        self.assertEqual(streamed.status_code, 200)
+        self.assertIsInstance(streamed, StreamingHttpResponse)
+        self.assertEqual(streamed["Content-Type"], "application/json")
+        body = json.loads(b"".join(streamed.streaming_content))
+        self.assertEqual(body, listed.json()["results"])
+        return body
+
+    def test_prices(self):
+        self.assertEqual(len(self.assertStreamMatchesList("price-list-v1")), 7)
+
+    def test_products(self):
+        self.assertEqual(len(self.assertStreamMatchesList("product-list-v1")), 7)
+
+    def test_empty(self):
+        Price.objects.all().delete()
+        self.assertEqual(self.assertStreamMatchesList("price-list-v1"), [])
+
+        rows = Product.objects.none().values(*compiled_product_serializer.columns)
+        self.assertEqual(b"".join(stream_json_list(rows, compiled_product_serializer)), b"[]")
+
+    def test_not_streamed_without_parameter(self):
+        response = self.client.get(reverse("price-list-v1"), {"stream": "false"})
+        self.assertNotIsInstance(response, StreamingHttpResponse)
+        self.assertIn("results", response.json())
+
+
+class MenuCompressionTests(TestCase):
+    """Tests of the content encoding negotiation of the menu endpoints."""
+
+    @classmethod
+    def setUpTestData(cls):
+        drinks = Category.objects.create(name="Drinks", slug="drinks")
+        for index in range(20):
+            product = Product.objects.create(
+                category=drinks, name=f"Product {index}", slug=f"product-{index}"
+            )
+            Price.objects.create(product=product, amount=Decimal(index + 1))
+
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+
+    def test_accepted_encoding(self):
+        """Without brotli installed, gzip is the only encoding there is."""
+        with mock.patch.dict(COMPRESSORS, {"gzip": gzip_compress}, clear=True):
+            self.assertEqual(get_accepted_encoding("gzip, deflate"), "gzip")
+            self.assertEqual(get_accepted_encoding("br, gzip"), "gzip")
+            self.assertEqual(get_accepted_encoding("GZIP; q=0.5"), "gzip")
+            self.assertEqual(get_accepted_encoding("*"), "gzip")
+            self.assertIsNone(get_accepted_encoding("br"))
+            self.assertIsNone(get_accepted_encoding("identity"))
+            self.assertIsNone(get_accepted_encoding("gzip;q=0"))
+            self.assertIsNone(get_accepted_encoding("gzip;q=0, *"))
+            self.assertIsNone(get_accepted_encoding("gzip;q=oops"))
+            self.assertIsNone(get_accepted_encoding(""))
+
+    def test_accepted_encoding_preference(self):
+        """Brotli is preferred on a tie, the client quality wins otherwise."""
+        compressors = {"br": mock.Mock(), "gzip": gzip_compress}
+        with mock.patch.dict(COMPRESSORS, compressors, clear=True):
+            self.assertEqual(get_accepted_encoding("gzip, br"), "br")
+            self.assertEqual(get_accepted_encoding("*"), "br")
+            self.assertEqual(get_accepted_encoding("br;q=0.5, gzip"), "gzip")
+            self.assertEqual(get_accepted_encoding("br;q=0, *"), "gzip")
+            self.assertEqual(get_accepted_encoding("br, identity"), "br")
+
+    def test_headers(self):
+        """Each variant varies on Accept-Encoding and has its own ETag."""
+        url = reverse("menu-list-v1")
+        plain = self.client.get(url)
+        compressed = self.client.get(url, HTTP_ACCEPT_ENCODING="gzip")
+        version = get_menu_version()
+
+        self.assertEqual(plain["ETag"], f'"{version}"')
+        self.assertNotIn("Content-Encoding", plain)
+        self.assertEqual(compressed["ETag"], f'"{version}-gzip"')
+        self.assertEqual(compressed["Content-Encoding"], "gzip")
+        for response in (plain, compressed):
+            self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertEqual(gzip.decompress(compressed.content), plain.content)
+
+        # A validator of one variant does not match the other
+        response = self.client.get(
+            url, HTTP_ACCEPT_ENCODING="gzip", HTTP_IF_NONE_MATCH=plain["ETag"]
+        )
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(
+            url, HTTP_ACCEPT_ENCODING="gzip", HTTP_IF_NONE_MATCH=compressed["ETag"]
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_compressed_once_per_version(self):
+        """The compressed bytes are cached, a second request does not recompress."""
+        compress = mock.Mock(wraps=gzip_compress)
+        url = reverse("menu-detail", kwargs={"slug": "drinks"})
+        with mock.patch.dict(COMPRESSORS, {"gzip": compress}, clear=True):
+            first = self.client.get(url, HTTP_ACCEPT_ENCODING="gzip")
+            # Served from the shared cache as well as from the local one
+            local_cache.clear()
+            second = self.client.get(url, HTTP_ACCEPT_ENCODING="gzip")
+            third = self.client.get(url, HTTP_ACCEPT_ENCODING="gzip")
+            compress.assert_called_once()
+
+            # A new menu version is compressed again
+            with mock.patch("menu.signals.schedule_menu_rebuild"):
+                with self.captureOnCommitCallbacks(execute=True):
+                    invalidate_menu()
+            self.client.get(url, HTTP_ACCEPT_ENCODING="gzip")
+            self.assertEqual(compress.call_count, 2)
+
+        self.assertEqual(first.content, second.content)
+        self.assertEqual(first.content, third.content)
+
+
+class StaticMenuExportTests(TestCase):
+    """Tests of the static menu export and the cleanup of its stale files."""
+
+    @classmethod
+    def setUpTestData(cls):
+        drinks = Category.objects.create(name="Drinks", slug="drinks")
+        Category.objects.create(name="Food", slug="food")
+        Category.objects.create(name="Hidden", slug="hidden", is_active=False)
+        tea = Product.objects.create(category=drinks, name="Tea", slug="tea")
+        Price.objects.create(product=tea, amount=Decimal("10.00"))
+
+    def setUp(self):
+        cache.clear()
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.directory = directory
+
+        # brotli is optional, stand in for it so both siblings are written
+        compressors = {"br": lambda content: b"br" + content, "gzip": gzip_compress}
+        patcher = mock.patch.dict(COMPRESSORS, compressors, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def export(self) -> dict:
+        call_command(
+            "export_static_menu",
+            "--base-url=http://testserver",
+            f"--output-dir={self.directory}",
+            stdout=io.StringIO(),
+        )
+        with open(os.path.join(self.directory, MENU_EXPORT_MANIFEST), "rb") as f:
+            return json.load(f)
+
+    def read(self, filename: str) -> bytes:
+        with open(os.path.join(self.directory, filename), "rb") as f:
+            return f.read()
+
+    def exported_files(self, manifest: dict) -> set:
+        """Return the files of a manifest with their precompressed siblings."""
+        names = {manifest["list"], *manifest["detail"].values()}
+        return {f"{name}{extension}" for name in names for extension in ("", ".gz", ".br")}
+
+    def test_export(self):
+        """Each payload is written under a hashed name listed in the manifest."""
+        manifest = self.export()
+
+        self.assertEqual(manifest["version"], get_menu_version())
+        self.assertEqual(manifest["encodings"], ["br", "gzip"])
+        self.assertEqual(set(manifest["detail"]), {"drinks", "food"})
+        self.assertRegex(manifest["list"], r"^menu-list\.[0-9a-f]{12}\.json$")
+        self.assertRegex(manifest["detail"]["drinks"], r"^menu-detail-drinks\.[0-9a-f]{12}\.json$")
+        self.assertEqual(
+            set(os.listdir(self.directory)),
+            self.exported_files(manifest) | {MENU_EXPORT_MANIFEST},
+        )
+
+        content = self.read(manifest["list"])
+        self.assertEqual(content, get_menu_list(SnapshotRequest("http://testserver")))
+        self.assertEqual(gzip.decompress(self.read(manifest["list"] + ".gz")), content)
+        self.assertEqual(self.read(manifest["list"] + ".br"), b"br" + content)
+        self.assertEqual(
+            json.loads(self.read(manifest["detail"]["drinks"]))["products"][0]["slug"], "tea"
+        )
+
+    def test_unchanged_export(self):
+        """Exporting an unchanged menu writes the same files."""
+        self.assertEqual(self.export(), self.export())
+
+    def test_stale_files_removed(self):
+        """Files of the export before the previous one are removed."""
+        unrelated = os.path.join(self.directory, "robots.txt")
+        with open(unrelated, "wb") as f:
+            f.write(b"")
+
+        first = self.export()
+        Product.objects.filter(slug="tea").update(name="Green tea")
+        second = self.export()
+        self.assertNotEqual(first["list"], second["list"])
+        # The category without a change keeps its file
+        self.assertEqual(first["detail"]["food"], second["detail"]["food"])
+        # Clients holding the previous manifest can still fetch its files
+        self.assertTrue(self.exported_files(first) <= set(os.listdir(self.directory)))
+
+        Product.objects.filter(slug="tea").update(name="Black tea")
+        third = self.export()
+        self.assertEqual(
+            set(os.listdir(self.directory)),
+            self.exported_files(second)
+            | self.exported_files(third)
+            | {MENU_EXPORT_MANIFEST, "robots.txt"},
+        )
+        self.assertFalse(os.path.exists(os.path.join(self.directory, first["list"])))
+
+
+def make_image(size: tuple, image_format: str = "PNG") -> bytes:
+    """Return the bytes of a solid image of the given size and format."""
+    image = io.BytesIO()
+    Image.new("RGB", size, "red").save(image, image_format)
+    return image.getvalue()
+
+
+class CategoryIconProcessingTests(TestCase):
+    """
+    Tests of the background processing of category icons, scheduled only
+    when the icon changes and skipped once the icon has been replaced.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        media_root = tempfile.mkdtemp()
+        cls.addClassCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        cls.enterClassContext(override_settings(MEDIA_ROOT=media_root))
+        super().setUpClass()
+
+    def setUp(self):
+        patcher = mock.patch("menu.signals.schedule_icon_processing")
+        self.schedule_icon_processing = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def create_category(self, icon: bytes, name: str = "icon.png") -> Category:
+        with self.captureOnCommitCallbacks(execute=True):
+            category = Category.objects.create(
+                name="Drinks", slug="drinks", icon=SimpleUploadedFile(name, icon)
+            )
+        self.schedule_icon_processing.reset_mock()
+        return category
+
+    def test_unchanged_icon_not_processed(self):
+        """Saving a category without touching its icon schedules nothing."""
+        category = self.create_category(make_image((32, 32)))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            category.name = "Cold drinks"
+            category.save()
+            loaded = Category.objects.get(pk=category.pk)
+            loaded.is_active = False
+            loaded.save()
+            loaded.save(update_fields=["name"])
+
+        self.assertFalse(loaded.icon_changed)
+        self.schedule_icon_processing.assert_not_called()
+
+    def test_changed_icon_processed(self):
+        """A new icon is scheduled once the save is committed."""
+        category = self.create_category(make_image((32, 32)))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            category.icon = SimpleUploadedFile("new.png", make_image((16, 16)))
+            self.assertTrue(category.icon_changed)
+            category.save()
+            self.schedule_icon_processing.assert_not_called()
+
+        self.schedule_icon_processing.assert_called_once_with(category.pk, category.icon.name)
+        self.assertFalse(category.icon_changed)
+
+    def test_large_icon_resized(self):
+        """An icon larger than the maximum is shrunk in place, keeping its format and ratio."""
+        for image_format, name in (("PNG", "icon.png"), ("JPEG", "icon.jpg")):
+            with self.subTest(image_format):
+                category = self.create_category(make_image((1024, 768), image_format), name)
+
+                self.assertTrue(process_category_icon(category.pk, category.icon.name))
+                with Image.open(category.icon.path) as image:
+                    self.assertEqual(image.format, image_format)
+                    self.assertEqual(image.size, (ICON_MAX_DIMENSION, 384))
+                category.delete()
+
+    def test_small_icon_kept(self):
+        """An icon within the maximum is left as uploaded."""
+        icon = make_image((100, 50))
+        category = self.create_category(icon)
+
+        process_category_icon(category.pk, category.icon.name)
+        with category.icon.open("rb") as file:
+            self.assertEqual(file.read(), icon)
+
+    def test_stale_job_skipped(self):
+        """A job for an icon replaced in the meantime stores nothing."""
+        category = self.create_category(make_image((32, 32)))
+        stale = category.icon.name
+        category.icon = SimpleUploadedFile("new.png", make_image((16, 16)))
+        category.save()
+
+        self.assertFalse(process_category_icon(category.pk, stale))
+        category.refresh_from_db()
+        self.assertEqual(category.icon_variants, {})
+        self.assertNotEqual(category.icon.name, stale)
+
+        # A deleted category is skipped the same way
+        name = category.icon.name
+        Category.objects.filter(pk=category.pk).delete()
+        self.assertFalse(process_category_icon(category.pk, name))
+
+
+class CategoryIconVariantTests(TestCase):
+    """Tests of the icon size variants and of their `iconVariants` URLs."""
+
+    @classmethod
+    def setUpClass(cls):
+        media_root = tempfile.mkdtemp()
+        cls.addClassCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        cls.enterClassContext(override_settings(MEDIA_ROOT=media_root))
+        super().setUpClass()
+
+    def setUp(self):
+        cache.clear()
+        patcher = mock.patch("menu.signals.schedule_icon_processing")
+        self.schedule_icon_processing = patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch("menu.signals.schedule_menu_rebuild")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.category = Category.objects.create(
+            name="Drinks",
+            slug="drinks",
+            icon=SimpleUploadedFile("icon.png", make_image((300, 200))),
+        )
+        self.storage = self.category.icon.storage
+
+    def variant_files(self) -> set:
+        """Return the storage names of the variant files of the category."""
+        directory = f"category_icons/{self.category.pk}/variants"
+        try:
+            return {f"{directory}/{name}" for name in self.storage.listdir(directory)[1]}
+        except FileNotFoundError:
+            return set()
+
+    def test_variants(self):
+        """Every size no larger than the icon, in WebP and the icon format."""
+        variants = build_icon_variants(self.storage, self.category.icon.name)
+
+        self.assertEqual(list(variants), ["webp", "png"])
+        for key, widths in variants.items():
+            # 512 is larger than the icon, which is included as is instead
+            self.assertEqual(list(widths), ["64", "128", "256", "300"])
+            for width, name in widths.items():
+                with self.subTest(key=key, width=width):
+                    with self.storage.open(name) as file:
+                        content = file.read()
+                    with Image.open(io.BytesIO(content)) as image:
+                        self.assertEqual(image.format, key.upper())
+                        self.assertEqual(image.width, int(width))
+
+                    # Named after their content hash
+                    content_hash = hashlib.md5(content).hexdigest()[:12]
+                    self.assertEqual(
+                        name,
+                        f"category_icons/{self.category.pk}/variants/icon-{width}.{content_hash}.{key}",
+                    )
+
+        # Building them again writes no new file
+        files = self.variant_files()
+        self.assertEqual(build_icon_variants(self.storage, self.category.icon.name), variants)
+        self.assertEqual(self.variant_files(), files)
+
+    def test_jpeg_variants(self):
+        """A JPEG icon gets JPEG variants next to the WebP ones."""
+        self.category.icon = SimpleUploadedFile("photo.jpg", make_image((100, 100), "JPEG"))
+        self.category.save()
+
+        variants = build_icon_variants(self.storage, self.category.icon.name)
+        self.assertEqual(list(variants), ["webp", "jpeg"])
+        self.assertEqual(list(variants["jpeg"]), ["64", "100"])
+
+    def test_menu_payloads(self):
+        """The variant URLs are listed by the menu list and detail payloads."""
+        response = self.client.get(reverse("menu-list-v1"))
+        self.assertEqual(response.json()[0]["iconVariants"], {})
+
+        process_category_icon(self.category.pk, self.category.icon.name)
+        self.category.refresh_from_db()
+        cache.clear()
+
+        expected = {
+            key: {
+                width: f"http://testserver{self.storage.url(name)}"
+                for width, name in widths.items()
+            }
+            for key, widths in self.category.icon_variants.items()
+        }
+        self.assertEqual(list(expected["webp"]), ["64", "128", "256", "300"])
+        response = self.client.get(reverse("menu-list-v1"))
+        self.assertEqual(response.json()[0]["iconVariants"], expected)
+        response = self.client.get(reverse("menu-detail", kwargs={"slug": "drinks"}))
+        self.assertEqual(response.json()["iconVariants"], expected)
+
+    def test_variants_kept_by_regular_saves(self):
+        """Saves loaded before the variants were stored do not drop them."""
+        loaded = Category.objects.get(pk=self.category.pk)
+        deferred = Category.objects.only("name").get(pk=self.category.pk)
+        process_category_icon(self.category.pk, self.category.icon.name)
+
+        loaded.name = "Cold drinks"
+        loaded.save()
+        deferred.name = "Hot drinks"
+        deferred.save()
+
+        self.category.refresh_from_db()
+        self.assertEqual(self.category.name, "Hot drinks")
+        self.assertNotEqual(self.category.icon_variants, {})
+
+    def test_variants_deleted_on_icon_change(self):
+        """The variants of a replaced icon are deleted with the new ones built."""
+        process_category_icon(self.category.pk, self.category.icon.name)
+        old_files = self.variant_files()
+
+        self.category.icon = SimpleUploadedFile("new.png", make_image((80, 80), "PNG"))
+        self.category.save()
+        self.category.refresh_from_db()
+        self.assertEqual(self.category.icon_variants, {})
+
+        process_category_icon(self.category.pk, self.category.icon.name)
+        self.category.refresh_from_db()
+        new_files = {
+            name for widths in self.category.icon_variants.values() for name in widths.values()
+        }
+        self.assertEqual(self.variant_files(), new_files)
+        self.assertFalse(old_files & new_files)
+
+    def test_variants_deleted_with_category(self):
+        """Deleting a category deletes its variants once committed."""
+        process_category_icon(self.category.pk, self.category.icon.name)
+        self.assertTrue(self.variant_files())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Category.objects.get(pk=self.category.pk).delete()
+            self.assertTrue(self.variant_files())
+
+        self.assertEqual(self.variant_files(), set())
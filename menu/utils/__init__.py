@@ -0,0 +1,19 @@
+from .snapshot_utils import (
+    get_menu_list,
+    get_menu_detail,
+    get_menu_slugs,
+    aget_menu_list,
+    aget_menu_detail,
+    aget_menu_slugs,
+    build_menu_snapshot,
+    rebuild_menu_snapshots,
+    schedule_menu_rebuild,
+)
+from .export_utils import export_menu_files, schedule_menu_export
+from .search_utils import search_index
+from .icon_utils import (
+    resize_icon_file,
+    delete_icon_variants,
+    process_category_icon,
+    schedule_icon_processing,
+)
@@ -0,0 +1,292 @@
+import csv
+import json
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+
+from menu.models import Category, Product, Price
+from menu.menu_version import defer_menu_invalidation
+from menu.api.v1.serializers.price_serializer import MAX_PRICE_AMOUNT
+from .icon_utils import process_category_icon
+
+
+# Columns of each catalog model, in file order. Prices are keyed on their
+# product slug, `created_at` is exported for reference only.
+CATALOG_FIELDS = {
+    "category": ["slug", "name", "icon", "is_active"],
+    "product": ["slug", "name", "category", "is_active"],
+    "price": ["product", "amount", "is_active", "created_at"],
+}
+
+CATALOG_FORMATS = ("csv", "jsonl")
+
+
+class CatalogError(ValueError):
+    """Raised for an invalid catalog row, with its line number."""
+
+    def __init__(self, line: int, message: str):
+        super().__init__(f"Line {line}: {message}")
+
+
+def get_catalog_format(path: str, catalog_format: str = None) -> str:
+    """Return the given format, or the one of the file extension, CSV by default."""
+    if catalog_format:
+        return catalog_format
+    return "jsonl" if path.endswith((".jsonl", ".ndjson")) else "csv"
+
+
+def batched(iterable, size: int):
+    """Yield lists of up to `size` items of the iterable."""
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def read_catalog(file, catalog_format: str):
+    """
+    Yield ``(line, row)`` tuples of a CSV or JSONL catalog file, one row at
+    a time.
+    """
+    if catalog_format == "csv":
+        reader = csv.DictReader(file)
+        for row in reader:
+            yield reader.line_num, row
+        return
+
+    for line, text in enumerate(file, start=1):
+        if text.strip():
+            try:
+                row = json.loads(text)
+            except ValueError as e:
+                raise CatalogError(line, f"Invalid JSON ({e}).")
+            if not isinstance(row, dict):
+                raise CatalogError(line, "A row must be a JSON object.")
+            yield line, row
+
+
+def write_catalog(file, catalog_format: str, fields: list, rows) -> int:
+    """
+    Write the rows as CSV or JSONL, one row at a time.
+
+    Returns:
+        int: The number of written rows.
+    """
+    count = 0
+    if catalog_format == "csv":
+        writer = csv.DictWriter(file, fieldnames=fields)
+        writer.writeheader()
+        for count, row in enumerate(rows, start=1):
+            writer.writerow(row)
+        return count
+
+    for count, row in enumerate(rows, start=1):
+        file.write(json.dumps(row, ensure_ascii=False, default=str))
+        file.write("\n")
+    return count
+
+
+def export_catalog(model: str, chunk_size: int = 2000):
+    """Yield the export rows of a catalog model, `chunk_size` rows fetched at a time."""
+    if model == "category":
+        rows = Category.objects.order_by("slug").values_list(
+            "slug", "name", "icon", "is_active"
+        )
+    elif model == "product":
+        rows = Product.objects.order_by("slug").values_list(
+            "slug", "name", "category__slug", "is_active"
+        )
+    else:
+        rows = Price.objects.order_by("product__slug", "created_at").values_list(
+            "product__slug", "amount", "is_active", "created_at"
+        )
+
+    for values in rows.iterator(chunk_size=chunk_size):
+        row = dict(zip(CATALOG_FIELDS[model], values))
+        if model == "price":
+            row["amount"] = str(row["amount"])
+            row["created_at"] = row["created_at"].isoformat()
+        yield row
+
+
+def parse_bool(value, default: bool = True) -> bool:
+    """Parse a boolean cell, JSON booleans or ``true``/``false``/``1``/``0``."""
+    if value is None or value == "":
+        return default
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ("1", "true", "yes")
+
+
+def get_required(line: int, row: dict, field: str) -> str:
+    """Return a required cell of a row."""
+    value = row.get(field)
+    if value is None or str(value).strip() == "":
+        raise CatalogError(line, f"'{field}' is required.")
+    return str(value).strip()
+
+
+def import_categories(batch: list) -> int:
+    """
+    Upsert a batch of category rows keyed on slug.
+
+    The icon of an existing category is only replaced by a row with an
+    icon, a row without one keeps it.
+
+    Returns:
+        int: The number of upserted categories.
+    """
+    categories = {}
+    for line, row in batch:
+        slug = get_required(line, row, "slug")
+        category = Category(
+            slug=slug,
+            name=get_required(line, row, "name"),
+            icon=row.get("icon") or "",
+            is_active=parse_bool(row.get("is_active")),
+        )
+        try:
+            category.clean_fields(exclude=["id", "icon"])
+        except ValidationError as e:
+            raise CatalogError(line, str(e.message_dict))
+        categories[slug] = category  # The last row of a slug wins
+
+    update_fields = ["name", "is_active", "updated_at"]
+    with_icon = [category for category in categories.values() if category.icon]
+    without_icon = [category for category in categories.values() if not category.icon]
+    # Reset the variants, generated again by `resize_imported_icons`
+    for group, fields in (
+        (with_icon, [*update_fields, "icon", "icon_variants"]),
+        (without_icon, update_fields),
+    ):
+        if group:
+            Category.objects.bulk_create(
+                group, update_conflicts=True, unique_fields=["slug"], update_fields=fields
+            )
+    return len(categories)
+
+
+def import_products(batch: list) -> int:
+    """
+    Upsert a batch of product rows keyed on slug.
+
+    Returns:
+        int: The number of upserted products.
+    """
+    category_ids = dict(
+        Category.objects.filter(
+            slug__in={row.get("category") for _, row in batch}
+        ).values_list("slug", "id")
+    )
+
+    products = {}
+    for line, row in batch:
+        slug = get_required(line, row, "slug")
+        category = get_required(line, row, "category")
+        if category not in category_ids:
+            raise CatalogError(line, f"Unknown category '{category}'.")
+
+        product = Product(
+            slug=slug,
+            name=get_required(line, row, "name"),
+            category_id=category_ids[category],
+            is_active=parse_bool(row.get("is_active")),
+        )
+        try:
+            product.clean_fields(exclude=["id", "category", "current_price_source"])
+        except ValidationError as e:
+            raise CatalogError(line, str(e.message_dict))
+        products[slug] = product
+
+    Product.objects.bulk_create(
+        products.values(),
+        update_conflicts=True,
+        unique_fields=["slug"],
+        update_fields=["name", "category", "is_active", "updated_at"],
+    )
+    return len(products)
+
+
+def parse_amount(line: int, row: dict) -> Decimal:
+    """Return the amount of a price row, in the range `Price.amount` holds."""
+    value = get_required(line, row, "amount")
+    try:
+        amount = Decimal(value).quantize(Decimal("0.01"))
+    except InvalidOperation:
+        raise CatalogError(line, f"Invalid amount '{value}'.")
+    if not amount.is_finite() or not 0 <= amount <= MAX_PRICE_AMOUNT:
+        raise CatalogError(line, f"Amount '{value}' is out of range.")
+    return amount
+
+
+def import_prices(batch: list, imported: dict = None) -> int:
+    """
+    Add a batch of price rows as the new prices of their products.
+
+    The creation time of the rows cannot be kept, so only the last row of
+    a product is added. A row whose amount is already the current price of
+    its product is skipped, so importing the same file twice adds no prices.
+
+    Args:
+        imported: Ids of the prices added by the previous batches of the
+            import, by product slug. A later row of a product replaces the
+            price added for it instead of adding another one.
+
+    Returns:
+        int: The number of added or replaced prices.
+    """
+    imported = {} if imported is None else imported
+    products = {
+        slug: (pk, current_price)
+        for slug, pk, current_price in Product.objects.filter(
+            slug__in={row.get("product") for _, row in batch}
+        ).values_list("slug", "pk", "current_price")
+    }
+
+    prices = {}
+    for line, row in batch:
+        slug = get_required(line, row, "product")
+        if slug not in products:
+            raise CatalogError(line, f"Unknown product '{slug}'.")
+        prices[slug] = (parse_amount(line, row), parse_bool(row.get("is_active")))
+
+    added, replaced = {}, 0
+    for slug, (amount, is_active) in prices.items():
+        product_id, current_price = products[slug]
+        if slug in imported:
+            # Also resyncs the current price of the product
+            Price.objects.filter(pk=imported[slug]).update(amount=amount, is_active=is_active)
+            replaced += 1
+        elif not (is_active and amount == current_price):
+            added[slug] = Price(product_id=product_id, amount=amount, is_active=is_active)
+
+    # Also resyncs the current price of the products
+    Price.objects.bulk_create(added.values())
+    imported.update((slug, price.pk) for slug, price in added.items())
+    return len(added) + replaced
+
+
+CATALOG_IMPORTERS = {
+    "category": import_categories,
+    "product": import_products,
+    "price": import_prices,
+}
+
+
+def resize_imported_icons(since) -> int:
+    """
+    Resize the icons of the categories imported since the given time and
+    build their variants, which `bulk_create` skipped as it sends no
+    `post_save` signal. Runs in the calling thread, icons whose file is
+    missing or unreadable are skipped.
+    """
+    count = 0
+    categories = Category.objects.filter(updated_at__gte=since).exclude(icon="")
+    with defer_menu_invalidation():
+        for category in categories.only("id", "icon").iterator():
+            try:
+                process_category_icon(category.pk, category.icon.name)
+            except OSError:
+                continue
+            count += 1
+    return count
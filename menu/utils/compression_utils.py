@@ -0,0 +1,58 @@
+import gzip
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, only gzip is used without it
+    brotli = None
+
+
+def gzip_compress(content: bytes) -> bytes:
+    """Gzip the content, without a timestamp so the output is reproducible."""
+    return gzip.compress(content, compresslevel=9, mtime=0)
+
+
+def brotli_compress(content: bytes) -> bytes:
+    """Compress the content with brotli at the highest quality."""
+    return brotli.compress(content, mode=brotli.MODE_TEXT, quality=11)
+
+
+# Available content encodings and their compressor, preferred first
+COMPRESSORS = {"gzip": gzip_compress}
+if brotli is not None:
+    COMPRESSORS = {"br": brotli_compress, **COMPRESSORS}
+
+# File extension of each content encoding, as expected by nginx
+# `gzip_static`/`brotli_static`
+ENCODING_EXTENSIONS = {"gzip": ".gz", "br": ".br"}
+
+
+def get_accepted_encoding(accept_encoding: str):
+    """
+    Pick the preferred available content encoding accepted by the client.
+
+    Args:
+        accept_encoding: The ``Accept-Encoding`` request header.
+
+    Returns:
+        str: A key of `COMPRESSORS`, or `None` to send the content as is.
+    """
+    qualities = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.partition(";")
+        coding = coding.strip().lower()
+        quality = 1.0
+        params = params.strip().replace(" ", "")
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if coding:
+            qualities[coding] = quality
+
+    best, best_quality = None, 0.0
+    for encoding in COMPRESSORS:  # Preferred first, so ties keep our preference
+        quality = qualities.get(encoding, qualities.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
@@ -0,0 +1,164 @@
+import os
+import json
+import hashlib
+import tempfile
+import threading
+from logging import getLogger
+
+from django.db import connections
+from django.conf import settings
+from django.core.cache import cache
+
+from menu.menu_version import get_menu_version
+from menu.menu_settings import MENU_EXPORT_DIR, MENU_EXPORT_DELAY, MENU_EXPORT_BASE_URL
+from .compression_utils import COMPRESSORS, ENCODING_EXTENSIONS
+from .snapshot_utils import SnapshotRequest, build_menu_snapshot
+
+
+logger = getLogger(__name__)
+
+MENU_EXPORT_MANIFEST = "manifest.json"
+# Menu version of the last static export, shared by every worker
+MENU_EXPORT_VERSION_KEY = "menu:export:version"
+# Held while a worker exports, so only one of them writes the files
+MENU_EXPORT_LOCK_KEY = "menu:export:lock"
+MENU_EXPORT_LOCK_TIMEOUT = 60 * 5
+
+_export_timer = None
+_export_timer_lock = threading.Lock()
+
+
+def get_export_dir() -> str:
+    """Return the directory the static menu is exported to."""
+    return MENU_EXPORT_DIR or os.path.join(settings.STATIC_ROOT, "menu")
+
+
+def write_file_atomic(path: str, content: bytes):
+    """Write a file through a temporary file so readers never see it half written."""
+    directory, name = os.path.split(path)
+    with tempfile.NamedTemporaryFile(dir=directory, prefix=f".{name}.", delete=False) as f:
+        f.write(content)
+    os.chmod(f.name, 0o644)  # Readable by the web server
+    os.replace(f.name, path)
+
+
+def write_hashed_file(directory: str, name: str, content: bytes) -> str:
+    """
+    Write the content and its precompressed siblings under a content-hashed
+    filename, skipping the files that already exist.
+
+    Returns:
+        str: The filename of the uncompressed file.
+    """
+    content_hash = hashlib.md5(content).hexdigest()[:12]
+    filename = f"{name}.{content_hash}.json"
+    path = os.path.join(directory, filename)
+
+    if not os.path.exists(path):
+        for encoding, compress in COMPRESSORS.items():
+            write_file_atomic(path + ENCODING_EXTENSIONS[encoding], compress(content))
+        # Written last, its presence means the siblings exist too
+        write_file_atomic(path, content)
+
+    return filename
+
+
+def read_manifest(directory: str) -> dict:
+    """Return the manifest of the last export, or an empty dict."""
+    try:
+        with open(os.path.join(directory, MENU_EXPORT_MANIFEST), "rb") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def get_manifest_files(manifest: dict) -> set:
+    """Return the filenames referenced by a manifest."""
+    return {manifest.get("list"), *manifest.get("detail", {}).values()} - {None}
+
+
+def export_menu_files(base_url: str, directory: str = None) -> dict:
+    """
+    Render the public menu into static JSON files for the web server to
+    serve directly.
+
+    The `MenuListView` payload and one `MenuDetailView` payload per category
+    are written with content-hashed filenames and ``.gz``/``.br`` siblings,
+    then ``manifest.json`` maps them to their filename. Files referenced by
+    neither the new nor the previous manifest are removed.
+
+    Args:
+        base_url: Scheme and host used to build the absolute icon URLs.
+        directory: Output directory, defaulting to `get_export_dir()`.
+
+    Returns:
+        dict: The new manifest.
+    """
+    directory = directory or get_export_dir()
+    os.makedirs(directory, exist_ok=True)
+
+    version = get_menu_version()
+    snapshot = build_menu_snapshot(SnapshotRequest(base_url))
+
+    manifest = {
+        "version": version,
+        "encodings": list(COMPRESSORS),
+        "list": write_hashed_file(directory, "menu-list", snapshot["list"]),
+        "detail": {
+            slug: write_hashed_file(directory, f"menu-detail-{slug}", content)
+            for slug, content in snapshot["detail"].items()
+        },
+    }
+
+    # Keep the previous files for clients still holding the previous manifest
+    keep = get_manifest_files(manifest) | get_manifest_files(read_manifest(directory))
+    write_file_atomic(
+        os.path.join(directory, MENU_EXPORT_MANIFEST),
+        json.dumps(manifest, ensure_ascii=False, indent=2).encode(),
+    )
+
+    for filename in os.listdir(directory):
+        if filename.startswith("menu-") and filename.split(".json")[0] + ".json" not in keep:
+            os.remove(os.path.join(directory, filename))
+
+    cache.set(MENU_EXPORT_VERSION_KEY, version, None)
+    return manifest
+
+
+def run_scheduled_menu_export():
+    """
+    Export the static menu unless it is already up to date, letting a
+    single worker export at a time.
+    """
+    if not cache.add(MENU_EXPORT_LOCK_KEY, True, MENU_EXPORT_LOCK_TIMEOUT):
+        # Another worker is exporting, possibly an older version
+        schedule_menu_export()
+        return
+
+    try:
+        if cache.get(MENU_EXPORT_VERSION_KEY) != get_menu_version():
+            export_menu_files(MENU_EXPORT_BASE_URL)
+    except Exception as e:
+        logger.error(f"Error:Failed to export the static menu | Detail:error={str(e)}")
+    finally:
+        cache.delete(MENU_EXPORT_LOCK_KEY)
+        connections.close_all()
+
+
+def schedule_menu_export(delay: float = MENU_EXPORT_DELAY):
+    """
+    Export the static menu once no edit has happened for `delay` seconds.
+
+    Each call restarts the countdown, so a burst of edits is exported once.
+    Does nothing unless `MENU_EXPORT_BASE_URL` is set.
+    """
+    global _export_timer
+    if not MENU_EXPORT_BASE_URL:
+        return
+
+    with _export_timer_lock:
+        if _export_timer is not None:
+            _export_timer.cancel()
+        _export_timer = threading.Timer(delay, run_scheduled_menu_export)
+        _export_timer.daemon = True
+        _export_timer.start()
@@ -0,0 +1,164 @@
+import io
+import os
+import hashlib
+from logging import getLogger
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+from django.db import connections
+from django.core.files.base import ContentFile
+
+from menu.models import Category
+from menu.menu_settings import MENU_ICON_VARIANT_SIZES
+from .export_utils import write_file_atomic
+
+
+logger = getLogger(__name__)
+
+# Largest width and height of a stored category icon, in pixels
+ICON_MAX_DIMENSION = 512
+
+# Encoder options of the icon variant formats
+ICON_VARIANT_OPTIONS = {
+    "WEBP": {"quality": 80, "method": 6},
+    "JPEG": {"quality": 85, "optimize": True, "progressive": True},
+    "PNG": {"optimize": True},
+}
+
+# A single worker processes the icons one at a time, off the request thread.
+# Pending icons are still processed when the process exits.
+_icon_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="icon")
+
+
+def resize_icon_file(path: str, max_dimension: int = ICON_MAX_DIMENSION) -> bool:
+    """
+    Shrink an icon file in place to fit in `max_dimension` pixels, keeping
+    its format.
+
+    JPEGs are decoded at a reduced scale no smaller than the target size, so
+    large photos are never decoded in full. The resized file replaces the
+    original atomically.
+
+    Returns:
+        bool: Whether the icon was resized.
+    """
+    with Image.open(path) as image:
+        if image.width <= max_dimension and image.height <= max_dimension:
+            return False
+
+        image_format = image.format
+        # Only has an effect on JPEGs, before anything is decoded
+        image.draft(image.mode, (max_dimension, max_dimension))
+        image.thumbnail((max_dimension, max_dimension))
+
+        buffer = io.BytesIO()
+        image.save(buffer, format=image_format)
+
+    write_file_atomic(path, buffer.getvalue())
+    return True
+
+
+def get_variants_dir(name: str) -> str:
+    """Return the storage directory of the variants of an icon."""
+    return f"{os.path.dirname(name)}/variants"
+
+
+def build_icon_variants(storage, name: str) -> dict:
+    """
+    Write the size variants of an icon in WebP and in its own format.
+
+    Every variant is named after its content hash, so an existing file is
+    never rewritten and the files can be cached forever.
+
+    Returns:
+        dict: ``{format: {width: storage name}}``, smallest first. Sizes
+        larger than the icon are left out, the icon itself is always included.
+    """
+    with storage.open(name) as file, Image.open(file) as image:
+        image_format = image.format
+        formats = {"webp": "WEBP", image_format.lower(): image_format}
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if image.has_transparency_data else "RGB")
+        if image_format == "JPEG":
+            image = image.convert("RGB")
+
+        stem = os.path.splitext(os.path.basename(name))[0]
+        directory = get_variants_dir(name)
+        largest = max(image.size)
+
+        variants = {key: {} for key in formats}
+        for size in sorted({min(size, largest) for size in MENU_ICON_VARIANT_SIZES}):
+            variant = image.copy()
+            variant.thumbnail((size, size))
+            for key, variant_format in formats.items():
+                buffer = io.BytesIO()
+                options = ICON_VARIANT_OPTIONS.get(variant_format, {})
+                variant.save(buffer, format=variant_format, **options)
+                content = buffer.getvalue()
+
+                content_hash = hashlib.md5(content).hexdigest()[:12]
+                variant_name = f"{directory}/{stem}-{variant.width}.{content_hash}.{key}"
+                if not storage.exists(variant_name):
+                    storage.save(variant_name, ContentFile(content))
+                variants[key][str(variant.width)] = variant_name
+
+    return variants
+
+
+def delete_icon_variants(storage, name: str, keep: dict = None):
+    """
+    Delete the variant files next to an icon, except the ones of `keep`, so
+    the variants of replaced icons do not pile up.
+    """
+    directory = get_variants_dir(name)
+    keep = {variant for widths in (keep or {}).values() for variant in widths.values()}
+    try:
+        _, filenames = storage.listdir(directory)
+    except FileNotFoundError:
+        return
+
+    for filename in filenames:
+        if f"{directory}/{filename}" not in keep:
+            storage.delete(f"{directory}/{filename}")
+
+
+def process_category_icon(category_id, name: str) -> bool:
+    """
+    Resize a category icon and build its variants, then store the variant
+    map if the category still has this icon.
+
+    Returns:
+        bool: Whether the variants were stored.
+    """
+    storage = Category._meta.get_field("icon").storage
+    resize_icon_file(storage.path(name))
+    variants = build_icon_variants(storage, name)
+
+    # Bypasses `save()`, whose regular saves leave the variants out. The
+    # update invalidates the menu, as every `MenuQuerySet` update does
+    if not Category.objects.filter(pk=category_id, icon=name).update(icon_variants=variants):
+        return False  # Deleted or given another icon since
+
+    delete_icon_variants(storage, name, keep=variants)
+    return True
+
+
+def process_icon(category_id, name: str):
+    """
+    Process a category icon, logging instead of raising as it runs in the
+    background.
+    """
+    try:
+        process_category_icon(category_id, name)
+    except Exception as e:
+        logger.error(
+            f"Error:Failed to process category icon | Detail:category={category_id}, icon={name}, error={str(e)}"
+        )
+    finally:
+        connections.close_all()
+
+
+def schedule_icon_processing(category_id, name: str):
+    """Queue a category icon to be processed by the background worker."""
+    _icon_executor.submit(process_icon, category_id, name)
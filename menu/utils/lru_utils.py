@@ -0,0 +1,71 @@
+import sys
+import time
+import threading
+from collections import OrderedDict
+
+
+class LRUCache:
+    """
+    Thread-safe, in-process LRU cache bounded by entry count and total size.
+
+    The least recently used entries are evicted once either bound is
+    exceeded, and every entry expires `ttl` seconds after it was set (never
+    if `None`). Sizes are the length of `bytes`/`str` values, or
+    `sys.getsizeof` for anything else.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl: float = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def get_size(value) -> int:
+        """Return the approximate memory size of a value."""
+        if isinstance(value, (bytes, str)):
+            return len(value)
+        return sys.getsizeof(value)
+
+    def get(self, key, default=None):
+        """Return the value for the key and mark it as recently used."""
+        with self._lock:
+            try:
+                value, size, expires_at = self._entries[key]
+            except KeyError:
+                return default
+            if expires_at is not None and time.monotonic() >= expires_at:
+                del self._entries[key]
+                self.size -= size
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        """Store a value, evicting the least recently used entries if needed."""
+        size = self.get_size(value)
+        if size > self.max_bytes:
+            # Never let a single entry flush the whole cache
+            return
+
+        expires_at = None if self.ttl is None else time.monotonic() + self.ttl
+        with self._lock:
+            if key in self._entries:
+                self.size -= self._entries.pop(key)[1]
+            self._entries[key] = (value, size, expires_at)
+            self.size += size
+
+            while len(self._entries) > self.max_entries or self.size > self.max_bytes:
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self.size -= evicted_size
+
+    def clear(self):
+        """Remove every entry."""
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
@@ -0,0 +1,240 @@
+import re
+import heapq
+import threading
+from collections import defaultdict
+
+from menu.models import Category, Product
+from menu.menu_version import get_menu_version
+
+
+ZWNJ = "\u200c"
+
+# Arabic and Persian variants of the same letters and digits, mapped to the
+# form used by Persian keyboards, diacritics and tatweel removed
+PERSIAN_TRANSLATION = str.maketrans(
+    {
+        "ي": "ی",  # Arabic yeh
+        "ى": "ی",  # Alef maksura
+        "ئ": "ی",  # Yeh with hamza
+        "ك": "ک",  # Arabic kaf
+        "ة": "ه",  # Teh marbuta
+        "ۀ": "ه",  # Heh with yeh
+        "آ": "ا",  # Alef with madda
+        "أ": "ا",  # Alef with hamza above
+        "إ": "ا",  # Alef with hamza below
+        "ٱ": "ا",  # Alef wasla
+        "ؤ": "و",  # Waw with hamza
+        "ـ": None,  # Tatweel
+        **{chr(code): None for code in range(0x064B, 0x0660)},  # Diacritics
+        "\u0670": None,  # Superscript alef
+        **{chr(0x06F0 + digit): str(digit) for digit in range(10)},  # Persian digits
+        **{chr(0x0660 + digit): str(digit) for digit in range(10)},  # Arabic digits
+    }
+)
+
+WORD_RE = re.compile(r"\w+")
+
+# Longest indexed prefix, longer query tokens fall back to the trigram index
+MAX_PREFIX_LENGTH = 16
+
+# Results kept for repeated queries, short prefixes match many documents
+MAX_CACHED_RESULTS = 2048
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalize Persian/Arabic text for searching: unify letter and digit
+    variants, drop diacritics, lowercase and collapse whitespace. ZWNJs are
+    kept, see `tokenize`.
+    """
+    text = text.translate(PERSIAN_TRANSLATION).casefold()
+    return " ".join(text.split())
+
+
+def tokenize(text: str) -> set:
+    """
+    Return the words of normalized text.
+
+    A word written with a ZWNJ (``می‌خواهم``) yields both its parts and the
+    joined word, since users type it either way.
+    """
+    words = set(WORD_RE.findall(text.replace(ZWNJ, " ")))
+    words.update(WORD_RE.findall(text.replace(ZWNJ, "")))
+    return words
+
+
+def get_trigrams(word: str) -> set:
+    """Return the trigrams of a word."""
+    return {word[i : i + 3] for i in range(len(word) - 2)}
+
+
+class SearchIndex:
+    """
+    In-process prefix and trigram index over the names of the active menu
+    categories and products.
+
+    Every word prefix maps to the documents holding a word starting with it,
+    and every word trigram to the documents holding it, for matches inside
+    words. Queries only read in-memory dicts and sets, and the results of
+    recent queries are kept until the index changes.
+
+    The index follows the menu version: when it changes, the active rows are
+    fetched again and only the documents whose signature changed are
+    re-indexed, deleted or deactivated ones are dropped.
+    """
+
+    def __init__(self):
+        self.version = None
+        self.documents = {}  # key: (payload, text, rank)
+        self.signatures = {}  # key: signature of the indexed row
+        self.words = {}  # key: indexed words
+        self.prefixes = defaultdict(set)
+        self.trigrams = defaultdict(set)
+        self.results = {}  # (query words, query text, limit): payloads
+        self._lock = threading.Lock()
+
+    def add(self, key, name: str, payload: dict, signature=None):
+        """Index a document, replacing the previous one with the same key."""
+        self.remove(key)
+        self.results.clear()
+        text = normalize_text(name)
+        words = tokenize(text)
+
+        for word in words:
+            for length in range(1, min(len(word), MAX_PREFIX_LENGTH) + 1):
+                self.prefixes[word[:length]].add(key)
+            for trigram in get_trigrams(word):
+                self.trigrams[trigram].add(key)
+
+        # Categories first, then shorter names
+        rank = (key[0] != "category", len(text), text)
+        self.documents[key] = (payload, text.replace(ZWNJ, ""), rank)
+        self.signatures[key] = signature
+        self.words[key] = words
+
+    def remove(self, key):
+        """Remove a document from the index if present."""
+        words = self.words.pop(key, None)
+        if words is None:
+            return
+
+        self.results.clear()
+        for word in words:
+            for length in range(1, min(len(word), MAX_PREFIX_LENGTH) + 1):
+                self.discard(self.prefixes, word[:length], key)
+            for trigram in get_trigrams(word):
+                self.discard(self.trigrams, trigram, key)
+        del self.documents[key]
+        del self.signatures[key]
+
+    @staticmethod
+    def discard(postings: dict, term: str, key):
+        """Remove a document from the postings of a term, dropping empty ones."""
+        keys = postings.get(term)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del postings[term]
+
+    def sync(self, version: str):
+        """Bring the index up to date with the given menu version."""
+        rows = {}
+        for row in Category.objects.filter(is_active=True).values(
+            "id", "name", "slug", "updated_at"
+        ):
+            rows[("category", row["id"])] = (
+                row["name"],
+                {"type": "category", "id": str(row["id"]), "name": row["name"], "slug": row["slug"]},
+                row["updated_at"],
+            )
+
+        for row in Product.objects.filter(is_active=True, category__is_active=True).values(
+            "id", "name", "slug", "current_price", "updated_at", "category__slug"
+        ):
+            rows[("product", row["id"])] = (
+                row["name"],
+                {
+                    "type": "product",
+                    "id": str(row["id"]),
+                    "name": row["name"],
+                    "slug": row["slug"],
+                    "category": row["category__slug"],
+                    # Same as `MenuProductSerializer.get_price`
+                    "price": row["current_price"] if row["current_price"] is not None else 0,
+                },
+                (row["updated_at"], row["current_price"], row["category__slug"]),
+            )
+
+        for key in self.documents.keys() - rows.keys():
+            self.remove(key)
+        for key, (name, payload, signature) in rows.items():
+            if self.signatures.get(key, ()) != signature:
+                self.add(key, name, payload, signature)
+        self.version = version
+
+    def ensure_synced(self):
+        """Sync the index if the menu version changed since the last sync."""
+        version = get_menu_version()
+        if self.version != version:
+            with self._lock:
+                if self.version != version:
+                    self.sync(version)
+
+    def match(self, word: str) -> set:
+        """Return the keys of the documents with a word containing `word`."""
+        keys = set(self.prefixes.get(word[:MAX_PREFIX_LENGTH], ()))
+        if len(word) > MAX_PREFIX_LENGTH:
+            keys = {key for key in keys if word in self.documents[key][1]}
+
+        if len(word) >= 3:
+            # Words containing the query word, not only starting with it
+            postings = sorted(
+                (self.trigrams.get(trigram, ()) for trigram in get_trigrams(word)),
+                key=len,
+            )
+            candidates = set(postings[0]).intersection(*postings[1:])
+            keys |= {key for key in candidates - keys if word in self.documents[key][1]}
+        return keys
+
+    def search(self, query: str, limit: int = 10) -> list:
+        """
+        Return the payloads of the documents matching every word of the query,
+        best matches first.
+        """
+        self.ensure_synced()
+        normalized = normalize_text(query)
+        words = WORD_RE.findall(normalized.replace(ZWNJ, " "))
+        if not words:
+            return []
+
+        # The query in its own order, compared with the start of the names
+        # which are indexed without their ZWNJs
+        text = " ".join(WORD_RE.findall(normalized.replace(ZWNJ, "")))
+        cache_key = (" ".join(words), text, limit)
+        with self._lock:
+            results = self.results.get(cache_key)
+            if results is not None:
+                return results
+
+            words = sorted(words, key=len)
+            keys = self.match(words[-1])  # Longest word, fewest matches
+            for word in words[:-1]:
+                if not keys:
+                    break
+                keys &= self.match(word)
+
+            best = heapq.nsmallest(
+                limit,
+                (self.documents[key] for key in keys),
+                # Names starting with the query first
+                key=lambda document: (not document[1].startswith(text), document[2]),
+            )
+            results = [payload for payload, _, _ in best]
+
+            if len(self.results) >= MAX_CACHED_RESULTS:
+                self.results.clear()
+            self.results[cache_key] = results
+            return results
+
+
+search_index = SearchIndex()
@@ -0,0 +1,374 @@
+import hashlib
+from logging import getLogger
+from urllib.parse import urlsplit
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connections
+from django.http import HttpRequest
+from django.core.cache import cache
+from rest_framework.renderers import JSONRenderer
+
+from menu.models import Category
+from menu.menu_version import get_menu_version, aget_menu_version
+from menu.api.v1.serializers import serialize_menu, aserialize_menu
+from menu.menu_settings import (
+    MENU_SNAPSHOT_TIMEOUT,
+    MENU_LOCAL_CACHE_MAX_SIZE,
+    MENU_LOCAL_CACHE_MAX_ENTRIES,
+    MENU_LOCAL_CACHE_TTL,
+)
+from .lru_utils import LRUCache
+from .compression_utils import COMPRESSORS
+
+
+# Base URLs (scheme and host) the snapshot has been requested for
+MENU_SNAPSHOT_BASES_KEY = "menu:snapshot:bases"
+
+logger = getLogger(__name__)
+
+# A single worker rebuilds the snapshots off the committing thread, readers
+# build the snapshot lazily until it is done.
+_rebuild_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="menu-snapshot")
+
+# Per-process cache in front of the shared cache, entries are keyed by menu
+# version so a version bump from any worker makes them unreachable.
+local_cache = LRUCache(
+    max_entries=MENU_LOCAL_CACHE_MAX_ENTRIES,
+    max_bytes=MENU_LOCAL_CACHE_MAX_SIZE,
+    ttl=MENU_LOCAL_CACHE_TTL,
+)
+
+
+class SnapshotRequest(HttpRequest):
+    """
+    Minimal request used to build absolute icon URLs for a given base URL
+    when the snapshot is rebuilt outside of a real request.
+    """
+
+    def __init__(self, base_url: str):
+        super().__init__()
+        parts = urlsplit(base_url)
+        self._scheme = parts.scheme
+        self.META["HTTP_HOST"] = parts.netloc
+
+    def _get_scheme(self):
+        return self._scheme
+
+
+def get_base_url(request) -> str:
+    """Return the scheme and host the request was made to."""
+    return request.build_absolute_uri("/")
+
+
+def get_snapshot_key(version: str, base_url: str, name: str) -> str:
+    """
+    Return the shared cache key of a menu snapshot entry.
+
+    Args:
+        version: The menu version the entry was built for.
+        base_url: The base URL the entry was built for.
+        name: ``list``, ``slugs`` or ``detail:<slug>``, suffixed with
+            ``:<encoding>`` for a compressed variant.
+    """
+    base_hash = hashlib.md5(base_url.encode()).hexdigest()
+    return f"menu:snapshot:{version}:{base_hash}:{name}"
+
+
+def render_menu_snapshot(data: list) -> dict:
+    """
+    Render the serialized menu into JSON bytes ready to be sent.
+
+    Returns:
+        dict: ``{"list": bytes, "detail": {slug: bytes}}`` holding the
+        `MenuListView` payload and one `MenuDetailView` payload per category.
+    """
+    renderer = JSONRenderer()
+    return {
+        "list": renderer.render(data),
+        "detail": {category["slug"]: renderer.render(category) for category in data},
+    }
+
+
+def build_menu_snapshot(request) -> dict:
+    """Serialize the whole public menu, see `render_menu_snapshot`."""
+    data = serialize_menu(
+        Category.objects.filter(is_active=True), context={"request": request}
+    )
+    return render_menu_snapshot(data)
+
+
+def get_snapshot_entries(snapshot: dict) -> dict:
+    """Split a menu snapshot into its cache entries, keyed by entry name."""
+    entries = {"list": snapshot["list"], "slugs": frozenset(snapshot["detail"])}
+    for slug, content in snapshot["detail"].items():
+        entries[f"detail:{slug}"] = content
+    return entries
+
+
+def store_menu_snapshot(request, version: str) -> dict:
+    """
+    Build the menu snapshot for the request's base URL and cache it in both
+    the shared cache and the local cache, one entry per payload.
+    """
+    base_url = get_base_url(request)
+    snapshot = build_menu_snapshot(request)
+    entries = get_snapshot_entries(snapshot)
+
+    cache.set_many(
+        {
+            get_snapshot_key(version, base_url, name): value
+            for name, value in entries.items()
+        },
+        MENU_SNAPSHOT_TIMEOUT,
+    )
+    for name, value in entries.items():
+        local_cache.set((version, base_url, name), value)
+
+    # Remember the base URL so the snapshot can be rebuilt eagerly on changes
+    bases = cache.get(MENU_SNAPSHOT_BASES_KEY, [])
+    if base_url not in bases:
+        cache.set(MENU_SNAPSHOT_BASES_KEY, [*bases, base_url], None)
+
+    return snapshot
+
+
+def get_snapshot_entry(request, version: str, name: str):
+    """
+    Return a menu snapshot entry from the local cache, falling back to the
+    shared cache. Returns `None` if the entry is in neither.
+    """
+    base_url = get_base_url(request)
+    value = local_cache.get((version, base_url, name))
+    if value is None:
+        value = cache.get(get_snapshot_key(version, base_url, name))
+        if value is not None:
+            local_cache.set((version, base_url, name), value)
+    return value
+
+
+def encode_snapshot_entry(request, version: str, name: str, content: bytes, encoding):
+    """
+    Compress a snapshot entry with the given content encoding and cache the
+    compressed bytes next to it, so each variant is compressed once per menu
+    version. Returns the content as is when `encoding` is `None`.
+    """
+    if encoding is None:
+        return content
+
+    compressed = COMPRESSORS[encoding](content)
+    base_url = get_base_url(request)
+    compressed_name = f"{name}:{encoding}"
+    cache.set(
+        get_snapshot_key(version, base_url, compressed_name),
+        compressed,
+        MENU_SNAPSHOT_TIMEOUT,
+    )
+    local_cache.set((version, base_url, compressed_name), compressed)
+    return compressed
+
+
+def get_menu_list(request, version: str = None, encoding: str = None) -> bytes:
+    """
+    Return the `MenuListView` payload of the given (or current) menu version,
+    building the snapshot if it is not cached yet.
+
+    Args:
+        encoding: Content encoding of the returned bytes, `None` for none.
+    """
+    version = version or get_menu_version()
+    if encoding is not None:
+        compressed = get_snapshot_entry(request, version, f"list:{encoding}")
+        if compressed is not None:
+            return compressed
+
+    content = get_snapshot_entry(request, version, "list")
+    if content is None:
+        content = store_menu_snapshot(request, version)["list"]
+    return encode_snapshot_entry(request, version, "list", content, encoding)
+
+
+def get_menu_slugs(request, version: str = None) -> frozenset:
+    """
+    Return the slugs of the active categories of the given (or current)
+    menu version, building the snapshot if it is not cached yet.
+    """
+    version = version or get_menu_version()
+    slugs = get_snapshot_entry(request, version, "slugs")
+    if slugs is None:
+        slugs = frozenset(store_menu_snapshot(request, version)["detail"])
+    return slugs
+
+
+def get_menu_detail(request, slug: str, version: str = None, encoding: str = None):
+    """
+    Return the `MenuDetailView` payload of a category for the given (or
+    current) menu version, building the snapshot if it is not cached yet.
+
+    Args:
+        encoding: Content encoding of the returned bytes, `None` for none.
+
+    Returns:
+        bytes: The payload, or `None` if there is no active category with the slug.
+    """
+    version = version or get_menu_version()
+    name = f"detail:{slug}"
+    if encoding is not None:
+        compressed = get_snapshot_entry(request, version, f"{name}:{encoding}")
+        if compressed is not None:
+            return compressed
+
+    content = get_snapshot_entry(request, version, name)
+    if content is None:
+        slugs = get_snapshot_entry(request, version, "slugs")
+        if slugs is not None and slug not in slugs:
+            return None
+
+        # The snapshot was never built for this version or the entry was evicted
+        content = store_menu_snapshot(request, version)["detail"].get(slug)
+        if content is None:
+            return None
+
+    return encode_snapshot_entry(request, version, name, content, encoding)
+
+
+def rebuild_menu_snapshots(version: str = None) -> int:
+    """
+    Rebuild the menu snapshot for every base URL it has been served from.
+
+    Returns:
+        int: The number of rebuilt snapshots.
+    """
+    version = version or get_menu_version()
+    bases = cache.get(MENU_SNAPSHOT_BASES_KEY, [])
+    for base_url in bases:
+        store_menu_snapshot(SnapshotRequest(base_url), version)
+    return len(bases)
+
+
+def rebuild_current_menu_snapshots(version: str):
+    """
+    Rebuild the menu snapshots unless the menu changed again since `version`,
+    logging instead of raising as it runs in the background.
+    """
+    try:
+        # A newer version is rebuilt by its own task
+        if version == get_menu_version():
+            rebuild_menu_snapshots(version)
+    except Exception as e:
+        # The menu will be rebuilt lazily on the next request instead
+        logger.error(f"Error:Failed to rebuild menu snapshot | Detail:error={str(e)}")
+    finally:
+        connections.close_all()
+
+
+def schedule_menu_rebuild(version: str):
+    """Queue the rebuild of the menu snapshots of a new version in the background."""
+    _rebuild_executor.submit(rebuild_current_menu_snapshots, version)
+
+
+# Async versions of the snapshot functions, used by the ASGI menu views. They
+# share the local cache and the cache entries with the sync versions.
+
+
+async def astore_menu_snapshot(request, version: str) -> dict:
+    """Async version of `store_menu_snapshot`."""
+    base_url = get_base_url(request)
+    data = await aserialize_menu(
+        Category.objects.filter(is_active=True), context={"request": request}
+    )
+    snapshot = render_menu_snapshot(data)
+    entries = get_snapshot_entries(snapshot)
+
+    await cache.aset_many(
+        {
+            get_snapshot_key(version, base_url, name): value
+            for name, value in entries.items()
+        },
+        MENU_SNAPSHOT_TIMEOUT,
+    )
+    for name, value in entries.items():
+        local_cache.set((version, base_url, name), value)
+
+    bases = await cache.aget(MENU_SNAPSHOT_BASES_KEY, [])
+    if base_url not in bases:
+        await cache.aset(MENU_SNAPSHOT_BASES_KEY, [*bases, base_url], None)
+
+    return snapshot
+
+
+async def aget_snapshot_entry(request, version: str, name: str):
+    """Async version of `get_snapshot_entry`."""
+    base_url = get_base_url(request)
+    value = local_cache.get((version, base_url, name))
+    if value is None:
+        value = await cache.aget(get_snapshot_key(version, base_url, name))
+        if value is not None:
+            local_cache.set((version, base_url, name), value)
+    return value
+
+
+async def aencode_snapshot_entry(
+    request, version: str, name: str, content: bytes, encoding
+):
+    """Async version of `encode_snapshot_entry`."""
+    if encoding is None:
+        return content
+
+    compressed = COMPRESSORS[encoding](content)
+    base_url = get_base_url(request)
+    compressed_name = f"{name}:{encoding}"
+    await cache.aset(
+        get_snapshot_key(version, base_url, compressed_name),
+        compressed,
+        MENU_SNAPSHOT_TIMEOUT,
+    )
+    local_cache.set((version, base_url, compressed_name), compressed)
+    return compressed
+
+
+async def aget_menu_list(request, version: str = None, encoding: str = None) -> bytes:
+    """Async version of `get_menu_list`."""
+    version = version or await aget_menu_version()
+    if encoding is not None:
+        compressed = await aget_snapshot_entry(request, version, f"list:{encoding}")
+        if compressed is not None:
+            return compressed
+
+    content = await aget_snapshot_entry(request, version, "list")
+    if content is None:
+        content = (await astore_menu_snapshot(request, version))["list"]
+    return await aencode_snapshot_entry(request, version, "list", content, encoding)
+
+
+async def aget_menu_slugs(request, version: str = None) -> frozenset:
+    """Async version of `get_menu_slugs`."""
+    version = version or await aget_menu_version()
+    slugs = await aget_snapshot_entry(request, version, "slugs")
+    if slugs is None:
+        slugs = frozenset((await astore_menu_snapshot(request, version))["detail"])
+    return slugs
+
+
+async def aget_menu_detail(
+    request, slug: str, version: str = None, encoding: str = None
+):
+    """Async version of `get_menu_detail`."""
+    version = version or await aget_menu_version()
+    name = f"detail:{slug}"
+    if encoding is not None:
+        compressed = await aget_snapshot_entry(request, version, f"{name}:{encoding}")
+        if compressed is not None:
+            return compressed
+
+    content = await aget_snapshot_entry(request, version, name)
+    if content is None:
+        slugs = await aget_snapshot_entry(request, version, "slugs")
+        if slugs is not None and slug not in slugs:
+            return None
+
+        # The snapshot was never built for this version or the entry was evicted
+        content = (await astore_menu_snapshot(request, version))["detail"].get(slug)
+        if content is None:
+            return None
+
+    return await aencode_snapshot_entry(request, version, name, content, encoding)
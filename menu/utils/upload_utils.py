@@ -0,0 +1,81 @@
+from django.core.files.uploadhandler import (
+    SkipFile,
+    StopUpload,
+    TemporaryFileUploadHandler,
+)
+
+from menu.menu_settings import Category_ICON_MAX_SIZE
+
+
+# Leading bytes of the accepted image formats and their file extension
+IMAGE_SIGNATURES = {
+    b"\x89PNG\r\n\x1a\n": "png",
+    b"\xff\xd8\xff": "jpg",
+}
+IMAGE_SIGNATURE_LENGTH = max(len(signature) for signature in IMAGE_SIGNATURES)
+
+# Room left for the multipart boundaries and part headers around the file
+MULTIPART_OVERHEAD = 16 * 1024
+
+
+def sniff_image_extension(header: bytes):
+    """
+    Return the file extension of an image from its leading bytes, or `None`
+    if it is not a PNG or JPEG.
+    """
+    for signature, extension in IMAGE_SIGNATURES.items():
+        if header.startswith(signature):
+            return extension
+    return None
+
+
+class IconUploadHandler(TemporaryFileUploadHandler):
+    """
+    Upload handler streaming the ``icon`` file of a multipart request to a
+    temporary file, never holding it in memory.
+
+    The upload is stopped, without reading the rest of the request, as soon
+    as the file grows past `max_size` or its first bytes are not a PNG or
+    JPEG signature. The reason is left in `error` for the view to report.
+    """
+
+    field_name = "icon"
+
+    def __init__(self, request=None, max_size: int = Category_ICON_MAX_SIZE):
+        super().__init__(request)
+        self.max_size = max_size
+        self.error = None
+        self.extension = None
+        self.header = b""
+
+    def new_file(self, field_name, *args, **kwargs):
+        if field_name != self.field_name:
+            raise SkipFile()
+        super().new_file(field_name, *args, **kwargs)
+
+    def stop(self, error: str):
+        """Stop the upload, dropping the rest of the request body."""
+        self.error = error
+        raise StopUpload(connection_reset=True)
+
+    def sniff(self):
+        """Check the signature of the file once its first bytes arrived."""
+        self.extension = sniff_image_extension(self.header)
+        if self.extension is None:
+            self.stop("invalid")
+
+    def receive_data_chunk(self, raw_data, start):
+        if start + len(raw_data) > self.max_size:
+            self.stop("too_large")
+
+        if self.extension is None:
+            self.header += raw_data[: IMAGE_SIGNATURE_LENGTH - len(self.header)]
+            if len(self.header) >= IMAGE_SIGNATURE_LENGTH:
+                self.sniff()
+
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        if self.extension is None:
+            self.sniff()  # Smaller than a signature
+        return super().file_complete(file_size)
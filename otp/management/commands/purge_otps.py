@@ -0,0 +1,116 @@
+import json
+import time
+from datetime import timedelta
+from contextlib import nullcontext
+
+from django.db import transaction
+from django.utils import timezone
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.management.base import BaseCommand, CommandError
+
+from otp.models import LoginOtp
+
+
+# Fields of the archived OTPs, without the code hash
+ARCHIVE_FIELDS = (
+    "id",
+    "user_id",
+    "attempts",
+    "max_attempts",
+    "is_active",
+    "is_verified",
+    "expires_at",
+    "created_at",
+    "last_attempted",
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete the login OTPs expired for longer than the retention window, "
+        "in small batches so the table is never locked for long."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--retention-days",
+            type=float,
+            default=30,
+            help="Keep OTPs for this many days after they expired (default: 30).",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of OTPs deleted per transaction (default: 1000).",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=0,
+            help="Seconds to wait between batches, to spare a busy database (default: 0).",
+        )
+        parser.add_argument(
+            "--archive",
+            metavar="FILE",
+            help="Append the purged OTPs to this JSONL file before deleting them.",
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options["retention_days"])
+        batch_size = options["batch_size"]
+
+        started = time.perf_counter()
+        purged = 0
+        try:
+            file = (
+                open(options["archive"], "a", encoding="utf-8")
+                if options["archive"]
+                else nullcontext()
+            )
+            with file as file:
+                # One range scan of the (is_active, expires_at) index per state
+                for is_active in (False, True):
+                    otps = LoginOtp.objects.filter(
+                        is_active=is_active, expires_at__lt=cutoff
+                    ).order_by("expires_at")
+                    while True:
+                        deleted = self.purge_batch(otps, batch_size, file)
+                        purged += deleted
+                        if deleted < batch_size:
+                            break
+                        if options["sleep"]:
+                            time.sleep(options["sleep"])
+        except OSError as e:
+            raise CommandError(str(e))
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Successfully purged {purged} OTPs in {elapsed:.2f}s "
+                f"({purged / elapsed if elapsed else 0:,.0f} rows/sec)."
+            )
+        )
+
+    def purge_batch(self, otps, batch_size: int, file) -> int:
+        """
+        Archive and delete the next batch of OTPs in its own transaction.
+
+        Returns:
+            int: The number of OTPs deleted.
+        """
+        with transaction.atomic():
+            if file is None:
+                otp_ids = list(otps.values_list("id", flat=True)[:batch_size])
+            else:
+                rows = list(otps.values(*ARCHIVE_FIELDS)[:batch_size])
+                otp_ids = [row["id"] for row in rows]
+                file.writelines(json.dumps(row, cls=DjangoJSONEncoder) + "\n" for row in rows)
+
+            if not otp_ids:
+                return 0
+            deleted, _ = LoginOtp.objects.filter(id__in=otp_ids).delete()
+
+        if file is not None:
+            file.flush()
+        return deleted
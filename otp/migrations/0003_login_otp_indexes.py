@@ -0,0 +1,19 @@
+# Generated by Django 5.1 on 2026-10-18 15:52
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('otp', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='loginotp',
+            index=models.Index(fields=['is_active', 'expires_at'], name='otp_loginot_is_acti_c7c74a_idx'),
+        ),
+    ]
@@ -14,6 +14,10 @@ class LoginOtp(OTP):
         ordering = ["-created_at"]
         verbose_name = _("login OTP code")
         verbose_name_plural = _("login OTP codes")
+        indexes = [
+            # Scan of the expired OTPs by `purge_otps`
+            models.Index(fields=["is_active", "expires_at"]),
+        ]
 
     def __str__(self) -> str:
         return f"Login OTP for {self.user.username}"
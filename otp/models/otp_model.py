@@ -1,4 +1,3 @@
-import os
 import uuid
 import hashlib
 from random import choices
@@ -7,7 +6,7 @@ from datetime import timedelta
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
-OTP_CODE_EXPIRE_TIME = int(os.environ.get("OTP_CODE_EXPIRE_TIME", 5))
+from otp.otp_settings import OTP_CODE_EXPIRE_TIME
 
 
 def get_default_expires_at():
@@ -0,0 +1,8 @@
+import os
+
+# How long (in minutes) an OTP code can be used, defaulting to 5 minutes
+OTP_CODE_EXPIRE_TIME = int(os.environ.get("OTP_CODE_EXPIRE_TIME", 5))
+
+# Where login OTPs are kept: "database" keeps `LoginOtp` rows for auditing, "cache" keeps them in
+# the cache until they expire. The cache store needs a cache shared by all workers (CACHE_BACKEND)
+OTP_STORE = os.environ.get("OTP_STORE", "database")
@@ -1,3 +1,273 @@
-from django.test import TestCase
+import os
+import json
+import uuid
+import tempfile
+from io import StringIO
+from unittest import mock
+from datetime import timedelta
 
-# Create your tests here.
+from django.utils import timezone
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from users.models import User
+from otp.models import LoginOtp
+from otp.utils.store_utils import OtpResult, OtpStore, CacheOtpStore, DatabaseOtpStore
+from otp.management.commands.purge_otps import ARCHIVE_FIELDS, Command as PurgeOtpsCommand
+
+
+class OtpStoreTests(SimpleTestCase):
+    def test_abstract_store(self):
+        """A store missing one of the methods cannot be created."""
+
+        class PartialOtpStore(OtpStore):
+            def create(self, user):
+                return uuid.uuid4(), "123456"
+
+        with self.assertRaises(TypeError):
+            PartialOtpStore()
+
+
+class OtpStoreTestsMixin:
+    """
+    Tests every OTP store must pass, so the API answers the same whatever
+    the OTPs are kept in. Test cases define `store_class` and `expire_otp`,
+    making the OTP of the test expired.
+    """
+
+    store_class = None
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="admin", password="pass12345")
+
+    def setUp(self):
+        self.store: OtpStore = self.store_class()
+        self.otp_id, self.otp_code = self.store.create(self.user)
+        self.wrong_code = "000000" if self.otp_code != "000000" else "111111"
+
+    def test_create(self):
+        """Every OTP has its own id and a six-digit code."""
+        otp_id, otp_code = self.store.create(self.user)
+        self.assertNotEqual(otp_id, self.otp_id)
+        self.assertRegex(otp_code, r"^[0-9]{6}$")
+
+    def test_verify_once(self):
+        """The right code verifies the OTP once, reusing it is rejected."""
+        self.assertEqual(
+            self.store.verify(self.otp_id, self.otp_code), (OtpResult.VERIFIED, self.user)
+        )
+        self.assertEqual(
+            self.store.verify(self.otp_id, self.otp_code), (OtpResult.INVALID, None)
+        )
+
+    def test_unknown_otp(self):
+        """An unknown OTP id is rejected."""
+        self.assertEqual(
+            self.store.verify(uuid.uuid4(), self.otp_code), (OtpResult.INVALID, None)
+        )
+
+    def test_exhaust(self):
+        """Three wrong codes are rejected, the next attempt exhausts the OTP."""
+        for _ in range(3):
+            self.assertEqual(
+                self.store.verify(self.otp_id, self.wrong_code), (OtpResult.WRONG, self.user)
+            )
+        self.assertEqual(
+            self.store.verify(self.otp_id, self.otp_code), (OtpResult.EXHAUSTED, self.user)
+        )
+        self.assertEqual(
+            self.store.verify(self.otp_id, self.otp_code), (OtpResult.INVALID, None)
+        )
+
+    def test_expired(self):
+        """An expired OTP is reported as expired, then unusable."""
+        self.expire_otp()
+        self.assertEqual(
+            self.store.verify(self.otp_id, self.otp_code), (OtpResult.EXPIRED, self.user)
+        )
+        self.assertEqual(
+            self.store.verify(self.otp_id, self.otp_code), (OtpResult.INVALID, None)
+        )
+
+
+class DatabaseOtpStoreContractTests(OtpStoreTestsMixin, TestCase):
+    store_class = DatabaseOtpStore
+
+    def expire_otp(self):
+        LoginOtp.objects.filter(id=self.otp_id).update(expires_at="2000-01-01T00:00:00Z")
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+)
+class CacheOtpStoreTests(OtpStoreTestsMixin, TestCase):
+    store_class = CacheOtpStore
+
+    def setUp(self):
+        cache.clear()
+        super().setUp()
+
+    def expire_otp(self):
+        key, _ = self.store.get_keys(self.otp_id)
+        cache.set(key, {**cache.get(key), "expires_at": 0})
+
+    def test_no_rows_written(self):
+        """The cache store keeps no `LoginOtp` rows."""
+        self.store.verify(self.otp_id, self.otp_code)
+        self.assertFalse(LoginOtp.objects.exists())
+
+
+class DatabaseOtpStoreTests(TestCase):
+    """
+    Tests of the attempt accounting of the database OTP store, which must
+    never let a code be guessed more than `max_attempts` times.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="admin", password="pass12345")
+
+    def setUp(self):
+        self.store = DatabaseOtpStore()
+        self.otp_id, self.otp_code = self.store.create(self.user)
+        self.wrong_code = "000000" if self.otp_code != "000000" else "111111"
+
+    def test_wrong_codes_exhaust_otp(self):
+        """Three wrong codes are rejected, the next attempt exhausts the OTP."""
+        for _ in range(3):
+            result, user = self.store.verify(self.otp_id, self.wrong_code)
+            self.assertEqual(result, OtpResult.WRONG)
+            self.assertEqual(user, self.user)
+
+        result, user = self.store.verify(self.otp_id, self.otp_code)
+        self.assertEqual(result, OtpResult.EXHAUSTED)
+        self.assertEqual(user, self.user)
+
+        otp_instance = LoginOtp.objects.get(id=self.otp_id)
+        self.assertFalse(otp_instance.is_active)
+        self.assertEqual(otp_instance.attempts, 4)
+        # Once deactivated, the OTP is unknown
+        self.assertEqual(self.store.verify(self.otp_id, self.otp_code)[0], OtpResult.INVALID)
+
+    def test_right_code_verifies_once(self):
+        """The right code verifies the OTP once, reusing it is rejected."""
+        self.assertEqual(
+            self.store.verify(self.otp_id, self.otp_code), (OtpResult.VERIFIED, self.user)
+        )
+        self.assertEqual(
+            self.store.verify(self.otp_id, self.otp_code), (OtpResult.INVALID, None)
+        )
+
+        otp_instance = LoginOtp.objects.get(id=self.otp_id)
+        self.assertTrue(otp_instance.is_verified)
+        self.assertFalse(otp_instance.is_active)
+
+    def test_concurrent_attempts_rejected(self):
+        """
+        Attempts used by concurrent requests after the OTP was loaded are
+        accounted for by the conditional update.
+        """
+        LoginOtp.objects.filter(id=self.otp_id).update(attempts=2)
+        check_otp = LoginOtp.check_otp
+
+        def check_otp_after_concurrent_guess(otp_instance, otp_code):
+            LoginOtp.objects.filter(id=self.otp_id).update(attempts=3)
+            return check_otp(otp_instance, otp_code)
+
+        with mock.patch.object(LoginOtp, "check_otp", check_otp_after_concurrent_guess):
+            wrong_result = self.store.verify(self.otp_id, self.wrong_code)
+            LoginOtp.objects.filter(id=self.otp_id).update(attempts=2)
+            right_result = self.store.verify(self.otp_id, self.otp_code)
+
+        self.assertEqual(wrong_result, (OtpResult.INVALID, None))
+        self.assertEqual(right_result, (OtpResult.INVALID, None))
+        otp_instance = LoginOtp.objects.get(id=self.otp_id)
+        self.assertEqual(otp_instance.attempts, 3)
+        self.assertFalse(otp_instance.is_verified)
+
+    def test_concurrent_exhaustion_bans_once(self):
+        """Of the requests exhausting the OTP together, only one gets EXHAUSTED."""
+        LoginOtp.objects.filter(id=self.otp_id).update(attempts=3)
+        stale_otp = LoginOtp.objects.select_related("user").get(id=self.otp_id)
+
+        with mock.patch.object(LoginOtp.objects, "select_related") as select_related:
+            select_related.return_value.get.return_value = stale_otp
+            results = [self.store.verify(self.otp_id, self.wrong_code)[0] for _ in range(2)]
+
+        self.assertEqual(results, [OtpResult.EXHAUSTED, OtpResult.INVALID])
+
+    def test_verify_queries(self):
+        """Every outcome takes at most two queries."""
+        with self.assertNumQueries(2):
+            self.assertEqual(self.store.verify(self.otp_id, self.wrong_code)[0], OtpResult.WRONG)
+        with self.assertNumQueries(2):
+            self.assertEqual(self.store.verify(self.otp_id, self.otp_code)[0], OtpResult.VERIFIED)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.store.verify(self.otp_id, self.otp_code)[0], OtpResult.INVALID)
+
+        otp_id, otp_code = self.store.create(self.user)
+        LoginOtp.objects.filter(id=otp_id).update(attempts=3)
+        with self.assertNumQueries(2):
+            self.assertEqual(self.store.verify(otp_id, otp_code)[0], OtpResult.EXHAUSTED)
+
+        otp_id, otp_code = self.store.create(self.user)
+        LoginOtp.objects.filter(id=otp_id).update(expires_at="2000-01-01T00:00:00Z")
+        with self.assertNumQueries(2):
+            self.assertEqual(self.store.verify(otp_id, otp_code)[0], OtpResult.EXPIRED)
+
+
+class PurgeOtpsCommandTests(TestCase):
+    """Tests of the batched deletion of the expired OTPs by `purge_otps`."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="admin", password="pass12345")
+
+    def create_otps(self, count: int, expired_days: float, **kwargs) -> list:
+        store = DatabaseOtpStore()
+        otp_ids = [store.create(self.user)[0] for _ in range(count)]
+        LoginOtp.objects.filter(id__in=otp_ids).update(
+            expires_at=timezone.now() - timedelta(days=expired_days), **kwargs
+        )
+        return otp_ids
+
+    def purge(self, *args) -> str:
+        stdout = StringIO()
+        with mock.patch.object(
+            PurgeOtpsCommand,
+            "purge_batch",
+            autospec=True,
+            side_effect=PurgeOtpsCommand.purge_batch,
+        ) as purge_batch:
+            call_command("purge_otps", "--batch-size=2", *args, stdout=stdout)
+        self.batches = purge_batch.call_count
+        return stdout.getvalue()
+
+    def test_purge_in_batches(self):
+        """Only the OTPs expired past the retention window are deleted, in batches."""
+        purged = self.create_otps(3, 40, is_active=False) + self.create_otps(2, 40)
+        kept = self.create_otps(2, 10, is_active=False) + self.create_otps(1, -1)
+
+        output = self.purge("--retention-days=30")
+
+        self.assertIn("Successfully purged 5 OTPs", output)
+        self.assertFalse(LoginOtp.objects.filter(id__in=purged).exists())
+        self.assertEqual(set(LoginOtp.objects.values_list("id", flat=True)), set(kept))
+        # Two batches of the used OTPs, then a full one and an empty one
+        self.assertEqual(self.batches, 4)
+
+    def test_archive_leaves_out_code(self):
+        """The purged OTPs are archived without their code hash."""
+        otp_ids = self.create_otps(3, 40, is_active=False)
+        with tempfile.TemporaryDirectory() as directory:
+            archive = os.path.join(directory, "otps.jsonl")
+            self.purge("--archive", archive)
+            with open(archive, encoding="utf-8") as file:
+                rows = [json.loads(line) for line in file]
+
+        self.assertEqual({row["id"] for row in rows}, {str(otp_id) for otp_id in otp_ids})
+        for row in rows:
+            self.assertEqual(tuple(row), ARCHIVE_FIELDS)
+            self.assertNotIn("code", row)
@@ -0,0 +1 @@
+from .store_utils import OtpResult, otp_store
@@ -0,0 +1,210 @@
+import abc
+import enum
+import time
+import uuid
+
+from django.utils import timezone
+from django.db.models import F
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+
+from users.models import User
+from otp.models import LoginOtp
+from otp.otp_settings import OTP_STORE, OTP_CODE_EXPIRE_TIME
+
+
+class OtpResult(enum.Enum):
+    """Outcome of verifying a login OTP code."""
+
+    VERIFIED = "verified"
+    # No usable OTP with this id
+    INVALID = "invalid"
+    EXPIRED = "expired"
+    WRONG = "wrong"
+    # All attempts were used, the user is to be banned
+    EXHAUSTED = "exhausted"
+
+
+class OtpStore(abc.ABC):
+    """
+    Storage of the login OTPs, creating them and verifying their codes.
+
+    Only the hash of a code is stored. An OTP can be verified once, and is
+    unusable once it expired or its attempts were used.
+    """
+
+    # Verification attempts of an OTP, as the `max_attempts` default of `OTP`
+    max_attempts = 3
+
+    @abc.abstractmethod
+    def create(self, user: User) -> tuple:
+        """
+        Create a login OTP for the user.
+
+        Returns:
+            tuple: The OTP id and its plain code, to send to the user.
+        """
+
+    @abc.abstractmethod
+    def verify(self, otp_id, otp_code: str) -> tuple:
+        """
+        Verify an OTP code, counting the attempt and using the OTP up if the
+        code is right.
+
+        Returns:
+            tuple: The `OtpResult` and the user of the OTP, `None` if invalid.
+        """
+
+
+class DatabaseOtpStore(OtpStore):
+    """OTP store keeping `LoginOtp` rows, for deployments auditing the logins."""
+
+    def create(self, user: User) -> tuple:
+        otp_code = LoginOtp.generate_otp_code()
+        otp_instance = LoginOtp.objects.create(
+            user=user, code=LoginOtp.hash_otp(otp_code), max_attempts=self.max_attempts
+        )
+        return otp_instance.id, otp_code
+
+    def verify(self, otp_id, otp_code: str) -> tuple:
+        """
+        Verify the code with at most two queries, loading the OTP with its
+        user then updating it with a conditional ``UPDATE``.
+
+        The attempts are counted by the database, only while some are left,
+        so concurrent guesses cannot lose increments or use more attempts
+        than allowed, and an OTP is used up by a single request.
+        """
+        try:
+            otp_instance = LoginOtp.objects.select_related("user").get(
+                id=otp_id, is_verified=False, is_active=True
+            )
+        except LoginOtp.DoesNotExist:
+            return OtpResult.INVALID, None
+
+        otp_user: User = otp_instance.user
+        usable_otp = LoginOtp.objects.filter(id=otp_id, is_verified=False, is_active=True)
+        now = timezone.now()
+
+        # Check if all attempts have been used, only one of concurrent requests
+        # deactivates the OTP and gets the user banned
+        if not otp_instance.has_attempts_left():
+            if not usable_otp.update(
+                attempts=F("attempts") + 1, is_active=False, last_attempted=now
+            ):
+                return OtpResult.INVALID, None
+            return OtpResult.EXHAUSTED, otp_user
+
+        # Check if OTP is expired
+        if otp_instance.is_expired():
+            usable_otp.update(
+                attempts=F("attempts") + 1, is_active=False, last_attempted=now
+            )
+            return OtpResult.EXPIRED, otp_user
+
+        # Attempts left when loaded may have been used by concurrent requests since
+        usable_otp = usable_otp.filter(attempts__lt=F("max_attempts"))
+
+        # Check if the OTP is valid
+        if not otp_instance.check_otp(otp_code):
+            if not usable_otp.update(attempts=F("attempts") + 1, last_attempted=now):
+                return OtpResult.INVALID, None
+            return OtpResult.WRONG, otp_user
+
+        # OTP is verified, mark OTP as verified unless used meanwhile
+        if not usable_otp.update(is_active=False, is_verified=True, last_attempted=now):
+            return OtpResult.INVALID, None
+        return OtpResult.VERIFIED, otp_user
+
+
+class CacheOtpStore(OtpStore):
+    """
+    OTP store keeping the OTPs in the cache, with the attempts counted by the
+    atomic `incr` of the cache.
+
+    An OTP is kept for twice `OTP_CODE_EXPIRE_TIME`, so it is reported as
+    expired, like by the database store, until the cache drops it. Needs a
+    cache shared by all workers, an OTP created by one worker being verified
+    by another.
+    """
+
+    key_prefix = "otp:login"
+
+    def get_keys(self, otp_id) -> tuple:
+        """Return the cache keys of the OTP and of its attempts counter."""
+        key = f"{self.key_prefix}:{otp_id}"
+        return key, f"{key}:attempts"
+
+    def create(self, user: User) -> tuple:
+        otp_id = uuid.uuid4()
+        otp_code = LoginOtp.generate_otp_code()
+        key, attempts_key = self.get_keys(otp_id)
+
+        expire_time = OTP_CODE_EXPIRE_TIME * 60
+        cache.set_many(
+            {
+                key: {
+                    "user_id": user.pk,
+                    "code": LoginOtp.hash_otp(otp_code),
+                    "expires_at": time.time() + expire_time,
+                },
+                attempts_key: 0,
+            },
+            expire_time * 2,
+        )
+        return otp_id, otp_code
+
+    def verify(self, otp_id, otp_code: str) -> tuple:
+        key, attempts_key = self.get_keys(otp_id)
+
+        otp_data = cache.get(key)
+        if otp_data is None:
+            return OtpResult.INVALID, None
+
+        try:
+            attempts = cache.incr(attempts_key)
+        except ValueError:  # Counter expired meanwhile
+            return OtpResult.INVALID, None
+
+        try:
+            otp_user = User.objects.get(pk=otp_data["user_id"])
+        except User.DoesNotExist:
+            cache.delete_many([key, attempts_key])
+            return OtpResult.INVALID, None
+
+        # Check if all attempts have been used, only one of concurrent requests
+        # deletes the OTP and gets the user banned
+        if attempts > self.max_attempts:
+            if not cache.delete(key):
+                return OtpResult.INVALID, None
+            cache.delete(attempts_key)
+            return OtpResult.EXHAUSTED, otp_user
+
+        # Check if OTP is expired
+        if time.time() > otp_data["expires_at"]:
+            cache.delete_many([key, attempts_key])
+            return OtpResult.EXPIRED, otp_user
+
+        # Check if the OTP is valid
+        if LoginOtp.hash_otp(otp_code) != otp_data["code"]:
+            return OtpResult.WRONG, otp_user
+
+        # Only one of concurrent requests with the right code deletes the OTP
+        if not cache.delete(key):
+            return OtpResult.INVALID, None
+        cache.delete(attempts_key)
+        return OtpResult.VERIFIED, otp_user
+
+
+OTP_STORES = {
+    "database": DatabaseOtpStore,
+    "cache": CacheOtpStore,
+}
+
+if OTP_STORE not in OTP_STORES:
+    raise ImproperlyConfigured(
+        f"OTP_STORE must be one of {', '.join(OTP_STORES)}, not {OTP_STORE!r}."
+    )
+
+# The OTP store of the application
+otp_store: OtpStore = OTP_STORES[OTP_STORE]()
@@ -1,6 +1,10 @@
+from django.conf import settings
 from django.urls import path
-from users.api.v1.views import MeView
+from users.api.v1.views import MeView, AsyncMeView
 
+# The ASGI deployment serves the current user with the native async view
+if settings.ASYNC_VIEWS:
+    MeView = AsyncMeView
 
 urlpatterns = [
     path("me/", MeView.as_view(), name="me-v1"),
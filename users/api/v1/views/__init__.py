@@ -1 +1 @@
-from .user_view import MeView
+from .user_view import MeView, AsyncMeView
@@ -1,3 +1,4 @@
+from VandAPI.async_views import AsyncAPIView
 from rest_framework.views import APIView
 from rest_framework.request import Request
 from rest_framework.response import Response
@@ -13,3 +14,16 @@ class MeView(APIView):
         user = request.user
         serializer = UserSerializer(user)
         return Response(serializer.data)
+
+
+class AsyncMeView(AsyncAPIView):
+    """
+    Async version of `MeView` for the ASGI deployment, the user is loaded
+    with the async ORM while authenticating the request.
+    """
+
+    authentication_required = True
+
+    async def get(self, request):
+        serializer = UserSerializer(request.user)
+        return self.render(serializer.data)